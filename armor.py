@@ -2,6 +2,8 @@ from action import Action
 from thing import Thing
 import gametools
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Armor(Thing):
     #
     # SPECIAL METHODS (i.e __method__() format)
@@ -10,7 +12,7 @@ class Armor(Thing):
         Thing.__init__(self, default_name, path, pref_id)
         self.bonus = bonus
         self.unwieldiness = unwieldiness
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
 
     #
     # INTERNAL USE METHODS (i.e. _method(), not imported)
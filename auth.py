@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import hmac
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+import gametools
+
+#
+# PASSWORD HASHING
+#   Stored passwords have the form "pbkdf2_sha256$<iterations>$<salt>$<hash>",
+#   with salt and hash base64-encoded. Anything else is a legacy password from
+#   an older save file (stored in plaintext), which is verified by direct
+#   comparison and should be re-hashed after the next successful login.
+#
+HASH_SCHEME = 'pbkdf2_sha256'
+HASH_ITERATIONS = 200000
+SALT_BYTES = 16
+AUTH_WORKERS = 2  # threads available for hashing; hashlib releases the GIL while it works
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+def hash_password(password, iterations=HASH_ITERATIONS):
+    """Return a salted PBKDF2 hash of <password>, in the stored format described
+    above. This is deliberately slow; call it via AuthService from game code."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return '%s$%d$%s$%s' % (HASH_SCHEME, iterations, _b64(salt), _b64(digest))
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(HASH_SCHEME + '$')
+
+def verify_password(password, stored):
+    """Return True if <password> matches the <stored> password, which may be
+    either a hash from hash_password() or a legacy plaintext password."""
+    if password is None or stored is None:
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode('utf-8'), str(stored).encode('utf-8'))
+    try:
+        scheme, iterations, salt, digest = stored.split('$')
+        salt = base64.b64decode(salt)
+        digest = base64.b64decode(digest)
+        iterations = int(iterations)
+    except ValueError:
+        return False
+    candidate = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return hmac.compare_digest(candidate, digest)
+
+def needs_upgrade(stored):
+    """Return True if <stored> should be re-hashed: it's a legacy plaintext
+    password, or was hashed with fewer iterations than we now use."""
+    if not is_hashed(stored):
+        return True
+    try:
+        return int(stored.split('$')[1]) < HASH_ITERATIONS
+    except (IndexError, ValueError):
+        return True
+
+
+class AuthService():
+    """Run password hashing and verification on a thread pool, so that a burst
+    of logins doesn't stall the heartbeat for every player in the game.
+
+    Results are delivered by calling <callback>(*args, result) back on the
+    game's event loop thread (via Game.catch_func_errs), so callbacks may
+    safely touch game objects."""
+    def __init__(self, game, max_workers=AUTH_WORKERS):
+        self.game = game
+        self.log = gametools.get_game_logger("_auth")
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='auth')
+
+    def _submit(self, func, func_args, callback, callback_args, failed_result):
+        future = self.executor.submit(func, *func_args)
+        def done(f):
+            try:
+                result = f.result()
+            except Exception:
+                self.log.exception("Error in %s running on the auth thread pool!" % func.__name__)
+                result = failed_result
+            self.game.events.call_soon_threadsafe(self.game.catch_func_errs, callback, *callback_args, result)
+        future.add_done_callback(done)
+        return future
+
+    def hash_async(self, password, callback, *args):
+        """Hash <password> in the background, then call <callback>(*args, hashed),
+        with hashed set to None if hashing failed."""
+        return self._submit(hash_password, (password,), callback, args, None)
+
+    def verify_async(self, password, stored, callback, *args):
+        """Check <password> against <stored> in the background, then call
+        <callback>(*args, verified), with verified True if it matches."""
+        return self._submit(verify_password, (password, stored), callback, args, False)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,50 @@
+import timeit
+import argparse
+
+import gametools
+
+from gameserver import Game
+from thing import Thing
+from container import Container
+from room import Room
+from creature import NPC
+
+#
+# OBJECT CONSTRUCTION BENCHMARK
+#   Measures how long it takes to create (and destroy) the common kinds of
+#   game object, as when a room is generated or many objects are spawned at
+#   once. Run from the game root:
+#       python benchmark.py [-n NUMBER] [-c MODULE_PATH ...]
+#   Times are per object, the best of several repeats.
+#
+DEFAULT_CLONE_PATHS = ['domains.school.scroll', 'domains.centrata.key_quest.axe']
+
+argparser = argparse.ArgumentParser(description="Time the construction of game objects")
+argparser.add_argument("-n", "--number", type=int, default=2000, help="Objects to create per repeat; defaults to 2000")
+argparser.add_argument("-r", "--repeat", type=int, default=5, help="Number of repeats; defaults to 5")
+argparser.add_argument("-c", "--clone", nargs="*", default=DEFAULT_CLONE_PATHS, help="Module paths to time gametools.clone() on")
+args = argparser.parse_args()
+
+def _create_and_destroy(factory):
+    def run():
+        factory().destroy()
+    return run
+
+def time_per_call(func):
+    """Return the best time (in microseconds) of one call to <func>."""
+    return min(timeit.repeat(func, number=args.number, repeat=args.repeat)) / args.number * 1e6
+
+game = Game('127.0.0.1', 'nocrypt', silent=True)
+cases = [
+    ("findGamePath (uncached)", lambda: gametools._findGamePath.__wrapped__(__file__)),
+    ("findGamePath", lambda: gametools.findGamePath(__file__)),
+    ("Thing", _create_and_destroy(lambda: Thing('rock', __file__))),
+    ("Container", _create_and_destroy(lambda: Container('box', __file__))),
+    ("Room", _create_and_destroy(lambda: Room('cave', 'benchmark.cave'))),
+    ("NPC", _create_and_destroy(lambda: NPC('goblin', __file__))),
+]
+for path in args.clone:
+    cases.append(("clone %s" % path, _create_and_destroy(lambda path=path: gametools.clone(path))))
+
+for name, func in cases:
+    print("%-45s %8.2f us" % (name, time_per_call(func)))
@@ -0,0 +1,109 @@
+import time
+import argparse
+
+import numpy as np
+
+import rng
+import terrain
+from domains.endless_terrain import endless_caverns
+
+#
+# CAVERN GENERATION BENCHMARK
+#   Times the generation of cavern corridors and tiles. The corridor
+#   generator is compared with the original one, which stored exits as lists
+#   of direction names in a dict keyed by 'x y z' strings; it is kept below
+#   for that purpose only, and the two are checked to carve identical
+#   corridors. Run from the game root:
+#       python benchmark_terrain.py [-b BLOCKS]
+#
+argparser = argparse.ArgumentParser(description="Time the generation of cavern corridors and tiles")
+argparser.add_argument("-b", "--blocks", type=int, default=50, help="Corridor blocks to generate; defaults to 50")
+args = argparser.parse_args()
+
+BLOCK = endless_caverns.COORIDOOR_BLOCK
+opposite_directions = endless_caverns.opposite_directions
+
+def legacy_cooridoor(bx, by, z, cooridoor_exits):
+    """The original corridor generator, filling in <cooridoor_exits>."""
+    rand = rng.stream('domains.endless_terrain.endless_caverns.cooridoor', bx, by, z)
+    current_x, current_y, base_z = bx * BLOCK, by * BLOCK, z
+    if '%s %s %s' % (current_x,current_y,base_z) not in cooridoor_exits:
+        cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)] = []
+    cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append('south')
+    cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append('west')
+    num_rooms_visited = 1
+    xy_decisions = {'north':(0,1), 'south':(0,-1), 'east':(1,0), 'west':(-1,0)}
+    orders = [(0.45, ['north', 'east', 'west', 'south']), (0.9, ['east', 'north', 'south', 'west']),
+              (0.95, ['south', 'north', 'east', 'west']), (1.0, ['west', 'north', 'east', 'south'])]
+    while num_rooms_visited < 100000:
+        dir_choices = []
+        if current_x % 100 > 0 and 'west' not in cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)]:
+            dir_choices.append('west')
+        if current_x % 100 < 99 and 'east' not in cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)]:
+            dir_choices.append('east')
+        if current_y % 100 > 0 and 'south' not in cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)]:
+            dir_choices.append('south')
+        if current_y % 100 < 99 and 'north' not in cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)]:
+            dir_choices.append('north')
+        if not dir_choices:
+            break
+        r = rand.random()
+        order = next(order for limit, order in orders if r < limit)
+        direction_of_travel = next((d for d in order[:-1] if d in dir_choices), order[-1])
+        if '%s %s %s' % (current_x,current_y,base_z) not in cooridoor_exits:
+            cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)] = []
+        cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append(direction_of_travel)
+        current_x += xy_decisions[direction_of_travel][0]
+        current_y += xy_decisions[direction_of_travel][1]
+        if '%s %s %s' % (current_x,current_y,base_z) not in cooridoor_exits:
+            cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)] = []
+        cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append(opposite_directions[direction_of_travel])
+        num_rooms_visited += 1
+        if current_x % 100 == 99 and current_y % 100 == 99:
+            break
+    cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append('east')
+    cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append('north')
+
+def legacy_masks(bx, by, z, cooridoor_exits):
+    """Convert the legacy exits of block (bx, by, z) to a mask array."""
+    exits = np.zeros((BLOCK, BLOCK), dtype=np.uint8)
+    for i in range(BLOCK):
+        for j in range(BLOCK):
+            for direction in cooridoor_exits.get('%s %s %s' % (bx * BLOCK + i, by * BLOCK + j, z), ()):
+                exits[i, j] |= terrain.MASKS[direction]
+    return exits
+
+def timed(func, blocks):
+    start = time.perf_counter()
+    for block in blocks:
+        func(*block)
+    return (time.perf_counter() - start) / len(blocks) * 1000
+
+blocks = [(bx, by, 0) for bx in range(-5, 5) for by in range(-(-args.blocks // 10))][:args.blocks]
+legacy_exits = {}
+legacy_time = timed(lambda bx, by, z: legacy_cooridoor(bx, by, z, legacy_exits), blocks)
+new_time = timed(endless_caverns.generate_cooridoor, blocks)
+for block in blocks:
+    assert np.array_equal(endless_caverns.generate_cooridoor(*block), legacy_masks(*block, legacy_exits)), block
+print("%-45s %8.3f ms" % ("corridor block (legacy)", legacy_time))
+print("%-45s %8.3f ms" % ("corridor block (generate_cooridoor)", new_time))
+print("%-45s %8d" % ("identical corridors", len(blocks)))
+
+lookups = [(bx * BLOCK + i, by * BLOCK + j, z) for bx, by, z in blocks[:5] for i in range(0, BLOCK, 3) for j in range(0, BLOCK, 3)]
+for block in blocks[:5]:
+    endless_caverns.ensure_cooridoor(block[0] * BLOCK, block[1] * BLOCK, block[2])
+start = time.perf_counter()
+for x, y, z in lookups:
+    mask = 0
+    for direction in legacy_exits.get('%s %s %s' % (x, y, z), ()):
+        mask |= terrain.MASKS[direction]
+legacy_lookup = (time.perf_counter() - start) / len(lookups) * 1e6
+start = time.perf_counter()
+for x, y, z in lookups:
+    endless_caverns.cooridoor_mask(x, y, z)
+new_lookup = (time.perf_counter() - start) / len(lookups) * 1e6
+print("%-45s %8.3f us" % ("corridor lookup (legacy)", legacy_lookup))
+print("%-45s %8.3f us" % ("corridor lookup (cooridoor_mask)", new_lookup))
+
+tiles = [(cx, cy, 0) for cx in range(-4, 4) for cy in range(4)]
+print("%-45s %8.3f ms" % ("cavern tile (generate_tile)", timed(endless_caverns.generate_tile, tiles)))
@@ -4,6 +4,8 @@ from thing import Thing
 from action import Action
 import json
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Book(Thing):
     #
     # SPECIAL METHODS (i.e __method__() format)
@@ -20,7 +22,7 @@ class Book(Thing):
         # books always open on cover the first time and toc or bookmark afterwards
         self.index = self.COVER_INDEX 
         self.bookmark = None
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
 
     #
     # INTERNAL USE METHODS (i.e. _method(), not imported)
@@ -2,6 +2,8 @@ from thing import Thing
 from container import Container
 import gametools
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Cauldron(Container):
     # Explanation: tuple of 2 items: set of ingredients and string name of potion file (spaces automatically replaced with underscores)
     recipes = [({'water', 'molasses', 'poppyseed'}, 'pink potion'),  
@@ -15,7 +17,7 @@ class Cauldron(Container):
     def __init__(self, default_name, path, pref_id=None):
         super().__init__(default_name, path, pref_id)
         self.liquid = True
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
 
     #
     # INTERNAL USE METHODS (i.e. _method(), not imported)
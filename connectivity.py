@@ -0,0 +1,142 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import terrain
+
+#
+# CONNECTIVITY OF PROCEDURAL MAPS
+#   Finds the connected regions of a block of exit masks (see terrain.py),
+#   e.g. to check that a generated area has no unreachable pockets, or that
+#   its corridor really runs from one end to the other. Two cells are
+#   connected only by a two-way passage: each must have an exit to the other.
+#
+#   label_components() labels a whole array at once, by union-find with
+#   NumPy: every round hooks the root of each passage's larger-numbered end
+#   onto the smaller, then compresses paths by pointer jumping, until no
+#   passage joins two different roots. It takes a second or so for a
+#   1000x1000 region, and no recursion. UnionFind does the same thing one
+#   passage at a time, for maps built up incrementally.
+#
+_PASSAGES = [(terrain.EAST, terrain.WEST, 0), (terrain.NORTH, terrain.SOUTH, 1), (terrain.UP, terrain.DOWN, 2)]
+
+class UnionFind():
+    """Disjoint sets of hashable items, e.g. (x, y, z) cells."""
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        """Return the representative of <item>'s set, adding <item> if new."""
+        parent = self.parent
+        if item not in parent:
+            parent[item] = item
+            self.size[item] = 1
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]  # path halving
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """Merge the sets holding <a> and <b>. Returns True if they were separate."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+        return True
+
+    def connected(self, a, b):
+        return self.find(a) == self.find(b)
+
+
+def _passages(masks):
+    """Return arrays (a, b) of the flat indices of cells joined by two-way passages."""
+    masks = masks.reshape(masks.shape + (1,) * (3 - masks.ndim))
+    index = np.arange(masks.size, dtype=np.int64).reshape(masks.shape)
+    a_list, b_list = [], []
+    for forward, backward, axis in _PASSAGES:
+        if masks.shape[axis] < 2:
+            continue
+        lo = [slice(None)] * 3
+        hi = [slice(None)] * 3
+        lo[axis] = slice(None, -1)
+        hi[axis] = slice(1, None)
+        lo, hi = tuple(lo), tuple(hi)
+        joined = (masks[lo] & forward).astype(bool) & (masks[hi] & backward).astype(bool)
+        a_list.append(index[lo][joined])
+        b_list.append(index[hi][joined])
+    if not a_list:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(a_list), np.concatenate(b_list)
+
+def label_components(masks):
+    """Return an int32 array shaped like <masks> (2 or 3 dimensions, indexed
+    [x, y] or [x, y, z]) giving each cell's component number, numbered from 0
+    in order of each component's first cell."""
+    if np is None:
+        raise ImportError("connectivity.label_components() requires numpy")
+    a, b = _passages(masks)
+    parent = np.arange(masks.size, dtype=np.int64)
+    while True:
+        ra, rb = parent[a], parent[b]
+        different = ra != rb
+        if not different.any():
+            break
+        ra, rb = ra[different], rb[different]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    roots, labels = np.unique(parent, return_inverse=True)
+    return labels.reshape(masks.shape).astype(np.int32)
+
+
+class ConnectivityReport():
+    """The connected components of the exit masks <masks>, whose lowest cell
+    is at <origin> in world coordinates."""
+    def __init__(self, masks, origin=(0, 0, 0)):
+        self.masks = masks
+        self.origin = tuple(origin[:masks.ndim])
+        self.labels = label_components(masks)
+        self.sizes = np.bincount(self.labels.ravel())
+
+    def _local(self, cell):
+        return tuple(c - o for c, o in zip(cell, self.origin))
+
+    def component_of(self, cell):
+        """Return the component number of the world coordinates <cell>."""
+        return int(self.labels[self._local(cell)])
+
+    def connected(self, a, b):
+        """Return True if cells <a> and <b> (world coordinates) are connected."""
+        return self.component_of(a) == self.component_of(b)
+
+    def largest(self):
+        """Return (component number, size) of the largest component."""
+        label = int(self.sizes.argmax())
+        return label, int(self.sizes[label])
+
+    def pockets(self, max_size=None):
+        """Return the component numbers of every component except the
+        largest, or (if <max_size> is given) of those no bigger than it.
+        Cells with no exits at all count as pockets of size 1."""
+        largest = self.largest()[0]
+        return [label for label, size in enumerate(self.sizes)
+                if label != largest and (max_size is None or size <= max_size)]
+
+    def summary(self, n=10):
+        """Return a printable summary: component counts and the <n> largest."""
+        order = np.argsort(-self.sizes)
+        isolated = int((self.masks == 0).sum())
+        lines = ["%d cells in %d components (%d cells have no exits)." % (self.labels.size, len(self.sizes), isolated),
+                 "Largest components:"]
+        for label in order[:n]:
+            lines.append("%10d cells  (component %d)" % (self.sizes[label], label))
+        return '\n'.join(lines)
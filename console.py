@@ -283,10 +283,11 @@ class Console:
                          'loadgame':self.game.load_game}
             if cmd in game_file_cmds:
                 if (len(self.words) == 2):
-                    filename = self.words[1]
-                    game_file_cmds[cmd](filename)
+                    self.write(game_file_cmds[cmd](self.words[1]))
+                elif len(self.words) == 1:
+                    self.write(game_file_cmds[cmd]())
                 else:
-                    self.write("Usage: %s [filename]" % cmd)
+                    self.write("Usage: %s [directory]" % cmd)
                 return True
             if cmd == 'save':
                 if (len(self.words) == 2):
@@ -344,6 +345,7 @@ class Console:
             f = open(gametools.realDir(self.uploading_filename, player=self.user.name()), 'wb')
             f.write(file)
             f.close()
+            gametools.module_index.refresh(gametools.findGamePath(os.path.dirname(gametools.realDir(self.uploading_filename, player=self.user.name()))))
             self.write('Sucessfully uploaded file.')
             self.file_input = bytes()
             self.filename_input = ""
@@ -422,12 +424,12 @@ class Console:
 
     def request_input(self, dest):
         self.input_redirect = dest
-        self.user.log.info("Input from console %s given to %s!" % (self, dest))
+        self.user.log.info("Input from console %s given to %s!", self, dest)
     
     def console_recv(self, command):
         """Temporarily recieve information as a two-part command, e.g. changing passwords."""
         if self.changing_passwords:
-            self.user.password = command
+            self.game.auth.hash_async(command, self._finish_password_change, self.user)
             self.changing_passwords = False
             self.input_redirect = None
         elif self.confirming_replace:
@@ -441,6 +443,14 @@ class Console:
                 self.confirming_replace = False
                 self.file_input = bytes()
 
+    def _finish_password_change(self, user, hashed):
+        """Called back by the auth service once the new password is hashed."""
+        if hashed is None:
+            self.write("Sorry, something went wrong changing your password. Please try again.")
+            return
+        user.password = hashed
+        self.write("Your password has been changed.")
+
     def take_input(self):
         if self.file_input:
             self.upload_file(self.file_input, self.upload_confirm)
@@ -4,7 +4,12 @@ from thing import Thing
 from action import Action
 import gametools
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Container(Thing):
+    __slots__ = ('see_inside', 'liquid', 'closable', 'closed', 'closed_err',
+                 'max_weight_carried', 'max_volume_carried', 'insert_prepositions')
+
     #
     # SPECIAL METHODS (i.e __method__() format)
     #
@@ -19,7 +24,7 @@ class Container(Thing):
         self.max_weight_carried = 1
         self.max_volume_carried = 1
         self.insert_prepositions = ["in", "into", "inside"]
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
 
     #
     # INTERNAL USE METHODS (i.e. _method(), not imported)
@@ -79,7 +84,7 @@ class Container(Thing):
             self.log.debug('Trying to insert into self - not allowed!')
             return True
         if obj == None:
-            self.log.debug('Trying to insert a null object into %s!' % self)
+            self.log.debug('Trying to insert a null object into %s!', self)
             return True
         if obj.id not in Thing.ID_dict and force_insert == False:
             self.log.debug("Now returns True when an object's id not in Thing.ID_dict")
@@ -89,9 +94,9 @@ class Container(Thing):
         for w in self.contents:
             contents_weight = contents_weight + w.get_weight()
             contents_volume = contents_volume + w.get_volume()
-        self.log.debug("insert(): %s currently carrying %d weight and %d volume" % (self.id, contents_weight, contents_volume))
+        self.log.debug("insert(): %s currently carrying %d weight and %d volume", self.id, contents_weight, contents_volume)
         if (force_insert == True) or (self.max_weight_carried >= contents_weight+obj.get_weight() and self.max_volume_carried >= contents_volume+obj.get_volume()):
-            self.log.debug("%s has room for %s's %d weight and %d volume" % (self.id, obj.id, obj.get_weight(), obj.get_volume()))
+            self.log.debug("%s has room for %s's %d weight and %d volume", self.id, obj.id, obj.get_weight(), obj.get_volume())
             # Success! The object fits in the container, add it.  
             self.contents.append(obj)
             obj.set_location(self)   # make this container the location of obj
@@ -102,12 +107,13 @@ class Container(Thing):
                         obj.plurality += w.plurality 
                         w.destroy()
                         break
+            self.changed()
             return False
         else:
             self.log.debug("The weight(%d) and volume(%d) of the %s can't be held by the %s, "
                   "which can only carry %d grams and %d liters (currently "
-                  "holding %d grams and %d liters)" 
-                  % (obj.get_weight(), obj.get_volume(), obj.id, self.id, self.max_weight_carried, self.max_volume_carried, contents_weight, contents_volume))
+                  "holding %d grams and %d liters)",
+                  obj.get_weight(), obj.get_volume(), obj.id, self.id, self.max_weight_carried, self.max_volume_carried, contents_weight, contents_volume)
             return True
 
     def extract(self, obj):
@@ -124,6 +130,7 @@ class Container(Thing):
         i = self.contents.index(obj)  # no need for try..except since we already know obj in list
         del self.contents[i]
         obj.location = None
+        self.changed()
         return obj
 
     def close(self):
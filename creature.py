@@ -7,7 +7,37 @@ from weapon import Weapon
 from armor import Armor
 from action import Action
 
+#
+# SHARED DEFAULT EQUIPMENT
+#   Default weapons and armor (bare hands, skin, a rat's sharp teeth...) are
+#   never carried, dropped or changed, so every creature using the same
+#   default shares a single object rather than cloning its own.
+#
+SHARED_DEFAULT_PATHS = ('default_weapon', 'default_armor')
+_shared_equipment = {}  # key -> Weapon or Armor shared by every creature using it
+
+def shared_equipment(key, factory):
+    """Return the shared equipment object for <key>, calling <factory>() to
+    create it the first time."""
+    obj = _shared_equipment.get(key)
+    if obj is None:
+        obj = _shared_equipment[key] = factory()
+    return obj
+
+def shared_default(path):
+    """Return the shared object cloned from 'default_weapon' or 'default_armor'."""
+    return shared_equipment(path, lambda: gametools.clone(path))
+
+def is_shared_equipment(obj):
+    return any(obj is e for e in _shared_equipment.values())
+
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Creature(Container):
+    __slots__ = ('hitpoints', 'health', 'enemies', 'armor_class', 'combat_skill', 'strength',
+                 'dexterity', 'default_weapon', 'default_armor', 'weapon_wielding', 'armor_worn',
+                 'invisible', 'introduced', 'proper_name', 'dead', 'wizardry_element', 'healing')
+
     def __init__(self, default_name, path, pref_id=None):
         Container.__init__(self, default_name, path, pref_id)
         self.closed = True
@@ -20,8 +50,8 @@ class Creature(Container):
         self.combat_skill = 0
         self.strength = 0
         self.dexterity = 1
-        self.default_weapon = gametools.clone("default_weapon")
-        self.default_armor = gametools.clone("default_armor")
+        self.default_weapon = shared_default("default_weapon")
+        self.default_armor = shared_default("default_armor")
         self.weapon_wielding = self.default_weapon
         self.armor_worn = self.default_armor
         self.closed_err = "You can't put things in creatures!"
@@ -31,7 +61,7 @@ class Creature(Container):
         self.dead = False
         self.wizardry_element = None
         self.healing = 0
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
 
     def get_saveable(self):
         saveable = super().get_saveable()
@@ -42,11 +72,13 @@ class Creature(Container):
         return saveable
 
     def set_default_weapon(self, name, damage, accuracy, unwieldiness, attack_verbs=["hit"]):
-        self.default_weapon = Weapon(name, None, damage, accuracy, unwieldiness, attack_verbs)
+        self.default_weapon = shared_equipment(('weapon', name, damage, accuracy, unwieldiness, tuple(attack_verbs)),
+                                               lambda: Weapon(name, None, damage, accuracy, unwieldiness, attack_verbs))
         self.weapon_wielding = self.default_weapon
 
     def set_default_armor(self, name, bonus, unwieldiness):
-        self.default_armor = Armor(name, None, bonus, unwieldiness)
+        self.default_armor = shared_equipment(('armor', name, bonus, unwieldiness),
+                                              lambda: Armor(name, None, bonus, unwieldiness))
         self.armor_worn = self.default_armor
 
     def set_combat_vars(self, armor_class, combat_skill, strength, dexterity):
@@ -75,13 +107,13 @@ class Creature(Container):
     
     def update_version(self):
         if hasattr(self, 'version_number'):
-            self.versions[gametools.findGamePath(__file__)] = 1
+            self.versions[_GAME_PATH] = 1
         
         super().update_version()
 
-        if self.versions[gametools.findGamePath(__file__)] == 1:
+        if self.versions[_GAME_PATH] == 1:
             self.introduced = set(self.introduced)
-            self.versions[gametools.findGamePath(__file__)] = 2
+            self.versions[_GAME_PATH] = 2
 
     def get_short_desc(self, perceiver=None, definite=False, indefinite=False):
         '''Overloads `Thing.get_short_desc()` to return short description of
@@ -112,7 +144,7 @@ class Creature(Container):
 
     def perceive(self, message):
         """Receive a message emitted by an object carried by or in vicinity of this creature."""
-        self.log.info("%s perceived a message %s in Creature.perceive()" % (self.id, message))
+        self.log.info("%s perceived a message %s in Creature.perceive()", self.id, message)
 
     def say(self, speech):
         """Emit a message to the room "The <creature> says: <speech>". """
@@ -138,14 +170,14 @@ class Creature(Container):
             for w in self.contents:
                 if isinstance(w, Weapon) and w.damage > self.default_weapon.damage:
                     self.weapon_wielding = w
-                    self.log.info("weapon chosen: %s" % self.weapon_wielding)
+                    self.log.info("weapon chosen: %s", self.weapon_wielding)
                     self.perceive('You wield the %s, rather than using your %s.' % (self.weapon_wielding._short_desc, self.default_weapon._short_desc))
                     break
         if not self.armor_worn or self.armor_worn == self.default_armor:
             for a in self.contents:
                 if isinstance(a, Armor) and a.bonus > self.default_armor.bonus:
                     self.armor_worn = a
-                    self.log.info("armor chosen: %s" % self.armor_worn)
+                    self.log.info("armor chosen: %s", self.armor_worn)
                     self.perceive('You wear the %s, rather than your %s.' % (self.armor_worn._short_desc, self.default_armor._short_desc))
                     break
     
@@ -202,7 +234,7 @@ class Creature(Container):
         self.emit("&nD%s dies!" % self.id, [self])
         corpse = gametools.clone('corpse', self)
         corpse.names += self.names
-        corpse.adjectives = set(list(corpse.adjectives) + list(self.adjectives) + self.names)
+        corpse.adjectives = corpse.adjectives | self.adjectives | set(self.names)
         self.location.insert(corpse)
         while self.contents:
             i = self.contents[0]
@@ -239,10 +271,10 @@ class Creature(Container):
             self.enemies.append(attacking)
         
         if attacking == None:
-            self.log.debug("%s didn't have anyone to attack!" % self.id)
+            self.log.debug("%s didn't have anyone to attack!", self.id)
             return
         
-        self.log.debug("%s: attacking %s" % (self.id, attacking))
+        self.log.debug("%s: attacking %s", self.id, attacking)
         self.attacking = attacking
         # Figured out who to attack, wield any weapons/armor
         self.weapon_and_armor_grab()
@@ -278,6 +310,8 @@ class NPC(Creature):
         self.attack_now = 0
         self.attacking = False
         self.forbidden_rooms = []
+        self.patrol_route = []  # room IDs to walk between in turn; see set_patrol_route()
+        self.patrol_index = 0
 
         Thing.game.register_heartbeat(self)
     
@@ -290,6 +324,12 @@ class NPC(Creature):
     def forbid_room(self, r):
         self.forbidden_rooms.append(r)
 
+    def set_patrol_route(self, *room_ids):
+        """Instead of wandering at random, walk between the rooms <room_ids>
+        in turn, by the shortest route known to the game's WorldGraph."""
+        self.patrol_route = list(room_ids)
+        self.patrol_index = 0
+
     def heartbeat(self):
         if self.dead:
             return
@@ -308,18 +348,18 @@ class NPC(Creature):
                         if self.aggressive:
                             self.attack_enemy(i)
                         else:  #can't attack (e.g. bluebird)? Run away.
-                            self.move_around()
+                            self.flee(i)
                         acting = True
             except AttributeError:
                 self.log.error('AttributeError, not in any room.')
                 return
             if self.attacking and (self.move_around in self.choices):
-                if (self.attacking not in self.location.contents):
-                    for l in self.location.exits:
-                        if gametools.load_room(self.location.exits[l]) == self.attacking.location:
-                            self.move_to(gametools.load_room(self.location.exits[l]))
-                            moved = True
-                            break
+                if (self.attacking not in self.location.contents) and self.attacking.location:
+                    exit = Thing.game.graph.next_hop(self.location, [self.attacking.location.id], self.forbidden_rooms)
+                    if exit:
+                        dest = self.location.exit_handle(exit).room()
+                        if dest:
+                            self.move_to(dest)
 
 #                if not moved:
 #                    self.attacking = None
@@ -333,33 +373,60 @@ class NPC(Creature):
                 except NameError:
                     self.log.warning("Object "+str(self.id)+" heartbeat tried to run non-existant action choice "+str(choice)+"!")
             
+    def flee(self, enemy):
+        """Leave by the exit leading furthest from <enemy>."""
+        exit = None
+        if enemy.location:
+            exit = Thing.game.graph.flee_exit(self.location, [enemy.location.id], self.forbidden_rooms)
+        self.move_around([exit] if exit else None)
+
+    def patrol_exits(self):
+        """Return a list holding the exit towards the next room of the patrol
+        route, or None if not patrolling or no route is known."""
+        if not self.patrol_route:
+            return None
+        if self.location.id == self.patrol_route[self.patrol_index % len(self.patrol_route)]:
+            self.patrol_index = (self.patrol_index + 1) % len(self.patrol_route)
+        goal = self.patrol_route[self.patrol_index % len(self.patrol_route)]
+        exit = Thing.game.graph.next_hop(self.location, [goal], self.forbidden_rooms)
+        return [exit] if exit else None
+
     def move_around(self, exit_list=None):
-        """The NPC leaves the room, taking a random exit"""
+        """The NPC leaves the room, taking a random exit (or the next exit of
+        its patrol route). Exits to rooms it may not enter are skipped
+        without building those rooms, if the WorldGraph knows them."""
         if not exit_list:
             try:
-                exit_list = list(self.location.exits)
-                exit = random.choice(exit_list)
-            except (AttributeError, IndexError):
-                self.log.debug('NPC %s sees no exits, returning from move_around()' % self.id)
+                exit_list = self.patrol_exits() or list(self.location.exits)
+            except AttributeError:
+                exit_list = None
+            if exit_list:
+                graph = Thing.game.graph
+                exit_list = [e for e in exit_list if graph.can_enter(self.location.exits[e], self.forbidden_rooms) is not False]
+            if not exit_list:
+                self.log.debug('NPC %s sees no exits, returning from move_around()', self.id)
                 return
-        else:
-            exit = random.choice(exit_list)
+        exit = random.choice(exit_list)
 
-        self.log.debug("Trying to move to the %s exit!" % (exit))
+        self.log.debug("Trying to move to the %s exit!", exit)
         current_room = self.location
         new_room_string = self.location.exits[exit]
-        new_room = gametools.load_room(new_room_string)
+        new_room = self.location.exit_handle(exit)
         if new_room.monster_safe:
-            self.log.debug('Can\'t go to %s; monster safe room!' % new_room_string)
+            self.log.debug('Can\'t go to %s; monster safe room!', new_room_string)
             return
 
         if new_room_string in self.forbidden_rooms:
-            self.log.debug('Can\'t go to %s: forbidden to %s!' % (new_room_string, self))
- 
+            self.log.debug('Can\'t go to %s: forbidden to %s!', new_room_string, self)
+            return
+
+        dest = new_room.room()
+        if dest is None:
+            return
         self.emit("&nD%s goes %s." % (self.id, exit))
-        self.move_to(new_room)
+        self.move_to(dest)
         self.emit("&nI%s arrives." % self.id)
-        self.log.info("Creature %s moved to new room %s" % (self.names[0], new_room_string))
+        self.log.info("Creature %s moved to new room %s", self.names[0], new_room_string)
         return
 
     def talk(self):
@@ -1,5 +1,7 @@
 import thing
 
+PROTOTYPE = True
+
 def clone():
     hay = thing.Thing("hay", __file__)
     hay.set_description("pice of hay", "This is a normal piece of hay.")
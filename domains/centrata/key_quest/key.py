@@ -1,5 +1,7 @@
 import thing
 
+PROTOTYPE = True
+
 def clone():
     key = thing.Thing('key', __file__)
     key.set_description('old brass key', 'This is an old key made of brass.')
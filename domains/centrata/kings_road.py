@@ -2,7 +2,7 @@
 import gametools
 import scenery
 import room
-import random
+import rng
 
 def load(param_list):
     path = param_list[0] # if paramaters are given, the first one is always the entire string, including parameters
@@ -16,7 +16,7 @@ def load(param_list):
 
     this_road = room.Room('road', path)
 
-    random.seed(road_section*road_length)
+    rand = rng.stream('domains.centrata.kings_road', road_section, road_length)
 
     description_map = {'mountains':['tall', 'steep', 'magnificent', 'large', 'distant'],
                        'forests':  ['pine','evergreen', 'thick', 'dense', 'sparse', 'dead'],
@@ -27,11 +27,11 @@ def load(param_list):
                        'swamps':   ['deep', 'wooden', 'wet', 'huge', 'small'],
                        'lakes':    ['deep', 'frozen', 'huge', 'small']}
 
-    noun1 = random.choice(list(description_map))
-    noun2 = random.choice(list(description_map))
+    noun1 = rand.choice(list(description_map))
+    noun2 = rand.choice(list(description_map))
 
-    west_side = 'some %s %s' % (random.choice(description_map[noun1]), noun1)
-    east_side = 'some %s %s' % (random.choice(description_map[noun2]), noun2)
+    west_side = 'some %s %s' % (rand.choice(description_map[noun1]), noun1)
+    east_side = 'some %s %s' % (rand.choice(description_map[noun2]), noun2)
 
     this_road.set_description('streach of road', 'This stretch of road (section %s) continues north and south. On the east side of the road, you see %s. On the west side of the road, you see %s.' % (road_section, west_side, east_side))
 
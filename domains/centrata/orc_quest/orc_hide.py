@@ -1,5 +1,7 @@
 import armor
 
+PROTOTYPE = True
+
 def clone():
     hide = armor.Armor('hide', __file__, 25, 2)
     hide.set_description('hide armor', 'A long tunic made of tough, crudely tanned hide from some large '
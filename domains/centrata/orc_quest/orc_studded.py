@@ -1,5 +1,7 @@
 import armor
 
+PROTOTYPE = True
+
 def clone():
     studded = armor.Armor('armor', __file__, 25, 2)
     studded.set_description('studded leather armor', 'A boiled leather tunic and leggings covered with metal '
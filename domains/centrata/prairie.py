@@ -2,7 +2,9 @@
 import gametools
 import scenery
 import room
-import random
+import rng
+import terrain
+import mapstore
 
 room_remaps = {'-1,-1':'domains.centrata.fields.road_three',
                '-1,0':'domains.centrata.fields.road_four',
@@ -18,6 +20,7 @@ MIN_X = -1 # dictated by coordinates in room_remaps
 MAX_X = 9
 MIN_Y = -3 # dictates by coordinates in room_remaps
 MAX_Y = 7
+EXIT_PROBABILITY = 0.91
 
 def connection_exists(x, y, delta_x, delta_y, threshold):
     """Return a true or false indicating whether a grid cell at 
@@ -26,8 +29,8 @@ def connection_exists(x, y, delta_x, delta_y, threshold):
     check for a connection FROM the room with the most negative index TO the
     room with most positive index.  E.g. to see if room (3, 4) has a 
     connection to the north, check (3,4,(0,1)). For a connection to the
-    south, check (3,3, (0,1)). Uses a random number seeded on combination 
-    of bits from the inputs and compares it to the provided threshold."""
+    south, check (3,3, (0,1)). The connection exists with probability
+    <threshold>, decided by a hash of the inputs (see terrain.py)."""
 
     if x < MIN_X:
         return False
@@ -37,14 +40,34 @@ def connection_exists(x, y, delta_x, delta_y, threshold):
         return False
     if y+1 > MAX_Y:
         return False
-    x_bits = (x & 0xff) << 10
-    y_bits = (y & 0xff) << 2
-    delta_x_bits = (delta_x & 0x01) << 1
-    delta_y_bits = (delta_y & 0x01)
-    all_bits = x_bits | y_bits | delta_x_bits | delta_y_bits
-    random.seed(all_bits)
-    num = random.random()
-    return num < threshold
+    axis = terrain.EAST_WEST if delta_x else terrain.NORTH_SOUTH
+    return terrain.edge_exists(x, y, 0, axis, threshold, seed=rng.domain_seed('domains.centrata.prairie'))
+
+MAP_DTYPE = [('exits', 'u1')]
+_DIRECTIONS = [('north', 0, 1), ('south', 0, -1), ('east', 1, 0), ('west', -1, 0)]
+
+def exit_mask(x, y):
+    """Return the exits of the prairie cell (x, y) as a terrain.NORTH etc. bitmask."""
+    cell = prairie_map.cell(x, y) if prairie_map else None
+    if cell is not None:
+        return int(cell['exits'])
+    return _generate_exit_mask(x, y)
+
+def _generate_exit_mask(x, y):
+    mask = 0
+    if connection_exists(x, y, 0, 1, EXIT_PROBABILITY): mask |= terrain.NORTH
+    if connection_exists(x, y-1, 0, 1, EXIT_PROBABILITY): mask |= terrain.SOUTH
+    if connection_exists(x, y, 1, 0, EXIT_PROBABILITY): mask |= terrain.EAST
+    if connection_exists(x-1, y, 1, 0, EXIT_PROBABILITY): mask |= terrain.WEST
+    return mask
+
+def write_region(cells, origin):
+    """Fill the array <cells> (of MAP_DTYPE, indexed [x, y, 0]) whose lowest
+    cell is <origin> (x, y, 0). Used by worldbuilder.py."""
+    x0, y0 = origin[:2]
+    for i in range(cells.shape[0]):
+        for j in range(cells.shape[1]):
+            cells[i, j, 0]['exits'] = _generate_exit_mask(x0 + i, y0 + j)
 
 def load(param_list):
     path = param_list[0] # if parameters are given, the first one is always the entire string, including parameters
@@ -54,7 +77,6 @@ def load(param_list):
     coords = (int(param_list[1]), int(param_list[2]))
     x = coords[0]
     y = coords[1]
-    exit_probability = 0.91
     
     if '%s,%s' % (x,y) in room_remaps:
         return gametools.load_room(room_remaps['%s,%s' % (x,y)])
@@ -62,43 +84,29 @@ def load(param_list):
     prairie = room.Room('prairie', path)
 
     no_exit_directions = []
+    exits = exit_mask(x, y)
+    for direction, dx, dy in _DIRECTIONS:
+        if exits & terrain.MASKS[direction]:
+            prairie.add_exit(direction, 'domains.centrata.prairie?%s&%s' % (x+dx, y+dy))
+        else:
+            no_exit_directions.append(direction)
     
-    if connection_exists(x, y, 0, 1, exit_probability):
-        prairie.add_exit('north', 'domains.centrata.prairie?%s&%s' % (coords[0], coords[1]+1))
-    else:
-        no_exit_directions.append('north')
-    
-    if connection_exists(x, y-1, 0, 1, exit_probability):
-        prairie.add_exit('south', 'domains.centrata.prairie?%s&%s' % (coords[0], coords[1]-1))
-    else:
-        no_exit_directions.append('south')
-    
-    if connection_exists(x, y, 1, 0, exit_probability):
-        prairie.add_exit('east', 'domains.centrata.prairie?%s&%s' % (coords[0]+1, coords[1]))
-    else:
-        no_exit_directions.append('east')
-    
-    if connection_exists(x-1, y, 1, 0, exit_probability):
-        prairie.add_exit('west', 'domains.centrata.prairie?%s&%s' % (coords[0]-1, coords[1]))
-    else:
-        no_exit_directions.append('west')
-    
-    random.seed(coords)
+    rand = rng.stream('domains.centrata.prairie', x, y)
 
     prairie_details = ['a flock of birds', 'a small tree', 'a field of bluets', 'a small pond', 'a big bush']
     blocking_details = ['a group of trees', 'a big herd of bison']
 
-    num_non_blocking_details = random.randint(0, 2)
+    num_non_blocking_details = rand.randint(0, 2)
     num_blocking_details = len(no_exit_directions)
     total_num_details = num_non_blocking_details + num_blocking_details
     notable_string = '%s, '*(total_num_details - 1) + 'and %s.'
 
     notable_items = []
     for i in range(0, num_blocking_details):
-        notable_items.append(random.choice(blocking_details) + ' to the ' + no_exit_directions[i])
+        notable_items.append(rand.choice(blocking_details) + ' to the ' + no_exit_directions[i])
     for i in range(0, num_non_blocking_details):
-        notable_items.append(random.choice(prairie_details))
-    random.shuffle(notable_items)
+        notable_items.append(rand.choice(prairie_details))
+    rand.shuffle(notable_items)
 
     if len(notable_items): # TODO: "Scenery" objects for notable_items
         notable_string = notable_string % tuple(notable_items)
@@ -106,3 +114,5 @@ def load(param_list):
     else:
         prairie.set_description('prairie', 'You find yourself in a tallgrass prairie that stetches on in all directions.')
     return prairie
+
+prairie_map = mapstore.open_store('domains.centrata.prairie', MAP_DTYPE)  # None if not pre-generated
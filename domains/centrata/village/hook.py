@@ -1,5 +1,7 @@
 import weapon
 
+PROTOTYPE = True
+
 def clone():
     hook = weapon.Weapon('hook', __file__, 3, 20, 4, attack_verbs=["swing","stab","thrust"])
     hook.set_description("farmer's thatching hook", "This heavy iron farm implement is used for "
@@ -1,222 +1,140 @@
 # Room Factory: This module will create multiple rooms, depending on what paramaters are called in the load function
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 import gametools
 import scenery
 import room
-import random
-
-cooridoor_exits = {}
-
-def connection_exists(x, y, z, delta_x, delta_y, delta_z, threshold, direction_string):
-    """Return a true or false indicating whether a grid cell at 
-    (x, y, z) has a connection in direction (delta_x, delta_y, delta_z), 
-    where delta_x, delta_y, and delta_z are 0 or 1. For consistency, always 
-    check for a connection FROM the room with the most negative index TO the
-    room with most positive index.  E.g. to see if room (3, 4,-2) has a 
-    connection to the north, check (3,4,-2,(0,1,0)). For a connection to the
-    south, check (3,3,-2, (0,1,0)). Uses a random number seeded on combination 
-    of bits from the inputs and compares it to the provided threshold."""
-
-    if direction_string in ['south','west','down']:
-        if ('%s %s %s' % (x+delta_x,y+delta_y,z) in cooridoor_exits) and (direction_string in cooridoor_exits['%s %s %s' % (x+delta_x,y+delta_y,z)]):
-            return True
-    else:
-        if ('%s %s %s' % (x,y,z) in cooridoor_exits) and (direction_string in cooridoor_exits['%s %s %s' % (x,y,z)]):
-            return True
-
-    x_bits = (x & 0xff) << 19
-    y_bits = (y & 0xff) << 11
-    z_bits = (z & 0xff) << 3
-    delta_x_bits = (delta_x & 0x01) << 2
-    delta_y_bits = (delta_y & 0x01) << 1
-    delta_z_bits = (delta_z & 0x01)
-    all_bits = x_bits | y_bits | z_bits | delta_x_bits | delta_y_bits | delta_z_bits
-    random.seed(all_bits)
-    num = random.random()
-    return num < threshold
-
-masks = {'north':0x01, 'south':0x02, 'east':0x04, 'west':0x08, 'up':0x10, 'down':0x20}
+import rng
+import terrain
+import connectivity
+import mapstore
+import weighted
+
+#
+# CORRIDORS
+#   Each COORIDOOR_BLOCK x COORIDOOR_BLOCK block of each level has one corridor
+#   winding through it from its southwest corner to its northeast corner, so
+#   the caverns can always be crossed. A block's corridor is a random walk,
+#   stored as a uint8 array of exit masks indexed [x, y] within the block.
+#   Blocks are generated in the background ahead of the players: whenever a
+#   cavern room is loaded, the corridors of its block and the 8 around it are
+#   queued on a worker thread, so they are normally ready before anyone
+#   reaches them.
+#
+log = gametools.get_game_logger("_endless_caverns")
+masks = terrain.MASKS
 opposite_directions = {'north':'south','south':'north','east':'west','west':'east','up':'down','down':'up'}
 
-def generate_random_cooridoor(x, y, z):
-    base_x = x // 100
-    base_y = y // 100
-    base_z = z
-
-    x_bits = (base_x & 0xff) << 16
-    y_bits = (base_y & 0xff) << 8
-    z_bits = (base_z & 0xff)
-    all_bits = x_bits | y_bits | z_bits
-
-    random.seed(all_bits)
-
-    current_x = base_x
-    current_y = base_y
-    current_z = base_z
-
-    if '%s %s %s' % (current_x,current_y,base_z) not in cooridoor_exits:
-        cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)] = []
-
-    cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append('south')
-    cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append('west')
-
-    num_rooms_visited = 1 # To make sure no infinite loops occur
-    xy_decisions = {
-        'north':(0,1),
-        'south':(0,-1),
-        'east':(1,0),
-        'west':(-1,0)
-    }
-
-    while num_rooms_visited < 100000:
-        dir_choices = []
-
-        if current_x % 100 > 0 and 'west' not in cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)]:
-            dir_choices.append('west')    
-        if current_x % 100 < 99 and 'east' not in cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)]:
-            dir_choices.append('east')
-        if current_y % 100 > 0 and 'south' not in cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)]:
-            dir_choices.append('south')
-        if current_y % 100 < 99 and 'north' not in cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)]:
-            dir_choices.append('north')
-        if not dir_choices:
+COORIDOOR_BLOCK = 100
+MAX_COORIDOOR_STEPS = 100000  # to make sure no infinite loops occur
+cooridoor_blocks = {}  # (block x, block y, z) -> array of corridor exits
+_pending_blocks = {}   # (block x, block y, z) -> Future of a prefetch
+_prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cooridoor')
+
+_STEPS = {terrain.NORTH: (0, 1), terrain.SOUTH: (0, -1), terrain.EAST: (1, 0), terrain.WEST: (-1, 0)}
+_OPPOSITE = {terrain.NORTH: terrain.SOUTH, terrain.SOUTH: terrain.NORTH, terrain.EAST: terrain.WEST, terrain.WEST: terrain.EAST}
+# (random number below, directions to try in order): mostly north and east
+_WALK_CHOICES = [(0.45, (terrain.NORTH, terrain.EAST, terrain.WEST, terrain.SOUTH)),
+                 (0.9, (terrain.EAST, terrain.NORTH, terrain.SOUTH, terrain.WEST)),
+                 (0.95, (terrain.SOUTH, terrain.NORTH, terrain.EAST, terrain.WEST)),
+                 (1.0, (terrain.WEST, terrain.NORTH, terrain.EAST, terrain.SOUTH))]
+
+def block_of(x, y, z):
+    """Return the (block x, block y, z) key of the corridor block holding (x, y, z)."""
+    return x // COORIDOOR_BLOCK, y // COORIDOOR_BLOCK, z
+
+def generate_cooridoor(bx, by, z):
+    """Carve the corridor of block (bx, by, z) and return its exits. The
+    result depends only on the block, so this is safe to call from any thread.
+    Call ensure_cooridoor() instead, which generates each block only once."""
+    n = COORIDOOR_BLOCK
+    rand = rng.stream('domains.endless_terrain.endless_caverns.cooridoor', bx, by, z)
+    cells = bytearray(n * n)  # exits of local cell (i, j) are at i * n + j
+    i = j = 0
+    cells[0] = terrain.SOUTH | terrain.WEST  # the corridor enters at the southwest corner
+    steps = 1
+    while steps < MAX_COORIDOOR_STEPS:
+        here = cells[i * n + j]
+        allowed = 0
+        if i > 0 and not here & terrain.WEST: allowed |= terrain.WEST
+        if i < n - 1 and not here & terrain.EAST: allowed |= terrain.EAST
+        if j > 0 and not here & terrain.SOUTH: allowed |= terrain.SOUTH
+        if j < n - 1 and not here & terrain.NORTH: allowed |= terrain.NORTH
+        if not allowed:
             break
-
-        r = random.random()
-        direction_of_travel = None
-        if r < 0.45:
-            if 'north' in dir_choices:
-                direction_of_travel = 'north'
-            elif 'east' in dir_choices:
-                direction_of_travel = 'east'
-            elif 'west' in dir_choices:
-                direction_of_travel = 'west'
-            else:
-                direction_of_travel = 'south'
-        elif r < 0.9:
-            if 'east' in dir_choices:
-                direction_of_travel = 'east'
-            elif 'north' in dir_choices:
-                direction_of_travel = 'north'
-            elif 'south' in dir_choices:
-                direction_of_travel = 'south'
-            else:
-                direction_of_travel = 'west'
-        elif r < 0.95:
-            if 'south' in dir_choices:
-                direction_of_travel = 'south'
-            elif 'north' in dir_choices:
-                direction_of_travel = 'north'
-            elif 'east' in dir_choices:
-                direction_of_travel = 'east'
-            else:
-                direction_of_travel = 'west'
-        else:
-            if 'west' in dir_choices:
-                direction_of_travel = 'west'
-            elif 'north' in dir_choices:
-                direction_of_travel = 'north'
-            elif 'east' in dir_choices:
-                direction_of_travel = 'east'
-            else:
-                direction_of_travel = 'south'
-        
-        if '%s %s %s' % (current_x,current_y,base_z) not in cooridoor_exits:
-            cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)] = []
-        
-        cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append(direction_of_travel)
-
-        current_x += xy_decisions[direction_of_travel][0]
-        current_y += xy_decisions[direction_of_travel][1]
-
-        if '%s %s %s' % (current_x,current_y,base_z) not in cooridoor_exits:
-            cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)] = []
-
-        cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append(opposite_directions[direction_of_travel])
-
-        num_rooms_visited += 1
-        if current_x % 100 == 99 and current_y % 100 == 99:
+        r = rand.random()
+        for limit, order in _WALK_CHOICES:
+            if r < limit:
+                break
+        for direction in order:
+            if allowed & direction:
+                break
+        cells[i * n + j] |= direction
+        di, dj = _STEPS[direction]
+        i += di
+        j += dj
+        cells[i * n + j] |= _OPPOSITE[direction]
+        steps += 1
+        if i == n - 1 and j == n - 1:
             break
-    
-    cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append('east')
-    cooridoor_exits['%s %s %s' % (current_x,current_y,base_z)].append('north')
-
-def visit_point(t, visited, num_of_exits, directions, x, y, z, start_x, start_y, start_z, end_x, end_y, end_z, label):  
-    """Recursively visit a point P=(x,y,z) and all connections of P.
-    Assign label to P if it has not already been labeled.
-    Return the number of points had their label changed"""
-    if not ((start_x < x < end_x) and (start_y < y < end_y) and (start_z < z < end_z)):
+    cells[i * n + j] |= terrain.EAST | terrain.NORTH  # and leaves where it stopped
+    return np.frombuffer(bytes(cells), dtype=np.uint8).reshape(n, n)
+
+def ensure_cooridoor(x, y, z):
+    """Return the corridor exits of the block containing (x, y, z),
+    generating them (or waiting for a prefetch) if necessary."""
+    block = block_of(x, y, z)
+    exits = cooridoor_blocks.get(block)
+    if exits is None:
+        future = _pending_blocks.get(block)
+        exits = future.result() if future else generate_cooridoor(*block)
+        cooridoor_blocks[block] = exits
+    return exits
+
+def _prefetched(block, future):
+    # runs on the worker thread; results are identical wherever they are
+    # generated, so it doesn't matter if ensure_cooridoor() got there first
+    if not future.cancelled() and future.exception() is None:
+        cooridoor_blocks.setdefault(block, future.result())
+    _pending_blocks.pop(block, None)
+
+def prefetch_cooridoors(x, y, z):
+    """Queue the corridors of the block containing (x, y, z) and of the 8
+    blocks around it on the worker thread, unless already generated."""
+    bx, by, z = block_of(x, y, z)
+    for dx in (0, -1, 1):
+        for dy in (0, -1, 1):
+            block = (bx + dx, by + dy, z)
+            if block in cooridoor_blocks or block in _pending_blocks:
+                continue
+            future = _pending_blocks[block] = _prefetcher.submit(generate_cooridoor, *block)
+            future.add_done_callback(lambda f, block=block: _prefetched(block, f))
+
+def cooridoor_mask(x, y, z):
+    """Return the exits that corridors give cell (x, y, z), as a bitmask;
+    0 if its block hasn't been generated."""
+    block = block_of(x, y, z)
+    exits = cooridoor_blocks.get(block)
+    if exits is None:
         return 0
-    if visited[x, y, z] != 0:
-        return 0
-    visited[x, y, z] = label
-    changed = 1
-    exits_accounted_for = 0
-    for e in masks:
-        if t[x, y, z] & masks[e]:
-            #print("Table value: ",t[x,y,z],"  Mask: ",masks[e])
-            exits_accounted_for += 1
-            changed += visit_point(t, visited, num_of_exits, directions, x+directions[e][0], y+directions[e][1], z+directions[e][2], start_x, start_y, start_z, end_x, end_y, end_z, label)
-    if exits_accounted_for != num_of_exits[x,y,z]:
-        print("Problem at point x=%s, y=%s, z=%s!" % (x,y,z))
-    return changed
-
-def depth_first_search(t, num_of_exits, start_x=-30,start_y=-30,start_z=-2,end_x=30,end_y=30,end_z=2,start_label=1):
-    directions = {'north': (0,  1,  0 ), 
-                  'south': (0, -1,  0 ),
-                  'east':  (1,  0,  0 ),
-                  'west':  (-1, 0,  0 ),
-                  'up':    (0,  0,  1 ), 
-                  'down':  (0,  0, -1 )}
-    visited = np.zeros(t.shape, dtype=np.int32)
-    
-    
-    for a in range(start_x, end_x):
-        for b in range(start_y, end_y):
-            for c in range(start_z, end_z):
-                if visit_point(t, visited, num_of_exits, directions, a, b, c, start_x, start_y, start_z, end_x, end_y, end_z, start_label): 
-                    start_label += 1  # increment the label if we labeled one or more points
-    
-    return visited
+    return int(exits[x - block[0] * COORIDOOR_BLOCK, y - block[1] * COORIDOOR_BLOCK])
+
+def label_regions(t, num_of_exits, start_label=1):
+    """Label the connected regions of the exit mask table <t>, numbering them
+    from <start_label> (see connectivity.py), and report any cell whose
+    exits don't match <num_of_exits>."""
+    for x, y, z in zip(*np.nonzero(terrain.exit_counts(t.astype(np.uint8)) != num_of_exits)):
+        log.warning("Problem at point x=%s, y=%s, z=%s!" % (x,y,z))
+    return connectivity.label_components(t.astype(np.uint8)) + start_label
 
 def test_grid(cons=None, exit_probability = 0.25):
-    table = np.zeros((100,100,4), dtype=np.int32)
-    num_of_exits = np.zeros((100,100,4), dtype=np.int32)
-    for i in range(0, 100):
-        for j in range(0, 100):
-            for k in range(-2, 2):
-                possible_directions = []
-                directions_mask = 0x00
-
-                x = j
-                y = i
-                z = k+2
-
-                for direction, d_xyz in [ ('north', (0,  1,  0 )), 
-                                        ('south', (0, -1,  0 )), 
-                                        ('east',  (1,  0,  0 )),
-                                        ('west',  (-1, 0,  0 )),
-                                        ('up',    (0,  0,  1 )), 
-                                        ('down',  (0,  0, -1 )) ]:
-                    # see if a connection exists between this room and the room to the east (x+1), 
-                    # west (x-1), north (y+1), etc.  
-                    check_x = x if d_xyz[0] >= 0 else x-1
-                    check_y = y if d_xyz[1] >= 0 else y-1
-                    check_z = z if d_xyz[2] >= 0 else z-1
-
-                    check_dx = 1 if d_xyz[0] != 0 else 0
-                    check_dy = 1 if d_xyz[1] != 0 else 0
-                    check_dz = 1 if d_xyz[2] != 0 else 0
-
-                    if connection_exists(check_x, check_y, check_z, check_dx, check_dy, check_dz, exit_probability, direction):
-                        possible_directions.append(direction)
-                        directions_mask |= masks[direction]
-            
-                table[x,y,z] = directions_mask
-                num_of_exits[x,y,z] = len(possible_directions)
+    table = terrain.exit_masks((0, 0, 0), (100, 100, 4), exit_probability).astype(np.int32)
+    for z in range(4):
+        table[:, :, z] |= ensure_cooridoor(0, 0, z)
+    num_of_exits = terrain.exit_counts(table.astype(np.uint8))
     
-    centers = depth_first_search(table, num_of_exits, 0, 0, -2, 100, 100, 2, 1)
+    centers = label_regions(table, num_of_exits)
     
     # create an ascii art depiction of the cavern map, with each room represented by a 3x3 grid of characters
     # note north is direction of increasing y, i.e. first row in table is the southmost row on map. 
@@ -241,7 +159,7 @@ def test_grid(cons=None, exit_probability = 0.25):
         # i=0 is the bottom (southmost) row of map, so build map from bottom up
         # therefore these three lines go on top of the map so far (i.e. before the current map string)
         map_str = line1 + "\n" + line2 + '\n' + line3 + '\n' + map_str
-    print(map_str)
+    log.info("Cavern map:\n%s" % map_str)
     if cons:
         cons.write(map_str.replace(' ','&nbsp'))
 
@@ -262,105 +180,153 @@ def load(param_list):
     if specially_defined_room:
         return specially_defined_room
 
+    prefetch_cooridoors(x, y, z)
     this_room = room.Room('cave', path)
+    cell = cavern_map.cell(x, y, z) if cavern_map else None
+    if cell is None:
+        cell = tiles.cell(x, y, z)
 
-    exit_probability = 0.25
-
-
-    if '%s %s %s' % (x % 100, y % 100, z % 100) not in cooridoor_exits:
-        generate_random_cooridoor(x,y,z)
-
-    for direction, d_xyz in [('north', (0,  1,  0 )), 
-                             ('south', (0, -1,  0 )), 
-                             ('east',  (1,  0,  0 )),
-                             ('west',  (-1, 0,  0 )), 
-                             ('up',    (0,  0,  1 )), 
-                             ('down',  (0,  0, -1 ))]:
-        # see if a connection exists between this room and the room to the east (x+1), 
-        # west (x-1), north (y+1), etc.  
-        check_x = x if d_xyz[0] >= 0 else x-1
-        check_y = y if d_xyz[1] >= 0 else y-1
-        check_z = z if d_xyz[2] >= 0 else z-1
-
-        check_dx = 1 if d_xyz[0] != 0 else 0
-        check_dy = 1 if d_xyz[1] != 0 else 0
-        check_dz = 1 if d_xyz[2] != 0 else 0
-
-        if connection_exists(check_x, check_y, check_z, check_dx, check_dy, check_dz, exit_probability, direction):
+    for direction, d_xyz in terrain.OFFSETS.items():
+        if cell['exits'] & masks[direction]:
             this_room.add_exit(direction, 'domains.endless_terrain.endless_caverns?%s&%s&%s' % (x+d_xyz[0], y+d_xyz[1], z+d_xyz[2]))
-    
-    # Format: characteristic: % 
-    light_levels = {'light': 62, 'dark': 38}
-    temperature_levels = {'cool': 32, 'warm': 28, 'neutral': 40}
-    water_levels = {'damp': 25, 'dry': 50, 'running': 15, 'lake': 10}
-
-    hostility_levels = {'hostile':15, 'empty': 70, 'batty': 15}
-
-    second_level_attrs = {'light': {'small opening': 10, 'smooth walls': 80, 'rough walls': 10}, 
-                          'dark': {'smooth walls': 50, 'rough walls': 50}, 
-                          'cool': {'breeze': 50, 'NA': 50}, 
-                          'warm': {'warmth': 70, 'scalding floor': 29, 'pool of lava': 1}, 
-                          'neutral': {'NA': 100}, 
-                          'neutral':{'NA':100}, 
-                          'damp': {'trickle of water': 10, 'mossy': 40, 'damp air': 50}, 
-                          'dry': {'NA': 90, 'extremely dry': 10}, 
-                          'running': {'waterfall': 30, 'underground stream': 70},
-                          'lake': {'small underground lake': 50, 'large underground lake': 30, 'small underground lake with waterfall': 5, 'large underground lake with waterfall': 15}}
-
-    light_range_values = []
-    for j in list(light_levels):
-        for k in range(0, light_levels[j]):
-            light_range_values.append(j)
-    
-    light_level = light_range_values[random.randint(0, 99)]
-    
-    temperature_range_values = []
-    for l in list(temperature_levels):
-        for m in range(0, temperature_levels[l]):
-            temperature_range_values.append(l)
-    
-    temperature_level = temperature_range_values[random.randint(0, 99)]
-
-    water_range_values = []
-    for n in list(water_levels):
-        for o in range(0, water_levels[n]):
-            water_range_values.append(n)
-    
-    water_level = water_range_values[random.randint(0, 99)]
-
-    hostility_range_values = []
-    for p in list(hostility_levels):
-        for q in range(0, hostility_levels[p]):
-            hostility_range_values.append(p)
-    
-    hostility_level = hostility_range_values[random.randint(0, 99)]
 
-    if hostility_level == 'hostile':
+    hostility = HOSTILITY.names[cell['hostility']]
+    if hostility == 'hostile':
         monster = gametools.clone('domains.endless_terrain.random_monster', params=(x,y,z))
         monster.move_to(this_room)
-    elif hostility_level == 'batty':
+    elif hostility == 'batty':
         pass # TODO: Add bats to game
 
     room_features = []
-    for r in [light_level, temperature_level, water_level]:
-        r_range_values = []
-        for s in list(second_level_attrs[r]):
-            for t in range(0, second_level_attrs[r][s]):
-                r_range_values.append(s)
-        feature = r_range_values[random.randint(0, 99)]
+    for category, levels, features in FEATURE_CATEGORIES:
+        level = levels.names[cell[category]]
+        feature = SECOND_LEVEL[level].names[cell[category + '_feature']]
         room_features.append(feature)
     
     room_features = [x for x in room_features if x != 'NA']
     if len(room_features) == 3:
         three_part_long_descs = ['You enter a cavern with %s and %s. You also notice a %s' % (room_features[0], room_features[1], room_features[2]), 
             'You find yourself in a cavern with a %s, %s, and %s.' % (room_features[2], room_features[1], room_features[0])]
-        this_room.set_description('cavern',random.choice(three_part_long_descs))
+        this_room.set_description('cavern', three_part_long_descs[cell['description']])
     
     if len(room_features) == 2:
         two_part_long_descs = ['You enter a cavern with %s. You also notice a %s.' % (room_features[0], room_features[1]),'This cavern contains both %s and %s.' % (room_features[0], room_features[1])]
-        this_room.set_description('cavern', random.choice(two_part_long_descs))
+        this_room.set_description('cavern', two_part_long_descs[cell['description']])
     
     if len(room_features) == 1:
         this_room.set_description('cavern', 'You enter a cavern with %s' % room_features[0])
 
     return this_room
+
+#
+# CAVERN TILES
+#   Everything about a cavern room except its name is generated a tile of
+#   cells at a time (see terrain.TerrainChunkCache) and cached, so load() only
+#   reads one record. Each feature is stored as a code: an index into the
+#   lists below.
+#
+EXIT_PROBABILITY = 0.25
+
+# Format: characteristic: % 
+light_levels = {'light': 62, 'dark': 38}
+temperature_levels = {'cool': 32, 'warm': 28, 'neutral': 40}
+water_levels = {'damp': 25, 'dry': 50, 'running': 15, 'lake': 10}
+
+hostility_levels = {'hostile':15, 'empty': 70, 'batty': 15}
+
+second_level_attrs = {'light': {'small opening': 10, 'smooth walls': 80, 'rough walls': 10}, 
+                      'dark': {'smooth walls': 50, 'rough walls': 50}, 
+                      'cool': {'breeze': 50, 'NA': 50}, 
+                      'warm': {'warmth': 70, 'scalding floor': 29, 'pool of lava': 1}, 
+                      'neutral': {'NA': 100}, 
+                      'damp': {'trickle of water': 10, 'mossy': 40, 'damp air': 50}, 
+                      'dry': {'NA': 90, 'extremely dry': 10}, 
+                      'running': {'waterfall': 30, 'underground stream': 70},
+                      'lake': {'small underground lake': 50, 'large underground lake': 30, 'small underground lake with waterfall': 5, 'large underground lake with waterfall': 15}}
+
+HOSTILITY = weighted.WeightedTable.from_percentages(hostility_levels)
+SECOND_LEVEL = {level: weighted.WeightedTable.from_percentages(features) for level, features in second_level_attrs.items()}
+def _feature_category(category, percentages):
+    """Return (tile field, table of first-level names, their tables of features)."""
+    levels = weighted.WeightedTable.from_percentages(percentages)
+    return category, levels, weighted.WeightedTableSet(SECOND_LEVEL[level] for level in levels.names)
+
+FEATURE_CATEGORIES = [_feature_category('light', light_levels),
+                      _feature_category('temperature', temperature_levels),
+                      _feature_category('water', water_levels)]
+
+TILE_DTYPE = [('exits', np.uint8), ('hostility', np.uint8), ('description', np.uint8),
+              ('light', np.uint8), ('light_feature', np.uint8),
+              ('temperature', np.uint8), ('temperature_feature', np.uint8),
+              ('water', np.uint8), ('water_feature', np.uint8)]
+
+def generate_tile(cx, cy, z):
+    """Generate the cavern tile (cx, cy, z); see terrain.TerrainChunkCache."""
+    size = terrain.CHUNK_SIZE
+    x0, y0 = cx * size, cy * size
+    tile = np.zeros((size, size), dtype=TILE_DTYPE)
+    tile['exits'] = terrain.exit_masks((x0, y0, z), (size, size, 1), EXIT_PROBABILITY)[:, :, 0]
+    for bx in range(x0 // COORIDOOR_BLOCK, (x0 + size - 1) // COORIDOOR_BLOCK + 1):
+        for by in range(y0 // COORIDOOR_BLOCK, (y0 + size - 1) // COORIDOOR_BLOCK + 1):
+            corridor = ensure_cooridoor(bx * COORIDOOR_BLOCK, by * COORIDOOR_BLOCK, z)
+            bx0, by0 = bx * COORIDOOR_BLOCK, by * COORIDOOR_BLOCK
+            left, right = max(x0, bx0), min(x0 + size, bx0 + COORIDOOR_BLOCK)
+            bottom, top = max(y0, by0), min(y0 + size, by0 + COORIDOOR_BLOCK)
+            tile['exits'][left - x0:right - x0, bottom - y0:top - y0] |= \
+                corridor[left - bx0:right - bx0, bottom - by0:top - by0]
+
+    rand = rng.np_stream('domains.endless_terrain.endless_caverns.tile', cx, cy, z)
+    tile['hostility'] = HOSTILITY.sample(rand, (size, size))
+    tile['description'] = rand.integers(0, 2, size=(size, size))
+    for category, levels, features in FEATURE_CATEGORIES:
+        codes = levels.sample(rand, (size, size))
+        tile[category] = codes
+        tile[category + '_feature'] = features.sample(rand, codes)
+    return tile
+
+tiles = terrain.TerrainChunkCache(generate_tile, TILE_DTYPE)
+
+def _copy_tiles(out, origin, z, get_tile):
+    """Copy the cells of level <z> from the tiles returned by get_tile(cx, cy, z)
+    into the 2-dimensional array <out>, whose lowest cell is <origin> (x, y)."""
+    size = terrain.CHUNK_SIZE
+    x0, y0 = origin
+    nx, ny = out.shape
+    for cx in range(x0 // size, (x0 + nx - 1) // size + 1):
+        for cy in range(y0 // size, (y0 + ny - 1) // size + 1):
+            tile = get_tile(cx, cy, z)
+            left, right = max(x0, cx * size), min(x0 + nx, (cx + 1) * size)
+            bottom, top = max(y0, cy * size), min(y0 + ny, (cy + 1) * size)
+            out[left - x0:right - x0, bottom - y0:top - y0] = \
+                tile[left - cx * size:right - cx * size, bottom - cy * size:top - cy * size]
+
+def region_masks(origin, shape, z):
+    """Return a uint8 array of shape <shape> (nx, ny) holding the exit masks
+    of the cavern rooms on level <z> whose lowest cell is <origin> (x, y)."""
+    region = np.zeros(shape, dtype=np.uint8)
+    _copy_tiles(region, origin, z, lambda cx, cy, z: tiles.tile(cx, cy, z)['exits'])
+    return region
+
+def write_region(cells, origin):
+    """Generate every cell of the structured array <cells> (of TILE_DTYPE,
+    indexed [x, y, z]), whose lowest cell is <origin> (x, y, z). Used by
+    worldbuilder.py; bypasses the tile cache."""
+    for k in range(cells.shape[2]):
+        _copy_tiles(cells[:, :, k], origin[:2], origin[2] + k, generate_tile)
+
+def check_cooridoor(x, y, z, exits=None, exits_origin=None):
+    """Return True if the corridor block containing (x, y, z) can be crossed
+    from its southwest corner to its northeast corner without leaving it.
+    <exits>, if given, holds the exit masks of level <z> covering the whole
+    block, with its lowest cell at <exits_origin> (x, y), as worldbuilder.py
+    has; otherwise they are generated."""
+    origin = (x // COORIDOOR_BLOCK * COORIDOOR_BLOCK, y // COORIDOOR_BLOCK * COORIDOOR_BLOCK)
+    if exits is None:
+        block = region_masks(origin, (COORIDOOR_BLOCK, COORIDOOR_BLOCK), z)
+    else:
+        i, j = origin[0] - exits_origin[0], origin[1] - exits_origin[1]
+        block = exits[i:i + COORIDOOR_BLOCK, j:j + COORIDOOR_BLOCK]
+    report = connectivity.ConnectivityReport(block, origin)
+    return report.connected(origin, (origin[0] + COORIDOOR_BLOCK - 1, origin[1] + COORIDOOR_BLOCK - 1))
+
+cavern_map = mapstore.open_store('domains.endless_terrain.endless_caverns', TILE_DTYPE)  # None if not pre-generated
@@ -1,5 +1,7 @@
 import liquid
 
+PROTOTYPE = True
+
 def clone():
     sanatizer = liquid.Liquid('sanatizer', __file__)
     sanatizer.set_description('hand sanatizer', 'This alcohol-based hand sanitizer can be used to clean your hands.')
@@ -1,6 +1,8 @@
 import container
 import gametools
 
+PROTOTYPE = True
+
 def clone():
     bookcase = container.Container("bookcase", __file__)
     bookcase.set_description("bookcase", "This bookcase is made of lighly stained wood. It is partially blocking the door.", unlisted=True)
@@ -1,6 +1,8 @@
 import container
 import gametools
 
+PROTOTYPE = True
+
 def clone():
     desk = container.Container("desk", __file__)
     desk.set_description("large black desk", "This large desk appears to be made from a black plastic. It has several sections, "
@@ -1,5 +1,7 @@
 import thing
 
+PROTOTYPE = True
+
 def clone():
     tissue = thing.Thing('kleenex', __file__)
     tissue.set_description('thin kleenex', 'This is a very thin kleenex.')
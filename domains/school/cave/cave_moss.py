@@ -1,5 +1,7 @@
 import thing
 
+PROTOTYPE = True
+
 def clone():
     cave_moss = thing.Thing('cave moss', __file__)
     cave_moss.set_description('cave moss', 'This is some strange moss growing in the cave.')
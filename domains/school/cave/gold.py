@@ -1,5 +1,7 @@
 import money
 
+PROTOTYPE = True
+
 def clone():
     gold = money.Money('gold', __file__, value=400)
     gold.set_description('gold coin', 'This is a shiny gold coin.')
@@ -1,6 +1,9 @@
 import cauldron
 import gametools 
         
+
+PROTOTYPE = True
+
 def clone():
     c = cauldron.Cauldron('cauldron', __file__)
     c.set_description('enormous iron cauldron', 'This is an enormous iron cauldron filled to the brim with a luminous red potion.', unlisted=True)
@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():
     flask = container.Container('flask', __file__)
     flask.set_description('clear flask', 'This is a clear glass flask. It is slightly warm to the touch.')
@@ -33,6 +33,8 @@ class Match(thing.Thing):
     actions['burn'] = action.Action(light_on_fire, True, False)
     actions['ignite'] = action.Action(light_on_fire, True, False)
 
+PROTOTYPE = True
+
 def clone():
     m = Match('match', __file__)
     m.set_description('ordinary match', 'This is an ordinary match.')
@@ -1,5 +1,7 @@
 import domains.wizardry.gems as gems
 
+PROTOTYPE = True
+
 def clone():
     pearl = gems.Pearl(__file__, 'pearl', 'round pearl', 'This pearl is almost perfectly round.')
     return pearl
@@ -40,5 +40,8 @@ class Portal(thing.Thing):
 #
 # MODULE-LEVEL FUNCTIONS (e.g., clone() or load())
 #
+
+PROTOTYPE = True
+
 def clone():
     return Portal()
\ No newline at end of file
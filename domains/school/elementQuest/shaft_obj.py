@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():
     s = container.Container('shaft', __file__)
     s.set_description('shaft of sunlight', 'This is a shaft of warm sunlight coming into the room.', unlisted=True)
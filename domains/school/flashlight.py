@@ -93,6 +93,8 @@ class Flashlight(Thing):
 # MODULE-LEVEL FUNCTIONS (e.g., clone() or load())
 #
 
+PROTOTYPE = True
+
 def clone():
     flashlight = Flashlight('flashlight', __file__)
     flashlight.set_description('old flashlight', 'An old metal flashlight.')
@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():
     bag = container.Container('bag', __file__)
     bag.set_description('normal bag', 'A normal-looking brown bag.')
@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():
         
     bottle = container.Container('bottle', __file__)
@@ -1,5 +1,7 @@
 import armor
 
+PROTOTYPE = True
+
 def clone():
     leather_suit = armor.Armor('leather_suit', __file__, 25, 2)
     leather_suit.set_description('leather suit', 'A crude tunic made of sturdy leather hide. Wearing it should provide some protection in a fight.')
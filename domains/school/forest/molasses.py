@@ -1,5 +1,7 @@
 import liquid
 
+PROTOTYPE = True
+
 def clone():
     molasses = liquid.Liquid('molasses', __file__)
     molasses.set_description('thick brown molasses', 'This brownish liquid is sweet and thick. Not surprisingly, it is used in recipes as a sweetener and a thickener.')
@@ -1,5 +1,7 @@
 import thing
 
+PROTOTYPE = True
+
 def clone(): 
     plate = thing.Thing('plate', __file__)
     plate.set_description('dinner plate', 'This is a normal-looking white dinner plate.')
@@ -1,6 +1,8 @@
 import domains.school.flower as flowerMod
 import action
 
+PROTOTYPE = True
+
 def clone():
     poppy = flowerMod.Flower("poppy", __file__, 'poppy')
     poppy.set_description("red poppy","This poppy is very pretty! You really want to pick it!")
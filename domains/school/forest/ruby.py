@@ -1,5 +1,7 @@
 import domains.wizardry.gems as gems
 
+PROTOTYPE = True
+
 def clone():
     ruby = gems.Ruby(__file__, 'ruby', 'large red ruby', 'This large red ruby feels like it carries a sense.')
     return ruby
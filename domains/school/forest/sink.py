@@ -1,5 +1,7 @@
 import domains.school.sink as sinkMod
 
+PROTOTYPE = True
+
 def clone():
         
     sink = sinkMod.Sink('sink', __file__)
@@ -1,6 +1,8 @@
 import domains.school.flower as flowerMod
 import action
 
+PROTOTYPE = True
+
 def clone():
     sunflower = flowerMod.Flower("sunflower", __file__, 'sunflower')
     sunflower.set_description("giant sunflower" , "By looking at this giant sunflower you start feeling more happy.")
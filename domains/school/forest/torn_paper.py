@@ -14,6 +14,9 @@ def read(obj, p, cons, oDO, oIDO):
 #
 # MODULE-LEVEL FUNCTIONS (e.g., clone() or load())
 #
+
+PROTOTYPE = True
+
 def clone():
     paper = thing.Thing('paper', __file__)
     paper.set_description('torn paper', 'This paper appears to be torn from a book.')
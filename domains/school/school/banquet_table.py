@@ -1,6 +1,8 @@
 import gametools
 import container 
 
+PROTOTYPE = True
+
 def clone():
     b_table = container.Container('table', __file__)
     b_table.set_description('banquet-size table', 'This is an extremely long banquet table, '
@@ -1,5 +1,7 @@
 from domains.school.school.library_book import LibraryBook
 
+PROTOTYPE = True
+
 def clone():
     blue_book = LibraryBook("blue book", None, "newer light blue book", "This book is newer, sky blue, and says \"Dragonsky\" on the cover.", pref_id="blue_book")
     blue_book.add_names("book", "Dragonsky")
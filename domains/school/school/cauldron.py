@@ -1,6 +1,8 @@
 import gametools
 import cauldron
 
+PROTOTYPE = True
+
 def clone():
     n_cauldron = cauldron.Cauldron('cauldron', __file__)
     n_cauldron.set_description('iron cauldron', 'This is an iron cauldron.')
@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():
     pot = container.Container('pot', __file__)
     pot.set_description('central pot', 'This pot stands in the centre of the room, over a hot fire.', unlisted=True)
@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():
     pot = container.Container('oven', __file__)
     pot.set_description('clay oven', 'This clay oven is set into the wall, and is very hot.', unlisted=True)
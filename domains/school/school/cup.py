@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():    
     cup = container.Container('cup', __file__)
     cup.set_description('ceramic cup', 'This is an ordinary ceramic cup. It has no decorations.')
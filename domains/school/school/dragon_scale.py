@@ -1,5 +1,7 @@
 import thing
 
+PROTOTYPE = True
+
 def clone():
     scale = thing.Thing('dragon scale', __file__)
     scale.set_description('golden dragon scale', 'This is a golden dragon scale. It is used in many very strong potions.')
@@ -1,5 +1,7 @@
 import domains.wizardry.gems as mod
 
+PROTOTYPE = True
+
 def clone():
     emerald = mod.Emerald(__file__, 'emerald', "finely cut emerald", 'This is a finely cut, exuberent green emerald.')
     return emerald
@@ -42,5 +42,8 @@ class Fireplace(thing.Thing):
 #
 # MODULE-LEVEL FUNCTIONS (e.g., clone() or load())
 #
+
+PROTOTYPE = True
+
 def clone():
     return Fireplace()
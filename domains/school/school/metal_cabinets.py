@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():
     cabinets = container.Container('cabinet', __file__)
     cabinets.set_description('titanium cabinet', 'This cabinet is made of solid titanium.')
@@ -11,6 +11,9 @@ def read(obj, p, cons, oDO, oIDO):
 #
 # MODULE-LEVEL FUNCTIONS (e.g., clone() or load())
 #
+
+PROTOTYPE = True
+
 def clone():
     paper = thing.Thing('paper', __file__)
     paper.set_description('paper', 'This paper appears to be a note of some sort.')
@@ -1,6 +1,8 @@
 import domains.school.school.library_book as library_book
 import gametools
 
+PROTOTYPE = True
+
 def clone():
     potion_book = library_book.LibraryBook("leather book", __file__, "leather-bound tome", "This is an old leather-bound book titled \"Potion Recipes for the Beginning and Intermediate Wizard (Third Edition).\"", pref_id="potion_book")
     potion_book.add_names("tome", "book")
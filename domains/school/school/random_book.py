@@ -1,4 +1,5 @@
 import random
+import weighted
 import domains.school.school.library_book as library_book
 
 title_formats = ['The {adjective1} {noun1}', '{noun1}, {noun2}, and the {adjective1} {noun3}', 
@@ -17,6 +18,7 @@ book_description_adjectives = ['old', 'worn', 'dusty', 'new', 'shiny', 'red', 'o
 book_messages = ['This page is in a language that you do not understand.', 'This page is mysteriously blank.', 
     'This page is too worn for you to make out the text.', 'This page has been blotted out by an ink spill.']
 book_message_weights = [45, 8, 40, 7]
+book_message_table = weighted.WeightedTable(book_messages, book_message_weights)
 
 def clone():
     t_format = random.choice(title_formats)
@@ -43,7 +45,7 @@ def clone():
 
     number_pages = round(random.normalvariate(30, 15))
 
-    page_msg = random.choices(book_messages, book_message_weights)[0]
+    page_msg = book_message_table.choice()
     book_msg = """
 \=============================================
 %s
@@ -23,5 +23,7 @@ class SecretPassageBook(library_book.LibraryBook):
     actions['take'] = action.Action(take, True, False)
     actions['get'] =  action.Action(take, True, False)
 
+PROTOTYPE = True
+
 def clone():
     return SecretPassageBook()
\ No newline at end of file
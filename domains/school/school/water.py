@@ -1,5 +1,7 @@
 import liquid
 
+PROTOTYPE = True
+
 def clone():
     water = liquid.Liquid('water', __file__, 'normal water', 'This is some normal, clear water.')
     water.path = 'domains.school.school.water'
@@ -51,5 +51,7 @@ class Scroll(thing.Thing):
 # Module level functions (e.g. clone, load)
 #
 
+PROTOTYPE = True
+
 def clone(player_obj=None):
     return Scroll()
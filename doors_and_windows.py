@@ -34,10 +34,15 @@ class Door(scenery.Scenery):
         self.allowed_to_lock = allowed_to_lock
     
     def toggle_matching(self, lock_setting, open_state):
+        """Update the matching door on the other side. If the room there isn't
+        loaded, the change is applied when it is."""
+        gametools.room_handle(self.dest).defer(Door._set_matching, self.direction, lock_setting, open_state)
+
+    @staticmethod
+    def _set_matching(r, direction, lock_setting, open_state):
         try:
-            r = gametools.load_room(self.dest)
             for i in r.contents:
-                if isinstance(i, Door) and i.direction == Door.opposite_directions[self.direction]:
+                if isinstance(i, Door) and i.direction == Door.opposite_directions[direction]:
                     i.locked = lock_setting
                     i.open_state = open_state
                     if open_state:
@@ -45,6 +50,7 @@ class Door(scenery.Scenery):
                     else:
                         if i.direction in list(r.exits):
                             del r.exits[i.direction]
+                    i.changed()
         except:
             return
     
@@ -70,6 +76,7 @@ class Door(scenery.Scenery):
         self.toggle_matching(self.locked, True)
         self.open_state = True
         self.location.add_exit(self.direction, self.dest)
+        self.changed()
     
     def close_door_fc(self):
         self.toggle_matching(self.locked, False)
@@ -78,6 +85,7 @@ class Door(scenery.Scenery):
             del self.location.exits[self.direction]
         except KeyError:
             self.log.error('No exit in direction %s to delete!' % self.direction)
+        self.changed()
 
     def open_door(self, p, cons, oDO, oIDO):
         if self != oDO:
@@ -135,6 +143,7 @@ class Door(scenery.Scenery):
         if self.allowed_to_lock != 'everyone' and cons.user.names[0] not in self.allowed_to_lock:
             cons.user.perceive('You don\'t have the key.')
         self.locked = True
+        self.changed()
         self.toggle_matching(True, self.open_state)
         cons.user.perceive('You lock the door.')
         cons.user.emit('&nD%s locks the door.')
@@ -146,6 +155,7 @@ class Door(scenery.Scenery):
         if self.allowed_to_lock != 'everyone' and cons.user.names[0] not in self.allowed_to_lock:
             cons.user.perceive('You don\'t have the key.')
         self.locked = False
+        self.changed()
         self.toggle_matching(False, self.open_state)
         cons.user.perceive('You unlock the door.')
         cons.user.emit('&nD%s unlocks the door.')
@@ -17,13 +17,21 @@ import connections_websock
 import miracle
 
 import gametools
+import player_loader
+import auth
+from player_directory import PlayerDirectory
+from shutdown import ShutdownCoordinator
+from world_snapshot import WorldSnapshot, WORLD_SAVE_BEATS
+from room_eviction import RoomEvictor, EVICTION_SWEEP_BEATS
+from worldgraph import WorldGraph
 
 from thing import Thing
-from player import Player
 from parse import Parser
 from console import Console
 from parse import Parser
 
+PLAYER_DIR_REFRESH_BEATS = 10  # how often to check saved_players/ for added or removed files
+
 class Game():
     """
         The Game class contains a parser, a list of players, a time counter, 
@@ -67,6 +75,12 @@ class Game():
         self.users = []
 
         self.shutdown_console = None
+        self.player_file_problems = {}
+        self.player_directory = PlayerDirectory(gametools.realDir(gametools.PLAYER_DIR))
+        self.auth = auth.AuthService(self)
+        self.world = WorldSnapshot(gametools.realDir(gametools.WORLD_SNAPSHOT_DIR))
+        self.graph = WorldGraph(clock=lambda: self.time)  # rooms and exits, for NPC movement
+        self.evictor = RoomEvictor(self.world, graph=self.graph)
 
         self.total_times = {}
         self.numrun_times = {}
@@ -194,66 +208,25 @@ class Game():
             msg += "```game.roles[] = %s```\n" % pprint.pformat(self.roles, width=40, indent=4)
         return msg
 
-    def save_game(self, filename):
-        raise NotImplementedError("Saving games no longer works.")
-        if not filename.endswith('.OAD'): 
-            filename += '.OAD'
-        try:
-            f = open(filename, 'w+b')
-            # explicitly dump ID_dict to guarantee we dump all objects
-            save = Thing.ID_dict, self
-            pickle.dump(save, f, pickle.HIGHEST_PROTOCOL)
-            self.cons.write("Saved entire game to file %s" % filename)
-            f.close()
-        except IOError:
-            self.cons.write("Error writing to file %s" % filename)
-        except pickle.PickleError:
-            self.cons.write("Error pickling when saving to file %s" % filename)
-            
-    def load_game(self, filename):
-        raise NotImplementedError("Loading games no longer works.")
-        if not filename.endswith('.OAD'): 
-            filename += '.OAD'
+    def save_game(self, filename=None):
+        """Save the state of every loaded room to the world snapshot directory
+        <filename> (a real filesystem path), or to the game's usual snapshot
+        directory if not given. Only rooms that changed are rewritten."""
         try:
-            f = open(filename, 'r+b')
-        except FileNotFoundError:
-            self.cons.write("Error, couldn't find file named %s" % filename)
-            return
-        try:
-            backup_ID_dict = Thing.ID_dict.copy()
-            Thing.ID_dict.clear()  # unpickling will re-create Thing.ID_dict
-            backup_heartbeat_users = self.heartbeat_users.copy()
-            self.heartbeat_users.clear()
-            saved = pickle.load(f)
-            new_ID_dict, newgame = saved
-        except pickle.PickleError:
-            self.cons.write("Encountered error while loading from file %s, game not loaded." % filename)
-            Thing.ID_dict = backup_ID_dict
-            self.heartbeat_users = backup_heartbeat_users
-            f.close()
-            return
-        del backup_ID_dict
-        # TODO: move below code for deleting player to Player.__del__()
-        # Unlink player object from room, contents:
-        if self.user.location.extract(self.user):
-            self.log.error("Error deleting player from room during load_game()")
-        for o in self.user.contents: 
-            if self.user.extract(o):
-                self.log.error("Error deleting contents of player (%s) during load_game()" % o)
-        self.cons.user = None
-        
-        self.user, self.heartbeat_users = newgame.user, newgame.heartbeat_users
-        self.user.cons = self.cons  # custom pickling code for Player doesn't save console
-        self.cons.user = self.user  # update backref from cons
-
-        for o in Thing.ID_dict: 
-            Thing.ID_dict[o]._restore_objs_from_IDs()            
-
-        self.cons.change_players = True
-
-        self.cons.write("Restored game state from file %s" % filename)
-    
-        f.close()
+            written = self.world.save(filename).result()
+        except OSError:
+            self.log.exception("Error saving world snapshot to %s" % filename)
+            return "Error writing world snapshot to %s" % filename
+        return "Saved %d changed rooms to %s" % (written, self.world.directory)
+
+    def load_game(self, filename=None):
+        """Restore the world snapshot in directory <filename>, or the game's
+        usual snapshot directory if not given. Loaded rooms are restored
+        immediately; the rest are restored when they are next loaded."""
+        count = self.world.restore(filename)
+        if not count:
+            return "No saved rooms found in %s" % self.world.directory
+        return "Restored world snapshot from %s (%d rooms)" % (self.world.directory, count)
     
     def create_backups(self, filename, player, other_filename):        
         """Makes up to 20 backups of <filename>. 
@@ -285,135 +258,63 @@ class Game():
             except FileNotFoundError:
                 pass
     
-    def is_jsonable(self, x):
-        """Test to see if an item is json-serialisable. Used as a last resort to prevent players from not saving."""
-        try:
-            json.dumps(x)
-            return True
-        except (TypeError, OverflowError):
-            return False
-    
     def save_player(self, filename, player):
+        """Save <player> and everything it carries to <filename>. The snapshot
+        is taken without changing any object IDs, so the player can keep
+        playing (or be saved again) immediately."""
         try:
             player.save_cons_attributes()
         except Exception:
             self.log.error('Error saving console attributes for player %s!' % player)
 
-        # Keep a list of "broken objects" to destroy
-        broken_objs = []
-        # Uniquify the ID string of every object carried by the player
-        tag = '-saveplayer'+str(random.randint(100000,999999))
-        l = [player] 
-        for obj in l:
-            # change object ID and corresponding entry in ID_dict
-            try:
-                del Thing.ID_dict[obj.id]
-                obj.id = obj.id + tag  
-                obj._add_ID(obj.id)
-                # recursively add associated objects
-                if obj.contents != None:
-                    l += obj.contents
-                if hasattr(obj, 'default_weapon'):
-                    l += [obj.default_weapon]
-                if hasattr(obj, 'default_armor'):
-                    l += [obj.default_armor]
-            except Exception:
-                self.log.error('Error uniquifying the ID of %s. Removing from player inventory.' % obj)
-                broken_objs.append(obj)
-                
-        for obj in broken_objs:
-            try:
-                obj.destroy()
-            except Exception:
-                self.log.exception('Error destroying object %s!' % obj)
-                # TODO: figure out what to do here
-
-        if not filename.endswith('.OADplayer'): 
-            filename += '.OADplayer'
         try:
-            f = open(filename, 'w')
-            # XXX double-check: is this really necessary? 
-            backup_ID_dict = Thing.ID_dict.copy()
-            Thing.ID_dict.clear()
-            # change location & contents etc from obj reference to ID:
-            for obj in l:
-                obj._change_objs_to_IDs()
-            saveables = [x.get_saveable() for x in l]
-            for i in saveables:
-                sub_amt = 0
-                for sidx in range(0, len(i)):
-                    j = list(i.keys())[sidx - sub_amt]
-                    if not self.is_jsonable(i[j]):
-                        del i[j]
-                        sub_amt += 1
-            f.write(json.dumps(saveables, skipkeys=True, sort_keys=True, indent=4))
-            Thing.ID_dict = backup_ID_dict
-            player.cons.write("Saved player data!")
-            player.log.info(f"Saved player data to file {filename}")
-            f.close()
-        except IOError:
-            player.cons.write("Error writing to file %s" % filename)
-            player.log.error(f"Error writing player data! filename = {filename}")
-            Thing.ID_dict = backup_ID_dict # ESSENTIAL THAT WE DO THIS!
-        except TypeError:
+            filename = player_loader.write_player_file(filename, player_loader.snapshot_player(player, self.log))
+        except (IOError, TypeError, ValueError):
             player.cons.write("Error writing to file %s" % filename)
-            self.log.exception('A TypeError occurred while trying to save player %s. Printing below:' % player)
-            Thing.ID_dict = backup_ID_dict
-        # restore location & contents etc to obj references:
-        for obj in l:
-            try:
-                obj._restore_objs_from_IDs()
-            except Exception:
-                broken_objs.append(obj)
-                self.log.exception('An error occurred while loading %s! Printing below:')
-
-        # restore original IDs by removing tag
-        for obj in l:
-            del Thing.ID_dict[obj.id]  # get rid of uniquified entry in ID_dict
-            (head, sep, tail) = obj.id.partition(tag)
-            obj.id = head  
-            obj._add_ID(obj.id)  # re-create original entry in ID_dict
+            self.log.exception('Error writing player data for %s to %s!' % (player, filename))
+            return False
+        if filename == gametools.realDir(gametools.PLAYER_DIR, player.names[0]) + '.OADplayer':
+            self.player_directory.add_saved(player.names[0])
+        player.cons.write("Saved player data!")
+        player.log.info(f"Saved player data to file {filename}")
+        return True
         
 
-    def load_player(self, filename, cons, oldplayer=None, password=None):
+    def load_player(self, filename, cons, oldplayer=None, password=None, player_file=None):
         """Load a single player and his/her inventory from a saved file.
 
         Objects in the player's inventory (and their contents, recursively) 
         are treated as new objects, and will often be duplicates of
-        existing objects already in the game. Thus after unpickling each 
-        object we need to add it to Thing.ID_dict with a new and unique ID.""" 
-
-
+        existing objects already in the game. The file is parsed and the 
+        password checked before any object is created; then the object graph
+        is built in a single topologically ordered pass that gives every 
+        object a new, unique ID (see player_loader.ObjectGraphLoader).
+
+        If [password] is given it is verified here, which blocks; the login
+        code instead verifies on the auth thread pool and passes in the
+        already-parsed [player_file].""" 
         if not filename.endswith('.OADplayer'): 
             filename += '.OADplayer'
-        try:
-            f = open(filename, 'r')
-        except FileNotFoundError:
-            cons.write("Error, couldn't find file named %s" % filename)
-            raise gametools.PlayerLoadError
-        try:
-            # l is the list of objects (player + recursive inventory). Note that 
-            # the loading code calls init() which creates new entries in ID_dict for objects in l,
-            # using the uniquified IDs - guaranteed to succeed without further changing ID
-            saveables = json.loads(f.read())
-            f.close()
-            l = []
-            for x in saveables:
-                obj = gametools.clone(x['path'])
-                if not obj:
-                    continue
-                del Thing.ID_dict[obj.id] # Delete the temporary ID created by the `clone` function
-                obj.update_obj(x)
-                l.append(obj)
-        except EOFError:
-            cons.write("The file you are trying to load appears to be corrupt.")
-            raise gametools.PlayerLoadError
-        newplayer = l[0]  # first object saved is the player
+        if player_file is None:
+            try:
+                player_file = player_loader.read_player_file(filename)
+            except gametools.PlayerLoadError as e:
+                self.log.error("Error loading player: %s" % e)
+                cons.write("Error, couldn't load a player from file %s" % filename)
+                raise
         if password:
-            if password != newplayer.password:
+            if not auth.verify_password(password, player_file.password):
                 raise gametools.IncorrectPasswordError
-        
-        broken_objs = [] # Make sure to remove all of the broken objects from the player's inventory
+
+        loader = player_loader.ObjectGraphLoader(self.log)
+        diagnostics = []
+        loader.build(player_file.ordered(diagnostics))
+        loader.diagnostics += diagnostics
+        loader.report(filename)
+        newplayer = loader.root
+        if newplayer is None:
+            cons.write("The file you are trying to load appears to be corrupt.")
+            raise gametools.PlayerLoadError("couldn't build player object from file %s" % filename)
 
         if oldplayer:
             # TODO: move below code for deleting player to Player.__del__()
@@ -422,69 +323,27 @@ class Game():
             for o in eraselist:
                 if o.contents:
                     eraselist += o.contents
-                if o.location.extract(o):
-                    self.log.error("Error deleting player or inventory during load_game(): object %s contained in %s " % (o, o.location))
+                if o.location and o.location.extract(o) == True:
+                    self.log.error("Error deleting player or inventory during load_player(): object %s contained in %s " % (o, o.location))
                 if o in self.heartbeat_users:
                     self.deregister_heartbeat(o)
-                del Thing.ID_dict[o.id]
-                # o.__del__()  # XXX probably doesn't truly delete the object; needs more research
+                Thing.ID_dict.pop(o.id, None)
+            self.player_directory.unregister_online(oldplayer)
             cons.user = None
         
         newplayer.cons = cons  # custom saving code for Player doesn't save console
         cons.user = newplayer  # update backref from cons
         newplayer.update_cons_attributes()
+        self.player_directory.register_online(newplayer)
 
         cons.change_players = True
 
         loc_str = newplayer.location
-        newplayer.location = gametools.load_room(loc_str) 
+        newplayer.location = gametools.load_room(loc_str) if isinstance(loc_str, str) else None
         if newplayer.location == None: 
             self.log.warning("Saved location '%s' for player %s no longer exists; using default location" % (loc_str, newplayer))
             cons.write("Somehow you can't quite remember where you were, but you now find yourself back in the Great Hall.")
-            newplayer.location = gametools.load_room('domains.school.school.great_hall')
-
-        # Add all of the objects to Thing.ID_dict temporarily
-        for o in l:
-            Thing.ID_dict[o.id] = o
-        
-        # Now fix up location & contents[] to list object refs, not ID strings
-        for o in l:
-            try:
-                o._restore_objs_from_IDs()
-            except Exception:
-                broken_objs.append(o)
-                self.log.exception('An error occurred while loading %s! Printing below:')
-        # Now de-uniquify all IDs, replace object.id and ID_dict{} entry
-        for o in l:
-            try:
-                del Thing.ID_dict[o.id]
-                (head, sep, tail) = o.id.partition('-saveplayer')
-                o.id = o._add_ID(head)  # if object with ID == head exists, will create a new ID
-            except Exception:
-                broken_objs.append(o)
-                self.log.exception('An error occurred while loading %s! Printing below:')
-
-        # Make sure that broken objects are removed from their container's contents list
-        reference_check = [newplayer]
-        for obj in reference_check:
-            if obj.contents and isinstance(obj.contents, list):
-                for o in obj.contents:
-                    if o in broken_objs:
-                        del obj.contents[obj.contents.index(o)]
-                    # Catch a few specific errors
-                    try:
-                        if o.location != obj:
-                            broken_objs.append(o)
-                            del obj.contents[obj.contents.index(o)]
-                    except ValueError:
-                        broken_objs.append(o)
-        
-        for o in broken_objs:
-            try:
-                o.destroy()
-            except Exception:
-                self.log.error('Error destroying object %s!' % o)
-                #TODO: Figure out what to do here
+            newplayer.location = gametools.load_room(gametools.DEFAULT_START_LOC)
 
         room = newplayer.location
         try:
@@ -499,6 +358,18 @@ class Game():
             room.report_arrival(newplayer, silent=True)
             room.emit("&nI%s suddenly appears, as if by sorcery!" % newplayer.id, [newplayer])
         return newplayer
+
+    def validate_saved_players(self):
+        """Check every player file in saved_players/ before accepting connections,
+        logging a summary of any broken references or missing modules found."""
+        results = player_loader.validate_player_files(gametools.realDir(gametools.PLAYER_DIR))
+        problems = {name: diags for name, diags in results.items() if diags}
+        for name, diags in problems.items():
+            for d in diags:
+                self.log.warning("Saved player file %s: %s" % (name, d.message))
+        self.log.info("Validated %d saved player files, %d with problems" % (len(results), len(problems)))
+        self.player_file_problems = problems
+        return problems
     
     def login_player(self, cons):
         """Create a new player object and put it in "login state", which
@@ -574,6 +445,15 @@ class Game():
         """Advance time, run scheduled events, and call registered heartbeat functions"""
         self.time += 1
 
+        if self.time % PLAYER_DIR_REFRESH_BEATS == 0:
+            self.player_directory.refresh()
+
+        if self.time % WORLD_SAVE_BEATS == 0:
+            self.schedule_event(0, self.world.save)
+
+        if self.time % EVICTION_SWEEP_BEATS == 0:
+            self.schedule_event(0, self.evictor.sweep)
+
         for h in self.heartbeat_users:
             self.schedule_event(0, h.heartbeat)
 
@@ -612,6 +492,9 @@ class Game():
                 self.server_ip = input_ip
             except ValueError:
                 print("Error: %s is not a valid IP address! Please try again." % input_ip)
+
+        self.validate_saved_players()
+        self.log.info("World snapshot has %d saved rooms" % self.world.restore())
         
         for i in range(0, self.retry):
             try:
@@ -626,24 +509,15 @@ class Game():
         self.events.call_later(1,self.beat)
         self.events.run_forever()
 
-        # XXX add callbacks to handle game exit?
-        # Go through and save every player
-        players = [Thing.ID_dict[x] for x in Thing.ID_dict if isinstance(Thing.ID_dict[x], Player)]
-        consoles = [x.cons for x in players]
+        # Save every player and flush every console, in parallel and within a deadline
         restart_code = 0
+        extra_consoles = []
         if self.shutdown_console:
-            consoles.append(self.shutdown_console)
+            extra_consoles.append(self.shutdown_console)
             restart_code = 1
-        for i in players:
-            if i.cons:
-                i.cons.write('The game is now shutting down.')
-                self.save_player(gametools.realDir(gametools.PLAYER_DIR, i.names[0]), i)
-                i.cons.write('--#quit')
-        
-        for j in consoles:
-            if j and j.user: # Make sure to send all messages from consoles before fully quitting game
-                self.events.run_until_complete(connections_websock.ws_send(j))                
+        ShutdownCoordinator(self).run(extra_consoles)
 
+        self.auth.shutdown()
         self.log.critical("Exiting main game loop!")
         self.log_func_profile()
         sys.exit(restart_code)
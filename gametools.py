@@ -1,8 +1,14 @@
 import os
 import platform
 import importlib
+import queue
+import atexit
 import logging
-from walking_os import findAllPythonFiles
+import logging.handlers
+import weakref
+import functools
+from collections import OrderedDict
+from walking_os import findAllPythonFiles, ModuleIndex
 
 #
 # GLOBAL GAME ATTRIBUTES
@@ -16,6 +22,8 @@ GAME_LOG = "/game_log.txt"
 PLAYER_ROLES_FILE = "/player_roles.json"
 PLAYER_DIR = "/saved_players"
 PLAYER_BACKUP_DIR = "/backup_saved_players"
+WORLD_SNAPSHOT_DIR = "/world_snapshot"
+WORLD_MAP_DIR = "/world_maps"  # maps pre-generated by worldbuilder.py
 DOMAIN_DIR = "/domains/"
 HOME_DIR = "/home/"
 
@@ -78,7 +86,12 @@ def realDir(*gamedir, player=None):
 
 def findGamePath(filepath):
     """ Change an OS filename path (separated by forward or backward slashes) to a 
-    python-style module path separated by periods."""
+    python-style module path separated by periods. Results are cached, so modules
+    that need their own path often should still compute it once at import time."""
+    return _findGamePath(os.path.abspath(filepath))
+
+@functools.lru_cache(maxsize=None)
+def _findGamePath(filepath):
     gamePath = os.path.relpath(filepath, gameroot).replace("\\", ".").replace("/", ".")
     (head, sep, tail) = gamePath.partition(".py")
     gamePath = head
@@ -95,14 +108,9 @@ def deconstructObjectPath(path_str):
     return path, None
 
 def check_player_exists(p):
-    """Return whether a given player exists, i.e. has a save file."""
-    filename = realDir(PLAYER_DIR, p) + '.OADplayer'
-    try:
-        f = open(filename, 'r+b')
-        f.close()  # success, player exists, so close file for now
-        return True
-    except FileNotFoundError: 
-        return False
+    """Return whether a given player exists, i.e. has a save file. Checks the
+    filesystem directly; the running game should use Game.player_directory."""
+    return os.path.isfile(realDir(PLAYER_DIR, p) + '.OADplayer')
         
 def walklevel(some_dir, level=1):
     some_dir = some_dir.rstrip(os.path.sep)
@@ -119,31 +127,115 @@ def request_all_inputs(player, dest):
 
 #
 # LOGGING 
+#   Each object path (or subsystem name, such as "_gameserver") has a single
+#   logger, configured once. Objects don't get loggers of their own: each
+#   object's `log` is a lightweight ObjectLogAdapter around the logger for its
+#   path, which adds the object's ID to every record as `obj_id`. Adapters
+#   hold only a weak reference to their object, so they are freed along with
+#   it and the set of loggers doesn't grow as objects come and go.
+#
+#   Records for the logfile are put on a queue by game_log_handler and
+#   written by a background thread (game_log_listener), so the event loop
+#   never waits on the disk. Loggers are set to GAME_LOG_LEVEL unless a more
+#   verbose handler (e.g. the debug command's ConsHandler, which is attached
+#   directly and so still sees records immediately) is attached, which
+#   makes a debug() call below that level return almost immediately. Log
+#   calls should pass arguments %-style, e.g. log.debug('%s moved', obj.id),
+#   so the message is only formatted if the record is actually handled.
 #
-game_log_handler = logging.FileHandler(realDir(GAME_LOG))
-game_log_handler.setLevel(logging.WARNING)
-game_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-game_log_handler.setFormatter(game_log_formatter)
+GAME_LOG_LEVEL = logging.WARNING
+GAME_LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate game_log.txt when it reaches this size
+GAME_LOG_BACKUPS = 5                   # keep game_log.txt.1 ... game_log.txt.5
 
-def get_game_logger(obj, printing=False):
-    """Returns the logger associated with object `obj`, creating if needed. All
-       objects log messages to the default logfile via game_log_handler; if 
-       <printing> is set to True, messages are also printed to stderr."""
-    if isinstance(obj, str):
-        logname = obj
-    else:
-        if obj.path:
-            # name the log for this object by its path + id, unless id already == path (Rooms)
-            logname = obj.path + "" if obj.id==obj.path else ":"+obj.id
-        else:
-            logname = obj.id
+game_log_file_handler = logging.handlers.RotatingFileHandler(realDir(GAME_LOG), maxBytes=GAME_LOG_MAX_BYTES, backupCount=GAME_LOG_BACKUPS)
+game_log_formatter = logging.Formatter('%(asctime)s - %(name)s%(obj_id)s - %(levelname)s - %(message)s', defaults={'obj_id': ''})
+game_log_file_handler.setFormatter(game_log_formatter)
+game_log_queue = queue.SimpleQueue()
+game_log_handler = logging.handlers.QueueHandler(game_log_queue)
+game_log_handler.setLevel(GAME_LOG_LEVEL)
+game_log_listener = logging.handlers.QueueListener(game_log_queue, game_log_file_handler)
+game_log_listener.start()
+atexit.register(game_log_listener.stop)  # writes out anything still queued
+stderr_log_handler = logging.StreamHandler()
+NO_PATH_LOGGER = "_objects"  # shared by objects with no module path, e.g. default weapons
+
+_game_loggers = {}  # logger name -> logging.Logger, already configured
+
+def _update_log_level(logger):
+    """Set <logger>'s level to the most verbose level of its handlers, but no
+    less verbose than GAME_LOG_LEVEL."""
+    levels = [h.level or logging.DEBUG for h in logger.handlers]
+    logger.setLevel(min([GAME_LOG_LEVEL] + levels))
+
+def _get_path_logger(logname):
+    try:
+        return _game_loggers[logname]
+    except KeyError:
+        pass
     logger = logging.getLogger(logname)
-    logger.setLevel(logging.DEBUG)
-    logger.addHandler(game_log_handler)
-    if printing:
-        logger.addHandler(logging.StreamHandler())
+    logger.setLevel(GAME_LOG_LEVEL)
+    logger.propagate = False  # path names are dotted, but parent modules' loggers shouldn't see these records
+    if game_log_handler not in logger.handlers:
+        logger.addHandler(game_log_handler)
+    _game_loggers[logname] = logger
     return logger
 
+def release_path_logger(logname):
+    """Forget the logger <logname>, e.g. for the path of a procedural room
+    that has been unloaded, unless something else is attached to it."""
+    logger = _game_loggers.get(logname)
+    if logger is None or logger.handlers != [game_log_handler]:
+        return
+    del _game_loggers[logname]
+    logging.Logger.manager.loggerDict.pop(logname, None)
+
+class ObjectLogAdapter(logging.LoggerAdapter):
+    """The logger for a single game object. Records go to the logger for the
+    object's path, tagged with ":<object id>" (unless the ID is the path
+    itself, as for rooms). Handlers added through the adapter, e.g. by the
+    debug command, only receive this object's records."""
+    def __init__(self, logger, obj):
+        super().__init__(logger, None)
+        self._obj = weakref.ref(obj)
+
+    def obj_tag(self):
+        obj = self._obj()
+        if obj is None:
+            return ':<destroyed>'
+        oid = getattr(obj, 'id', None)
+        return '' if oid == self.logger.name else ':%s' % oid
+
+    def process(self, msg, kwargs):
+        extra = kwargs.get('extra')
+        kwargs['extra'] = dict(extra, obj_id=self.obj_tag()) if extra else {'obj_id': self.obj_tag()}
+        return msg, kwargs
+
+    def addHandler(self, handler):
+        handler.addFilter(self._filter)
+        self.logger.addHandler(handler)
+        _update_log_level(self.logger)
+
+    def removeHandler(self, handler):
+        self.logger.removeHandler(handler)
+        handler.removeFilter(self._filter)
+        _update_log_level(self.logger)
+
+    def _filter(self, record):
+        return getattr(record, 'obj_id', None) == self.obj_tag()
+
+def get_game_logger(obj, printing=False):
+    """Returns the logger associated with `obj`: for a string, the logger with
+    that name; for a game object, an ObjectLogAdapter around the logger for
+    its path. All loggers write to the default logfile via game_log_handler;
+    if <printing> is set to True, messages are also printed to stderr."""
+    path_logger = _get_path_logger(obj if isinstance(obj, str) else (obj.path or NO_PATH_LOGGER))
+    if printing and stderr_log_handler not in path_logger.handlers:
+        path_logger.addHandler(stderr_log_handler)
+        _update_log_level(path_logger)
+    if isinstance(obj, str):
+        return path_logger
+    return ObjectLogAdapter(path_logger, obj)
+
 #
 # OBJECT CREATION/LOADING FUNCTIONS
 #
@@ -151,14 +243,12 @@ def clone(obj_module, params=None):
     '''Load specified module, call its clone() method, and return the resulting object.
     The object's module should be specified in python package format relative to the
     root of the game source tree, e.g. "domains.school.sword" refers to the python module
-        ${gameroot}/domains/school/sword.py.'''
+        ${gameroot}/domains/school/sword.py.
+    Objects are usually created from a cached prototype rather than by calling
+    clone() itself; see prototypes.py.'''
+    import prototypes  # not at module level: prototypes imports thing, which needs this module
     try: 
-        mod = importlib.import_module(obj_module)
-        if params:
-            obj = mod.clone(params)
-        else:
-            obj = mod.clone()
-        obj.mod = mod
+        obj = prototypes.registry.clone(obj_module, params)
     except ImportError:
         get_game_logger("_gametools").error("Error importing module %s" % obj_module)
         return None
@@ -169,12 +259,16 @@ def clone(obj_module, params=None):
         get_game_logger("_gametools").error("Error cloning from module %s: clone() return None" % obj_module)
     return obj
 
+module_index = ModuleIndex(gameroot)  # rooms and objects under domains/ and home/
+
 def load_room(modpath, report_import_error=True):
     """Attempt to load a room from its modpath (e.g. 'domains.school.testroom'). 
     If an ImportEerror occurs, will attempt to create a room if given paramaters.
     Returns a reference to the room, or None if the given modpath could not be loaded."""
     try: 
         roomString, params = deconstructObjectPath(modpath)
+        if not module_index.exists(roomString):
+            raise ImportError("No module named '%s'" % roomString)
         mod = importlib.import_module(roomString)
         if params:
             room = mod.load(params)
@@ -182,6 +276,7 @@ def load_room(modpath, report_import_error=True):
             room = mod.load()
         room.mod = mod # store the module to allow for reloading later
         room.params = params
+        room_built(room, modpath)
     except ImportError:
         if report_import_error:
             get_game_logger("_gametools").error("Error importing room module %s" % modpath)
@@ -192,3 +287,143 @@ def load_room(modpath, report_import_error=True):
     if room == None:
         get_game_logger("_gametools").error("Error loading from room module %s:load() returned None" % modpath)
     return room
+
+def room_built(room, modpath=None):
+    """Tell everything that tracks rooms that <room> was just built, or
+    returned again, by the module path <modpath>. Called by load_room();
+    code that calls a room module's load() itself (e.g. to reload it) must
+    call this afterwards."""
+    world = getattr(room.game, 'world', None)
+    if world:
+        world.built(room)  # first access since restart or eviction: restore saved contents
+    evictor = getattr(room.game, 'evictor', None)
+    if evictor:
+        evictor.built(room)
+    graph = getattr(room.game, 'graph', None)
+    if graph:
+        graph.observe(room, modpath)
+    handle = _room_handles.get(modpath)
+    if handle:
+        handle._built(room)
+    _apply_deferred(room, modpath)
+
+#
+# ROOM HANDLES
+#   Exits store the module path of the destination room, and following one
+#   with load_room() builds the whole room -- its scenery, its NPCs and their
+#   heartbeats -- even when the caller only wanted to check something about
+#   it. A RoomHandle stands in for the room at one path: it answers questions
+#   about the room from metadata cached the last time the room was built, and
+#   can defer changes until the room is built, so the room itself is only
+#   loaded when something enters it or needs its contents.
+#
+#   Procedural areas have no end of paths, so handles are kept for only the
+#   MAX_ROOM_HANDLES most recently used, and deferred changes for only the
+#   MAX_DEFERRED_ROOMS rooms most recently changed; forgetting a handle only
+#   loses its cached metadata, while forgetting deferred changes is logged.
+#
+ROOM_METADATA = ('monster_safe', 'indoor', 'default_light')
+MAX_ROOM_HANDLES = 5000
+MAX_DEFERRED_ROOMS = 1000
+_room_handles = OrderedDict()  # module path (with any parameters) -> RoomHandle, least recently used first
+_deferred_changes = OrderedDict()  # room ID (or module path, if never built) -> [(func, args)]
+
+def _apply_deferred(room, modpath=None):
+    """Make the changes deferred until <room> was built, whether they were
+    deferred under its ID or under the module path it was built from."""
+    changes = _deferred_changes.pop(room.id, [])
+    if modpath and modpath != room.id:
+        changes += _deferred_changes.pop(modpath, [])
+    for func, args in changes:
+        try:
+            func(room, *args)
+        except Exception:
+            get_game_logger("_gametools").exception("Error applying deferred change to room %s" % room.id)
+
+def _defer(key, func, args):
+    """Queue func(room, *args) for the room with ID or module path <key>."""
+    changes = _deferred_changes.pop(key, [])
+    changes.append((func, args))
+    _deferred_changes[key] = changes  # now the most recently changed
+    if len(_deferred_changes) > MAX_DEFERRED_ROOMS:
+        old_key, old_changes = _deferred_changes.popitem(last=False)
+        get_game_logger("_gametools").warning("Dropping %d deferred changes to room %s, never built" % (len(old_changes), old_key))
+
+def room_handle(modpath):
+    """Return the RoomHandle for the room at <modpath>, e.g. the value of an exit."""
+    try:
+        handle = _room_handles[modpath]
+        _room_handles.move_to_end(modpath)
+    except KeyError:
+        handle = _room_handles[modpath] = RoomHandle(modpath)
+        if len(_room_handles) > MAX_ROOM_HANDLES:
+            _room_handles.popitem(last=False)
+    return handle
+
+def release_room_handle(room_id):
+    """Forget the RoomHandle for room <room_id>, e.g. a procedural room that
+    has been unloaded. Deferred changes to the room are kept."""
+    _room_handles.pop(room_id, None)
+
+
+class RoomHandle():
+    """A lightweight stand-in for the room at <modpath>; see room_handle()."""
+    def __init__(self, modpath):
+        self.modpath = modpath
+        self.metadata = {}   # ROOM_METADATA attributes as of the last time the room was built
+        self.room_id = None  # ID of the room, once built (usually, but not always, modpath)
+        self._room = None    # weak reference to the room, once built
+
+    def peek(self):
+        """Return the room if it is loaded, without building it; otherwise None."""
+        room = self._room() if self._room else None
+        if room is None:
+            from thing import Thing  # not at module level: thing imports this module
+            room = Thing.ID_dict.get(self.modpath)  # loaded without going through this handle
+            if room is None or not hasattr(room, 'exits'):
+                return None
+            self._built(room)
+        if room.ID_dict.get(room.id) is room:
+            return room
+        return None
+
+    def is_loaded_as(self, room):
+        """Return True if <room> is the room this handle refers to. Never builds it."""
+        return room is not None and self.peek() is room
+
+    def room(self):
+        """Return the room, building it first if necessary (see load_room())."""
+        return self.peek() or load_room(self.modpath)
+
+    def get(self, attr):
+        """Return the ROOM_METADATA attribute <attr> of the room: from the room
+        itself if it is loaded, otherwise from the cached metadata. Builds the
+        room only if it has never been built."""
+        room = self.peek()
+        if room is None and attr not in self.metadata:
+            room = self.room()
+        if room is not None:
+            return getattr(room, attr)
+        return self.metadata.get(attr)
+
+    @property
+    def monster_safe(self):
+        return self.get('monster_safe')
+
+    def defer(self, func, *args):
+        """Call func(room, *args) now if the room is loaded; otherwise, when it
+        is next built, by whatever path (see room_built())."""
+        room = self.peek()
+        if room is not None:
+            func(room, *args)
+        else:
+            _defer(self.room_id or self.modpath, func, args)
+
+    def _built(self, room):
+        """Called by room_built() each time the room is returned, and by
+        peek() when it finds the room loaded some other way."""
+        if not (self._room and self._room() is room):
+            self._room = weakref.ref(room)
+            self.room_id = room.id
+            self.metadata = {attr: getattr(room, attr) for attr in ROOM_METADATA if hasattr(room, attr)}
+        _apply_deferred(room, self.modpath)
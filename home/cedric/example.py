@@ -1,6 +1,8 @@
 import thing
 import gametools
 
+PROTOTYPE = True
+
 def clone():
     example = thing.Thing('example', __file__)
     example.set_description('example object', 'This is an example object for testing purposes.')
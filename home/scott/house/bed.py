@@ -57,6 +57,9 @@ class Bed(Container):
 #
 # MODULE-LEVEL FUNCTIONS (e.g., clone() or load())
 #
+
+PROTOTYPE = True
+
 def clone():
     bed = Bed('bed', __file__, 'domains.school.forest.forest3')
     bed.set_description('soft, comfortable bed', 'This bed is soft and comfortable. It has white sheets on it.')
@@ -1,5 +1,7 @@
 import book
 
+PROTOTYPE = True
+
 def clone():
     blue_book = book.Book("blue book", __file__, "newer light blue book", "This book is newer, sky blue, and says \"Dragonsky\" on the cover.")
     blue_book.add_names("book", "Dragonsky")
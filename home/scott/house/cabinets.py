@@ -1,5 +1,7 @@
 import container
 
+PROTOTYPE = True
+
 def clone():
     cabnet = container.Container('cabinet', __file__)
     cabnet.set_description('small cabinet', 'This is a small cabinet above the sink.')
@@ -38,6 +38,9 @@ class Couch(Container):
 #
 # MODULE-LEVEL FUNCTIONS (e.g., clone() or load())
 #
+
+PROTOTYPE = True
+
 def clone():
     couch = Couch('couch', __file__)
     couch.set_description('nice leather couch', 'This is a nice leather couch. You want to sit on it.')
@@ -1,5 +1,7 @@
 import domains.wizardry.gems as gems
 
+PROTOTYPE = True
+
 def clone():
     diamond = gems.Diamond(__file__, 'diamond', 'crystal-clear diamond', 'This diamond is hard to notice because it is so small.')
     return diamond
\ No newline at end of file
@@ -1,5 +1,7 @@
 import book
 
+PROTOTYPE = True
+
 def clone():
     dusty_book = book.Book("dusty book", __file__, "old, dusty book", "This is an old book that is very dusty.")
     dusty_book.add_names("book")
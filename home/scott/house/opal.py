@@ -1,5 +1,7 @@
 import domains.wizardry.gems as gems
 
+PROTOTYPE = True
+
 def clone():
     opal = gems.Opal(__file__, 'opal', 'jagged-cut opal', 'This opal is jaggedly cut.')
     return opal
@@ -41,6 +41,9 @@ class PlaceChooser(Thing):
 #
 # MODULE-LEVEL FUNCTIONS (e.g., clone() or load())
 #
+
+PROTOTYPE = True
+
 def clone():
     paper = PlaceChooser('paper', __file__)
     return paper
\ No newline at end of file
@@ -1,5 +1,7 @@
 import domains.wizardry.gems as gems
 
+PROTOTYPE = True
+
 def clone():
     ruby = gems.Ruby(__file__, 'ruby', 'red ruby', 'This ruby is a perfect shimmering red.')
     return ruby
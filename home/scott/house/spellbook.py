@@ -1,5 +1,7 @@
 import book
 
+PROTOTYPE = True
+
 def clone():
     spellbook = book.Book("spellbook", __file__, "hard-covered spellbook", "This spellbook has a very sturdy cover.")
     spellbook.add_names("book")
@@ -0,0 +1,104 @@
+import gc
+import sys
+import time
+import weakref
+from collections import Counter
+
+#
+# OBJECT LIFETIME TRACKING
+#   Optional bookkeeping of every game object, enabled with the --track-objects
+#   startup flag. The tracker holds only weak references, so it never keeps an
+#   object alive; a weakref callback updates the counts when the object is
+#   collected. Objects that have been destroyed (removed from Thing.ID_dict)
+#   but are still alive LEAK_GRACE_SECONDS later are reported as leaks: some
+#   reference to them has been left behind.
+#
+LEAK_GRACE_SECONDS = 60
+MEMORY_SAMPLE_SIZE = 20  # objects per path measured to estimate memory use
+NO_PATH = '<no path>'
+
+tracker = None  # the LifetimeTracker, if tracking is enabled
+
+def enable():
+    """Start tracking object lifetimes. Only objects created afterwards are tracked."""
+    global tracker
+    if tracker is None:
+        tracker = LifetimeTracker()
+    return tracker
+
+def _estimate_size(obj):
+    size = sys.getsizeof(obj)
+    state = getattr(obj, '__dict__', None)
+    if state is not None:
+        size += sys.getsizeof(state) + sum(sys.getsizeof(v) for v in state.values())
+    return size
+
+
+class LifetimeTracker():
+    """Count live game objects by path, and find destroyed objects that are
+    still referenced. See the `lifetimes` wizard command."""
+    def __init__(self):
+        self.live = {}           # id(obj) -> (weakref, path)
+        self.counts = Counter()  # path -> number of live objects
+        self.destroyed = {}      # id(obj) -> (weakref, path, object ID, time destroyed)
+
+    def track(self, obj):
+        key = id(obj)
+        if key in self.live:
+            return
+        path = obj.path or NO_PATH
+        self.live[key] = (weakref.ref(obj, lambda ref, key=key: self._collected(key)), path)
+        self.counts[path] += 1
+
+    def _collected(self, key):
+        ref, path = self.live.pop(key, (None, None))
+        if path is not None:
+            self.counts[path] -= 1
+            if not self.counts[path]:
+                del self.counts[path]
+        self.destroyed.pop(key, None)
+
+    def mark_destroyed(self, obj):
+        """Record that <obj> has been destroyed, and so should soon be collected."""
+        entry = self.live.get(id(obj))
+        if entry:
+            self.destroyed[id(obj)] = (entry[0], entry[1], obj.id, time.time())
+
+    def leaks(self, grace=LEAK_GRACE_SECONDS):
+        """Return a list of (path, object ID, seconds since destroyed) for
+        objects destroyed more than <grace> seconds ago but still alive."""
+        gc.collect()  # collect unreachable cycles first, so only real leaks remain
+        now = time.time()
+        return sorted(((path, oid, now - when) for ref, path, oid, when in list(self.destroyed.values())
+                       if ref() is not None and now - when > grace), key=lambda leak: -leak[2])
+
+    def top_paths(self, n=10):
+        """Return a list of (path, live count, estimated bytes) for the <n>
+        paths with the most live objects."""
+        top = self.counts.most_common(n)
+        wanted = {path for path, count in top}
+        samples = {path: [] for path in wanted}
+        for ref, path in list(self.live.values()):
+            if path in wanted and len(samples[path]) < MEMORY_SAMPLE_SIZE:
+                obj = ref()
+                if obj is not None:
+                    samples[path].append(_estimate_size(obj))
+        result = []
+        for path, count in top:
+            sizes = samples[path]
+            result.append((path, count, count * sum(sizes) // len(sizes) if sizes else 0))
+        return result
+
+    def report(self, n=10):
+        """Return a printable summary of the top <n> paths and any leaks."""
+        lines = ["%d live objects in %d paths. Top %d by count:" % (len(self.live), len(self.counts), n)]
+        for path, count, size in self.top_paths(n):
+            lines.append("%8d  %10.1f KB  %s" % (count, size / 1024, path))
+        leaks = self.leaks()
+        if leaks:
+            lines.append("%d destroyed objects still referenced after %d seconds:" % (len(leaks), LEAK_GRACE_SECONDS))
+            for path, oid, age in leaks[:n]:
+                lines.append("  %s (%s), destroyed %d seconds ago" % (oid, path, age))
+        else:
+            lines.append("No leaked objects.")
+        return '\n'.join(lines)
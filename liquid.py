@@ -6,6 +6,8 @@ from action import Action
 from scenery import Scenery
 from container import Container
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Liquid(Scenery):
     #
     # SPECIAL METHODS (i.e __method__() format)
@@ -19,7 +21,7 @@ class Liquid(Scenery):
         self.actions['taste'] = Action(Liquid.drink, True, False)
         self.is_liquid = True
         self.path = gametools.findGamePath(path) if path else None
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
 
     #
     # ACTION METHODS (dictionary for scenery defined per-object)
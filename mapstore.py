@@ -0,0 +1,95 @@
+import os
+import json
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import gametools
+import rng
+
+#
+# PRE-GENERATED MAPS
+#   worldbuilder.py generates a large region of a procedural domain offline
+#   and saves it under WORLD_MAP_DIR as <domain>.npy: a NumPy structured array
+#   indexed [x, y, z] relative to the region's origin, holding whatever the
+#   domain stores per cell (see e.g. endless_caverns.TILE_DTYPE), plus
+#   <domain>.json describing it. The server memory-maps the array read-only,
+#   so reading a cell is O(1), startup doesn't depend on the size of the map,
+#   and several server processes share the same pages. Cells outside the
+#   region are generated on demand as usual.
+#
+MAP_VERSION = 2  # change whenever a domain generates its cells differently
+
+def _filenames(domain):
+    base = os.path.join(gametools.realDir(gametools.WORLD_MAP_DIR), domain)
+    return base + '.npy', base + '.json'
+
+def open_store(domain, dtype):
+    """Return a read-only MapStore for <domain> (e.g. a module path), or None
+    if no map has been built for it, or the map doesn't match <dtype> or the
+    current world seed."""
+    if np is None:
+        return None
+    array_file, meta_file = _filenames(domain)
+    if not os.path.exists(meta_file):
+        return None
+    log = gametools.get_game_logger("_mapstore")
+    try:
+        with open(meta_file, 'r') as f:
+            meta = json.load(f)
+        cells = np.load(array_file, mmap_mode='r')
+    except (OSError, ValueError):
+        log.exception('Map for %s is unreadable; generating its rooms on demand.' % domain)
+        return None
+    if meta.get('version') != MAP_VERSION or meta.get('world_seed') != rng.WORLD_SEED or \
+       cells.dtype != np.dtype(dtype):
+        log.warning('Map for %s was built for a different version, world seed or format; ignoring it.' % domain)
+        return None
+    return MapStore(cells, meta['origin'])
+
+
+class MapStore():
+    """The cells of a pre-generated region, <cells> being an array indexed
+    [x, y, z] relative to <origin> (x, y, z)."""
+    def __init__(self, cells, origin):
+        self.cells = cells
+        self.origin = tuple(origin)
+        self.shape = cells.shape
+
+    def contains(self, x, y, z=0):
+        ox, oy, oz = self.origin
+        nx, ny, nz = self.shape
+        return ox <= x < ox + nx and oy <= y < oy + ny and oz <= z < oz + nz
+
+    def cell(self, x, y, z=0):
+        """Return the record for cell (x, y, z), or None if it is outside the region."""
+        if not self.contains(x, y, z):
+            return None
+        ox, oy, oz = self.origin
+        return self.cells[x - ox, y - oy, z - oz]
+
+    @staticmethod
+    def create(domain, dtype, origin, shape):
+        """Create the (empty) map for <domain> and return a writable memory-mapped
+        array to fill; call MapStore.finish() when it is complete. The map is
+        built in a temporary file, so a running server's map stays valid."""
+        array_file, meta_file = _filenames(domain)
+        os.makedirs(os.path.dirname(array_file), exist_ok=True)
+        return np.lib.format.open_memmap(array_file + '.tmp', mode='w+', dtype=np.dtype(dtype), shape=tuple(shape))
+
+    @staticmethod
+    def finish(domain, cells, origin, **info):
+        """Flush <cells> to disk, move it into place and write the map's
+        description. <info> is saved too, for reference."""
+        cells.flush()
+        array_file, meta_file = _filenames(domain)
+        if os.path.exists(meta_file):
+            os.remove(meta_file)  # so the old description is never paired with the new array
+        os.replace(array_file + '.tmp', array_file)
+        meta = dict(info, version=MAP_VERSION, world_seed=rng.WORLD_SEED, origin=list(origin), shape=list(cells.shape))
+        tmpname = meta_file + '.tmp'
+        with open(tmpname, 'w') as f:
+            json.dump(meta, f, indent=1)
+        os.replace(tmpname, meta_file)
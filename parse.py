@@ -1,5 +1,6 @@
 import sys
 import re
+import logging
 
 from word2number import w2n
 
@@ -207,7 +208,8 @@ class Parser:
                         sNoun))
                     return False
 
-            self.log.debug("local_matches in '%s' are: %s" % (s, ' '.join(obj.id for obj in local_matches)))        
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug("local_matches in '%s' are: %s", s, ' '.join(obj.id for obj in local_matches))
             if len(local_matches) > 1:
                 candidates = ", or the ".join(o._short_desc for o in local_matches)
                 cons.write("By '%s', do you mean the %s? Please provide more adjectives, use 'my' to specify "
@@ -231,7 +233,8 @@ class Parser:
                     obj.plurality = number
                 matched_objects += [obj]
         
-        self.log.debug("matched_objects in '%s' are: %s" % (sObj, ' '.join(obj.id for obj in matched_objects)))
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("matched_objects in '%s' are: %s", sObj, ' '.join(obj.id for obj in matched_objects))
         return matched_objects
 
     def _try_verb_from_obj(self, sV, obj, oDO, oIDO, cons):
@@ -289,7 +292,7 @@ class Parser:
         objects (if any) each time. 
         """
 
-        self.log.debug("parser called (user='%s', command='%s', console=%s)" % (user, command, console))
+        self.log.debug("parser called (user='%s', command='%s', console=%s)", user, command, console)
         
         # Split command into words, remove articles, convert to lowercase--but
         # don't modify "strings" of text between quotes; treat these as 1 word
@@ -331,7 +334,8 @@ class Parser:
                              + " verb %s!" % sV)
             # TODO: more useful error messages, e.g. 'verb what?' for transitive verbs 
             return True
-        self.log.debug("Parser: Possible objects matching sV '%s': " % ' '.join(o.id for o in possible_verb_objects))
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("Parser: Possible objects matching sV '%s': ", ' '.join(o.id for o in possible_verb_objects))
 
         # If multiple direct or indirect objects, enact the verb on each in turn.
         # See discussion in issue #89: the correct verb function (action) could come from 
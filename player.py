@@ -7,6 +7,10 @@ import magic
 import logging
 
 import gametools
+import auth
+import player_loader
+import prototypes
+import lifetime
 
 from thing import Thing
 from room import Room
@@ -53,6 +57,8 @@ emotes = {'bow':    ('You take a sweeping bow.',
                     '&nD%s pouts at you.')
          }
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Player(Creature):
     #
     # SPECIAL METHODS (i.e __method__() format)
@@ -96,7 +102,7 @@ class Player(Creature):
         self.mana = self.max_mana
         self.terse = False  # True -> show short description when entering room
         self.game.register_heartbeat(self)
-        self.versions[gametools.findGamePath(__file__)] = 2
+        self.versions[_GAME_PATH] = 2
         self.prev_location_id = None
         self.quest_list = [ # list of quests this player knows about, followed by completion status (True or False)
             ["Find the library", False],
@@ -136,18 +142,18 @@ class Player(Creature):
     
     def update_version(self):
         if hasattr(self, 'version_number'):
-            self.versions[gametools.findGamePath(__file__)] = 1
+            self.versions[_GAME_PATH] = 1
         
         super().update_version()
 
-        if self.versions[gametools.findGamePath(__file__)] == 1:
+        if self.versions[_GAME_PATH] == 1:
             self.password = "{\"F\":[1779033703,-1150833019,1013904242,-1521486534,1359893119,-1694144372,528734635,1541459225],\"A\":[1634952294],\"l\":32}"
-            self.versions[gametools.findGamePath(__file__)] = 2
-        if self.versions[gametools.findGamePath(__file__)] == 2:
+            self.versions[_GAME_PATH] = 2
+        if self.versions[_GAME_PATH] == 2:
             if hasattr(self, "wprivilages"):
                 self.wprivileges = self.wprivilages
                 del self.wprivilages
-            self.versions[gametools.findGamePath(__file__)] = 3
+            self.versions[_GAME_PATH] = 3
 
     #
     # INTERNAL USE METHODS (i.e. _method(), not imported)
@@ -164,14 +170,11 @@ class Player(Creature):
                 self.cons.write("Usernames must be a single word with no spaces.\n"
                                 "Please enter your username:")
                 return
-            self.names[0] = cmd.split()[0]  # strips any trailing whitespace
-            filename = gametools.realDir(gametools.PLAYER_DIR, self.names[0]) + '.OADplayer'
-            try:
-                f = open(filename, 'r+b')
-                f.close()  # success, player exists, so close file for now & check password
+            self.names = (cmd.split()[0],) + self.names[1:]  # strips any trailing whitespace
+            if self.game.player_directory.saved_exists(self.names[0]):
                 self.cons.write("Welcome back, %s!\nPlease enter your --#password: " % self.names[0])
                 self.login_state = 'AWAITING_PASSWORD'
-            except FileNotFoundError:
+            else:
                 self.cons.write("No player named "+self.names[0]+" found. "
                             "Would you like to create a new player? (yes/no)\n")
                 self.login_state = 'AWAITING_CREATE_CONFIRM'
@@ -189,72 +192,111 @@ class Player(Creature):
                 self.cons.write("Please answer yes or no: ")
                 return
         elif state == 'AWAITING_NEW_PASSWORD':
-            passwd = cmd
-            # XXX temporary fix for now
-            self.password = passwd
-            # TODO secure password authentication goes here
-            self.id = self._add_ID(self.names[0], remove_existing=True)
-            self.proper_name = self.names[0].capitalize()
-            self.log.info("Creating player id %s with default name %s" % (self.id, self.names[0]))
-            start_room = gametools.load_room(gametools.NEW_PLAYER_START_LOC)
-            start_room.insert(self)
-            self.perceive("\nWelcome to Firefile Sorcery School!\n\n"
-            "Type 'look' to examine your surroundings or an object, "
-            "'inventory' to see what you are carrying, " 
-            "'quit' to end the game, and 'help' for more information.")
-            self.login_state = None
+            # hash the password on the auth thread pool; _finish_new_player() continues
+            self.login_state = 'AWAITING_AUTH'
+            self.game.auth.hash_async(cmd, self._finish_new_player)
             return
         elif state == 'AWAITING_PASSWORD':
             passwd = cmd
-            # XXX temporary fix, need more security
-            # TODO more secure password authentication goes here
-            for oid in Thing.ID_dict:
-                if isinstance(Thing.ID_dict[oid], Player) and Thing.ID_dict[oid].names[0] == self.names[0] and passwd == Thing.ID_dict[oid].password:
-                    self.cons.write("A copy of %s is already in the game. Would you like to take over %s? (yes/no)" % (self.names[0], self.names[0]))
-                    self.login_state = 'AWAITING_RECONNECT_CONFIRM'
-                    return
+            online = self.game.player_directory.find_online(self.names[0])
             filename = gametools.realDir(gametools.PLAYER_DIR, self.names[0]) + '.OADplayer'
             try:
-                try:
-                    newuser = self.game.load_player(filename, self.cons, password=passwd)
-                    self.log.info("Loaded player id %s with default name %s" % (newuser.id, newuser.names[0]))
-                    newuser.login_state = None
-                    self.login_state = None
-                    self.game.deregister_heartbeat(self)
-                    del Thing.ID_dict[self.id]
-                    self.destroy()
-                except gametools.IncorrectPasswordError:
-                    self.cons.write("Your username or password is incorrect. Please try again.")
-                    self.login_state = "AWAITING_USERNAME"
+                player_file = player_loader.read_player_file(filename)
             except gametools.PlayerLoadError:
                 self.cons.write("Error loading data for player %s from file %s. \n"
                                 "Please try again.\nPlease enter your username: " % (self.names[0], filename))
                 self.login_state = "AWAITING_USERNAME"
+                return
+            # verify on the auth thread pool; _finish_login() continues
+            stored = online.password if online else player_file.password
+            self.login_state = 'AWAITING_AUTH'
+            self.game.auth.verify_async(passwd, stored, self._finish_login, passwd, player_file, online)
+            return
+        elif state == 'AWAITING_AUTH':
+            self.cons.write("Please wait, still checking your password...")
+            return
         elif state == 'AWAITING_RECONNECT_CONFIRM':
+            online = self.game.player_directory.find_online(self.names[0])
+            if online is None:
+                self.cons.write("%s is no longer in the game. Please enter your --#password again." % self.names[0])
+                self.login_state = "AWAITING_PASSWORD"
+                return
             if cmd == 'yes':
-                for oid in Thing.ID_dict:
-                    if isinstance(Thing.ID_dict[oid], Player) and Thing.ID_dict[oid].names[0] == self.names[0]:
-                        break
                 for websocket in connections_websock.conn_to_client:
                     if connections_websock.conn_to_client[websocket] == self.cons:
-                        connections_websock.conn_to_client[websocket] = Thing.ID_dict[oid].cons
-                        Thing.ID_dict[oid].cons.connection = websocket
+                        connections_websock.conn_to_client[websocket] = online.cons
+                        online.cons.connection = websocket
             elif cmd == 'no':
                 self.cons.write("Okay, please enter your username: ")
                 self.login_state = "AWAITING_USERNAME"
                 return
             elif cmd == 'restart':
                 self.cons.write("Erasing existing character and restarting from last save. Please enter your --#password again.")
-                for oid in Thing.ID_dict:
-                    if isinstance(Thing.ID_dict[oid], Player) and Thing.ID_dict[oid].names[0] == self.names[0]:
-                        break
-                self.game.deregister_heartbeat(Thing.ID_dict[oid])
-                del Thing.ID_dict[oid]
+                self.game.deregister_heartbeat(online)
+                del Thing.ID_dict[online.id]
+                self.game.player_directory.unregister_online(online)
                 self.login_state = "AWAITING_PASSWORD"
             else:
                 self.cons.write("Please answer yes or no: ")
                 return
     
+    def _finish_new_player(self, hashed):
+        """Continue creating a new player once the auth service has hashed the
+        chosen password (or failed to, if <hashed> is None)."""
+        if self.login_state != 'AWAITING_AUTH' or self.cons is None:
+            return  # player disconnected while the password was being hashed
+        if hashed is None:
+            self.cons.write("Sorry, something went wrong setting your password. Please create a --#password:")
+            self.login_state = 'AWAITING_NEW_PASSWORD'
+            return
+        self.password = hashed
+        self.id = self._add_ID(self.names[0], remove_existing=True)
+        self.proper_name = self.names[0].capitalize()
+        self.log.info("Creating player id %s with default name %s" % (self.id, self.names[0]))
+        self.game.player_directory.register_online(self)
+        start_room = gametools.load_room(gametools.NEW_PLAYER_START_LOC)
+        start_room.insert(self)
+        self.perceive("\nWelcome to Firefile Sorcery School!\n\n"
+        "Type 'look' to examine your surroundings or an object, "
+        "'inventory' to see what you are carrying, " 
+        "'quit' to end the game, and 'help' for more information.")
+        self.login_state = None
+
+    def _finish_login(self, passwd, player_file, online, verified):
+        """Continue logging in once the auth service has checked the password.
+        If the password was stored in an old (unhashed) format, re-hash it in
+        the background so the next save upgrades the player's file."""
+        if self.login_state != 'AWAITING_AUTH' or self.cons is None:
+            return  # player disconnected while the password was being checked
+        if not verified:
+            self.cons.write("Your username or password is incorrect. Please try again.")
+            self.login_state = "AWAITING_USERNAME"
+            return
+        if online:
+            self.cons.write("A copy of %s is already in the game. Would you like to take over %s? (yes/no)" % (self.names[0], self.names[0]))
+            self.login_state = 'AWAITING_RECONNECT_CONFIRM'
+            return
+        try:
+            newuser = self.game.load_player(player_file.filename, self.cons, player_file=player_file)
+        except gametools.PlayerLoadError:
+            self.cons.write("Error loading data for player %s from file %s. \n"
+                            "Please try again.\nPlease enter your username: " % (self.names[0], player_file.filename))
+            self.login_state = "AWAITING_USERNAME"
+            return
+        self.log.info("Loaded player id %s with default name %s" % (newuser.id, newuser.names[0]))
+        newuser.login_state = None
+        self.login_state = None
+        self.game.deregister_heartbeat(self)
+        del Thing.ID_dict[self.id]
+        self.destroy()
+        if auth.needs_upgrade(newuser.password):
+            self.game.auth.hash_async(passwd, newuser._upgrade_password)
+
+    def _upgrade_password(self, hashed):
+        if hashed:
+            self.password = hashed
+            self.log.info("Upgraded stored password for player %s" % self.names[0])
+
     def _schedule_interactive_tutorial(self, act):
         if self.prev_location_id != self.location.id:
             if self.location.id in self.tutorial_messages:    # list of rooms with interactive tutorial messages
@@ -357,6 +399,7 @@ class Player(Creature):
         if not nocons:
             self.cons.detach(self)
         self.cons = None
+        self.game.player_directory.unregister_online(self)
         self.destroy()
         
     def heartbeat(self):
@@ -722,6 +765,7 @@ class Player(Creature):
         else:
             alive = []
         mod = importlib.reload(obj.mod)
+        prototypes.registry.invalidate(obj.path)
         try:
             if isinstance(obj, Room):
                 if obj.params:
@@ -735,6 +779,9 @@ class Player(Creature):
                 c.move_to(obj)
             return True
         if isinstance(obj, Room):
+            newobj.mod = mod
+            newobj.params = obj.params
+            gametools.room_built(newobj, newobj.id)
             for c in alive: 
                 c.move_to(newobj, force_move = True)
         else:
@@ -751,6 +798,20 @@ class Player(Creature):
         obj.destroy()
         return True
 
+    def lifetimes(self, p, cons, oDO, oIDO):
+        '''Show the paths with the most live objects, and any destroyed objects still in memory.'''
+        if cons.user != self:
+            return "I don't quite get what you mean."
+        if not self.game.is_wizard(self.name()):
+            return "You cannot yet perform this magical incantation correctly."
+        if len(p.words) > 2 or (len(p.words) == 2 and not p.words[1].isnumeric()):
+            return "Usage: 'lifetimes [N]', to list the N paths with the most live objects (default 10)."
+        if not lifetime.tracker:
+            return "Object lifetimes aren't being tracked; start the game with --track-objects to track them."
+        n = int(p.words[1]) if len(p.words) == 2 else 10
+        cons.write("```\n%s\n```" % lifetime.tracker.report(n))
+        return True
+
     def apparate(self, p, cons, oDO, oIDO):
         """Teleport the wizard to a given room, specified by id or path."""
         if cons.user != self:
@@ -808,7 +869,7 @@ class Player(Creature):
                 if role_exists:  # argument is <group>
                     cons.write(cons.game.list_wizard_roles(role=words[1]))
                 player = self.name() if words[1] == 'me' else words[1]
-                player_exists = gametools.check_player_exists(player)
+                player_exists = cons.game.player_directory.saved_exists(player)
                 if player_exists:  # argument is <player> 
                     cons.write(cons.game.list_wizard_roles(wiz=player))
                 if not player_exists and not role_exists:
@@ -817,7 +878,7 @@ class Player(Creature):
             if len(words) == 3:
                 action, player, group = "toggle", words[1], words[2]
         player = self.name() if player == 'me' else player
-        if not gametools.check_player_exists(player):
+        if not cons.game.player_directory.saved_exists(player):
             cons.write("Error: no player named %s appears to exist!" % player)
             return True
         if not group in cons.game.roles and action != "create":
@@ -947,6 +1008,7 @@ class Player(Creature):
     actions['debug'] =      Action(debug, True, True)
     actions['apparate'] =   Action(apparate, True, True)
     actions['reload'] =     Action(reload_room, True, True)
+    actions['lifetimes'] =  Action(lifetimes, True, True)
     actions['groups'] =      Action(groups, True, True)
     # player actions
     actions['inventory'] =  Action(inventory, False, True)
@@ -0,0 +1,57 @@
+import os
+
+import gametools
+
+class PlayerDirectory():
+    """An in-memory index of players, so that logging in doesn't need to
+    search Thing.ID_dict or touch the filesystem.
+
+    `online` maps each player name to the Player object currently in the
+    game, and is maintained as players log in and out. `saved` is the set of
+    player names that have a save file; it is rebuilt from a single scan of
+    the player directory whenever the directory's modification time changes
+    (see refresh(), which the game calls periodically from its heartbeat)."""
+    def __init__(self, player_dir):
+        self.player_dir = player_dir  # real filesystem path, not game filesystem
+        self.online = {}
+        self.saved = set()
+        self._dir_mtime = None
+        self.log = gametools.get_game_logger("_player_directory")
+        self.refresh()
+
+    def refresh(self, force=False):
+        """Rescan the player directory if it has changed since the last scan
+        (or if <force> is True). Returns True if the directory was rescanned."""
+        try:
+            mtime = os.stat(self.player_dir).st_mtime_ns
+        except FileNotFoundError:
+            self.log.error("Player directory %s doesn't exist!" % self.player_dir)
+            self.saved = set()
+            return False
+        if mtime == self._dir_mtime and not force:
+            return False
+        self._dir_mtime = mtime
+        self.saved = {name[:-len('.OADplayer')] for name in os.listdir(self.player_dir) if name.endswith('.OADplayer')}
+        return True
+
+    def saved_exists(self, name):
+        """Return whether player <name> has a save file."""
+        return name in self.saved
+
+    def add_saved(self, name):
+        """Record that a save file now exists for player <name>."""
+        self.saved.add(name)
+
+    def find_online(self, name):
+        """Return the Player named <name> who is currently in the game, or None."""
+        return self.online.get(name)
+
+    def register_online(self, player):
+        """Record that <player> has logged in (or been loaded) under its name."""
+        self.online[player.names[0]] = player
+
+    def unregister_online(self, player):
+        """Record that <player> has left the game. Does nothing if a different
+        Player object is now registered under the same name."""
+        if self.online.get(player.names[0]) is player:
+            del self.online[player.names[0]]
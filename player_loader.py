@@ -0,0 +1,410 @@
+import os
+import json
+import importlib
+import importlib.util
+from collections import namedtuple
+
+import gametools
+import creature
+from thing import Thing
+
+#
+# SAVE FILE CONVENTIONS
+#   A player save file is a JSON list of "saveables" (see Thing.get_saveable()).
+#   The first saveable is always the player. Objects refer to each other by the
+#   ID strings they had when saved: `location` and `contents` describe the
+#   containment tree, and the attributes in EQUIPMENT_ATTRS point at weapons
+#   and armor owned by a creature. Older save files tag every ID with
+#   LEGACY_ID_TAG plus a random number; the tag is stripped on load.
+#
+EQUIPMENT_ATTRS = ('default_weapon', 'default_armor', 'weapon_wielding', 'armor_worn')
+OWNED_ATTRS = ('default_weapon', 'default_armor')  # objects that exist only as equipment, not in contents
+FALLBACK_ATTRS = {'weapon_wielding': 'default_weapon', 'armor_worn': 'default_armor'}
+LEGACY_ID_TAG = '-saveplayer'
+
+# A single problem found while validating or loading a save file.
+#   severity: 'error' if an object had to be dropped, 'warning' if it was repaired
+#   kind:     short machine-readable category, e.g. 'dangling-reference'
+Diagnostic = namedtuple('Diagnostic', ['severity', 'kind', 'obj_id', 'attr', 'ref', 'message'])
+
+_module_exists_cache = {}
+
+def module_exists(path):
+    """Return True if the python module <path> (e.g. 'domains.school.scroll')
+    can be found. Results are cached, since the same few module paths show up
+    in almost every save file."""
+    try:
+        return _module_exists_cache[path]
+    except KeyError:
+        pass
+    try:
+        found = importlib.util.find_spec(path) is not None
+    except (ImportError, ValueError, AttributeError):
+        found = False
+    _module_exists_cache[path] = found
+    return found
+
+_module_has_clone_cache = {}
+
+def module_has_clone(path):
+    """Return True if <path> names a module with a clone() function, i.e. one
+    that gametools.clone() (and so Thing.get_saveable()) can rebuild objects
+    from. Objects created inline by a room's load() function don't have one."""
+    try:
+        return _module_has_clone_cache[path]
+    except KeyError:
+        pass
+    try:
+        found = bool(path) and module_exists(path) and hasattr(importlib.import_module(path), 'clone')
+    except Exception:
+        found = False
+    _module_has_clone_cache[path] = found
+    return found
+
+def strip_legacy_tag(saved_id):
+    """Return <saved_id> without the '-saveplayer123456' tag older versions of
+    Game.save_player() appended to every ID."""
+    return saved_id.partition(LEGACY_ID_TAG)[0]
+
+
+class PlayerFile():
+    """The parsed contents of a player save file. Nothing is cloned or added
+    to Thing.ID_dict until build() is called, so a PlayerFile can be read and
+    checked (e.g. for the password) cheaply."""
+    def __init__(self, filename, saveables):
+        self.filename = filename
+        self.saveables = saveables
+        self.by_id = {}
+        self.duplicate_ids = []
+        for x in saveables:
+            if x.get('id') in self.by_id:
+                self.duplicate_ids.append(x.get('id'))
+            else:
+                self.by_id[x.get('id')] = x
+        self.root = saveables[0]
+
+    @property
+    def password(self):
+        return self.root.get('password')
+
+    @property
+    def player_name(self):
+        names = self.root.get('names')
+        return names[0] if names else None
+
+    def _children(self, x):
+        """Return the saved IDs of everything owned by saveable <x>: its
+        contents followed by any default weapon or armor."""
+        children = list(x.get('contents') or [])
+        for attr in OWNED_ATTRS:
+            ref = x.get(attr)
+            if isinstance(ref, str) and ref not in children:
+                children.append(ref)
+        return children
+
+    def ordered(self, diagnostics=None):
+        """Return the saveables in topological order: every object comes after
+        the object that contains (or owns) it, starting with the player.
+        Saveables that cannot be reached from the player are left out, and
+        reported in <diagnostics> if a list is given."""
+        order = [self.root]
+        seen = {self.root.get('id')}
+        for x in order:  # order grows as we go, giving a breadth-first walk
+            for ref in self._children(x):
+                if ref in seen or ref not in self.by_id:
+                    continue
+                seen.add(ref)
+                order.append(self.by_id[ref])
+        if diagnostics is not None:
+            for x in self.saveables:
+                if x.get('id') not in seen:
+                    diagnostics.append(Diagnostic('error', 'unreachable', x.get('id'), None, None,
+                        "object %s is not carried by the player or anything the player carries" % x.get('id')))
+        return order
+
+    def check(self):
+        """Validate the object graph in this file without building any objects.
+        Returns a list of Diagnostics, which is empty if the file is sound."""
+        diagnostics = []
+        for dup in self.duplicate_ids:
+            diagnostics.append(Diagnostic('error', 'duplicate-id', dup, None, None,
+                "more than one object saved with id %s" % dup))
+        for x in self.ordered(diagnostics):
+            oid = x.get('id')
+            path = x.get('path')
+            if not path or not module_exists(path):
+                diagnostics.append(Diagnostic('error', 'missing-module', oid, 'path', path,
+                    "object %s refers to module '%s', which doesn't exist" % (oid, path)))
+            for ref in x.get('contents') or []:
+                if ref not in self.by_id:
+                    diagnostics.append(Diagnostic('warning', 'dangling-reference', oid, 'contents', ref,
+                        "%s contains %s, which was not saved" % (oid, ref)))
+                elif self.by_id[ref].get('location') != oid:
+                    diagnostics.append(Diagnostic('warning', 'inconsistent-containment', ref, 'location', self.by_id[ref].get('location'),
+                        "%s is in the contents of %s but its location is %s" % (ref, oid, self.by_id[ref].get('location'))))
+            for attr in EQUIPMENT_ATTRS:
+                ref = x.get(attr)
+                if isinstance(ref, str) and ref not in self.by_id:
+                    diagnostics.append(Diagnostic('warning', 'dangling-reference', oid, attr, ref,
+                        "%s.%s refers to %s, which was not saved" % (oid, attr, ref)))
+        return diagnostics
+
+
+def read_player_file(filename):
+    """Read and parse a player save file, returning a PlayerFile. Raises
+    gametools.PlayerLoadError if the file is missing, corrupt, or empty."""
+    try:
+        with open(filename, 'r') as f:
+            saveables = json.load(f)
+    except FileNotFoundError:
+        raise gametools.PlayerLoadError("couldn't find file named %s" % filename)
+    except (ValueError, UnicodeDecodeError):
+        raise gametools.PlayerLoadError("file %s appears to be corrupt" % filename)
+    if not isinstance(saveables, list) or not saveables or not all(isinstance(x, dict) for x in saveables):
+        raise gametools.PlayerLoadError("file %s doesn't contain a list of saved objects" % filename)
+    return PlayerFile(filename, saveables)
+
+def validate_player_files(directory):
+    """Bulk-load mode: read and check every save file in <directory> (a real
+    filesystem path, e.g. gametools.realDir(gametools.PLAYER_DIR)). Returns a
+    dictionary mapping each player filename to its list of Diagnostics; files
+    that can't be parsed at all get a single 'unreadable' Diagnostic."""
+    results = {}
+    try:
+        entries = sorted(e.name for e in os.scandir(directory) if e.is_file() and e.name.endswith('.OADplayer'))
+    except FileNotFoundError:
+        return results
+    for name in entries:
+        try:
+            results[name] = read_player_file(os.path.join(directory, name)).check()
+        except gametools.PlayerLoadError as e:
+            results[name] = [Diagnostic('error', 'unreadable', None, None, None, str(e))]
+    return results
+
+
+class ObjectGraphLoader():
+    """Build live objects from a topologically ordered list of saveables in a
+    single pass. Saved IDs are never put into Thing.ID_dict; instead each new
+    object gets a fresh ID and the loader keeps a remap table from saved ID to
+    object, which is used to resolve location, contents and equipment.
+
+    Problems are collected in self.diagnostics rather than raised, and objects
+    that can't be built or linked are destroyed instead of being left half-
+    attached to the player."""
+    def __init__(self, log=None):
+        self.log = log if log else gametools.get_game_logger("_player_loader")
+        self.remap = {}        # saved ID -> new object (or None if it failed to build)
+        self.diagnostics = []
+        self.root = None
+        self._pending = []     # (obj, attr, saved ID) for equipment saved after its owner
+
+    def _add_diagnostic(self, severity, kind, obj_id, attr, ref, message):
+        self.diagnostics.append(Diagnostic(severity, kind, obj_id, attr, ref, message))
+
+    def _create(self, x):
+        """Clone a default object from saveable <x>, overwrite its state with
+        the saved attributes (other than IDs and references) and give it a
+        fresh ID based on its saved one."""
+        saved_id = x.get('id')
+        obj = gametools.clone(x.get('path')) if x.get('path') else None
+        if obj is None:
+            self._add_diagnostic('error', 'missing-module', saved_id, 'path', x.get('path'),
+                "couldn't clone object %s from module '%s'" % (saved_id, x.get('path')))
+            return None
+        state = {attr: x[attr] for attr in x if attr not in ('id', 'location', 'contents') and attr not in EQUIPMENT_ATTRS}
+        try:
+            obj.update_obj(state)
+        except Exception:
+            self.log.exception("Error restoring saved state of object %s!" % saved_id)
+            self._add_diagnostic('error', 'bad-state', saved_id, None, None,
+                "couldn't restore saved state of object %s" % saved_id)
+            obj.destroy()
+            return None
+        obj._add_ID(strip_legacy_tag(saved_id) if saved_id else obj.id, remove_existing=True)
+        return obj
+
+    def _link_location(self, obj, x):
+        """Insert <obj> into the contents of its (already built) container.
+        Returns False if the object can't be placed and should be dropped."""
+        saved_id = x.get('id')
+        loc = x.get('location')
+        if not isinstance(loc, str) or loc not in self.remap:
+            # not inside another saved object: either the root, whose location
+            # is a room path resolved by the caller, or equipment with no location
+            obj.location = loc if x is self._root_saveable else None
+            return True
+        parent = self.remap[loc]
+        if parent is None:
+            self._add_diagnostic('error', 'broken-container', saved_id, 'location', loc,
+                "object %s was inside %s, which couldn't be loaded" % (saved_id, loc))
+            return False
+        if parent.contents is None or saved_id not in self._saved_contents.get(loc, ()):
+            if saved_id in self._owned_by.get(loc, ()):
+                obj.location = None  # equipment, not carried in contents
+                return True
+            self._add_diagnostic('warning', 'inconsistent-containment', saved_id, 'location', loc,
+                "object %s claims to be in %s, which doesn't list it in its contents" % (saved_id, loc))
+            return False
+        parent.contents.append(obj)
+        obj.location = parent
+        return True
+
+    def _set_equipment(self, obj, attr, ref):
+        target = self.remap.get(ref)
+        old = getattr(obj, attr, None)
+        setattr(obj, attr, target)
+        if attr in OWNED_ATTRS and isinstance(old, Thing) and old is not target and not creature.is_shared_equipment(old):
+            # clone() gave this creature its own default weapon/armor; the saved one replaces it
+            old.destroy()
+
+    def build(self, ordered_saveables, root=None):
+        """Create and link every object in <ordered_saveables> (which must be
+        ordered as by PlayerFile.ordered()). Returns the list of objects that
+        were successfully loaded, the root object (e.g. the player) first.
+
+        If <root> is given it is an existing object (e.g. a freshly loaded
+        room) that stands in for the first saveable: it isn't cloned or
+        changed, and the saved objects are added to whatever it already
+        contains."""
+        loaded = []
+        if not ordered_saveables:
+            return loaded
+        self._root_saveable = ordered_saveables[0]
+        self._saved_contents = {}
+        self._owned_by = {}
+        for x in ordered_saveables:
+            saved_id = x.get('id')
+            if saved_id in self.remap:
+                continue  # duplicate ID, already reported by PlayerFile.check()
+            if root is not None and x is self._root_saveable:
+                obj = root
+            elif x.get('path') in creature.SHARED_DEFAULT_PATHS:
+                # older files saved a copy of the default weapon/armor for each creature
+                self.remap[saved_id] = creature.shared_default(x['path'])
+                continue
+            else:
+                obj = self._create(x)
+                if obj is not None and not self._link_location(obj, x):
+                    obj.destroy()
+                    obj = None
+            self.remap[saved_id] = obj
+            if obj is None:
+                continue
+            if x.get('contents') is not None and obj.contents is not None:
+                if obj is not root:
+                    obj.contents = []  # children append themselves as they are built
+                self._saved_contents[saved_id] = set(x['contents'])
+            self._owned_by[saved_id] = {x[a] for a in OWNED_ATTRS if isinstance(x.get(a), str)}
+            for attr in EQUIPMENT_ATTRS:
+                ref = x.get(attr)
+                if not isinstance(ref, str):
+                    continue
+                if ref in self.remap and self.remap[ref] is not None:
+                    self._set_equipment(obj, attr, ref)
+                else:
+                    self._pending.append((obj, attr, ref))
+            loaded.append(obj)
+        # resolve forward references to equipment saved after its owner
+        for obj, attr, ref in self._pending:
+            if self.remap.get(ref) is not None:
+                self._set_equipment(obj, attr, ref)
+            elif attr in FALLBACK_ATTRS:
+                self._add_diagnostic('warning', 'dangling-reference', obj.id, attr, ref,
+                    "%s.%s referred to %s, which couldn't be loaded; using %s instead" % (obj.id, attr, ref, FALLBACK_ATTRS[attr]))
+                setattr(obj, attr, getattr(obj, FALLBACK_ATTRS[attr]))
+            else:
+                self._add_diagnostic('warning', 'dangling-reference', obj.id, attr, ref,
+                    "%s.%s referred to %s, which couldn't be loaded; keeping the default" % (obj.id, attr, ref))
+        self.root = self.remap.get(self._root_saveable.get('id'))
+        return loaded
+
+    def report(self, filename):
+        """Log any diagnostics collected while loading <filename>."""
+        for d in self.diagnostics:
+            if d.severity == 'error':
+                self.log.error("Loading %s: %s" % (filename, d.message))
+            else:
+                self.log.warning("Loading %s: %s" % (filename, d.message))
+
+
+#
+# SAVING
+#   Saving happens in two steps, so that the slow part can run elsewhere:
+#   snapshot_objects() walks the objects to save on the game thread and
+#   returns plain data (no object references, nothing in the game is
+#   modified), and write_player_file() serializes and writes that data. The
+#   latter is a top-level function so it can be sent to worker processes.
+#
+_PLAIN_SCALARS = (str, int, float, bool, type(None))
+
+def is_plain(value):
+    """Return True if <value> is built only from JSON types. Cheaper than a
+    trial json.dumps(), and also keeps game objects out of snapshots that
+    will be pickled to another process."""
+    if isinstance(value, _PLAIN_SCALARS):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(is_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and is_plain(v) for k, v in value.items())
+    return False
+
+def _ref_id(ref):
+    return ref.id if isinstance(ref, Thing) else ref
+
+def snapshot_objects(roots, log=None, include=None):
+    """Return a list of saveables for the objects in <roots> and everything
+    they contain or own, in the save file format described above, parents
+    before children. Object references are written as the objects' current
+    IDs and attributes that can't be saved as JSON are dropped. If <include>
+    is given, objects for which include(obj) is false are left out, along
+    with everything inside them."""
+    log = log if log else gametools.get_game_logger("_player_loader")
+    saveables = []
+    seen = set()
+    objs = list(roots)
+    for obj in objs:  # objs grows as we go, giving a breadth-first walk
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            x = obj.get_saveable()
+        except Exception:
+            log.exception('Error getting saveable for %s; leaving it out of the save file.' % obj)
+            continue
+        x['id'] = obj.id
+        if 'location' in x:
+            x['location'] = _ref_id(x['location'])
+        if obj.contents is not None:
+            children = [c for c in obj.contents if include is None or include(c)]
+            x['contents'] = [c.id for c in children]
+            objs += children
+        for attr in EQUIPMENT_ATTRS:
+            ref = getattr(obj, attr, None)
+            if creature.is_shared_equipment(ref):
+                x.pop(attr, None)  # every creature gets it back when cloned
+            elif isinstance(ref, Thing):
+                x[attr] = ref.id
+                if attr in OWNED_ATTRS:
+                    objs.append(ref)
+        for attr in [a for a in x if not is_plain(x[a])]:
+            log.debug('Not saving %s.%s, which is not JSON-serializable' % (obj.id, attr))
+            del x[attr]
+        saveables.append(x)
+    return saveables
+
+def snapshot_player(player, log=None):
+    """Return a list of saveables for <player> and everything it carries."""
+    return snapshot_objects([player], log)
+
+def write_player_file(filename, saveables):
+    """Serialize <saveables> and write them to <filename>, replacing any
+    existing file only once the new one is completely written. Returns the
+    filename written."""
+    if not filename.endswith('.OADplayer'):
+        filename += '.OADplayer'
+    tmpname = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmpname, 'w') as f:
+        f.write(json.dumps(saveables, skipkeys=True, sort_keys=True, indent=4))
+    os.replace(tmpname, filename)
+    return filename
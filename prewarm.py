@@ -0,0 +1,155 @@
+import os
+import time
+import inspect
+import importlib
+import py_compile
+import concurrent.futures
+from concurrent.futures import ProcessPoolExecutor
+
+import gametools
+from walking_os import findAllPythonFiles
+
+#
+# WORLD PRE-WARMING
+#   Normally each room and object module is imported the first time a player
+#   walks into the room or an object is cloned from it, so the first visitors
+#   to an area wait while the module is compiled and imported on the game's
+#   event loop. With the --prewarm startup flag, Prewarmer does all of that
+#   before the game starts listening for connections: every module under
+#   domains/ is byte-compiled by a pool of worker processes (writing the usual
+#   __pycache__ files), then imported, and every room whose load() takes no
+#   parameters is loaded. Procedurally generated rooms, which need parameters,
+#   are only imported.
+#
+PREWARM_WORKERS = os.cpu_count() or 2
+REPORT_SLOWEST = 15  # modules listed individually in the report
+
+def _compile(filename):
+    """Byte-compile <filename>, in a worker process. Returns an error message,
+    or None on success."""
+    try:
+        py_compile.compile(filename, doraise=True)
+    except py_compile.PyCompileError as e:
+        return "%s: %s" % (e.exc_type_name, e.exc_value)
+    except OSError as e:
+        return str(e)
+    return None
+
+def takes_no_params(func):
+    """Return True if <func> can be called with no arguments, e.g. a room's load()."""
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return all(p.default is not p.empty or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD) for p in params)
+
+
+class ModuleTiming():
+    """How long one module took to compile, import and (for rooms) load."""
+    def __init__(self, path):
+        self.path = path
+        self.import_time = 0.0
+        self.load_time = 0.0
+        self.is_room = False
+        self.error = None
+
+    def total(self):
+        return self.import_time + self.load_time
+
+
+class Prewarmer():
+    """Compile, import and load every module under domains/. See run()."""
+    def __init__(self, max_workers=PREWARM_WORKERS):
+        self.max_workers = max_workers
+        self.timings = {}  # module path -> ModuleTiming
+        self.compile_time = 0.0
+        self.log = gametools.get_game_logger("_prewarm", printing=True)
+
+    def discover(self):
+        """Return the module paths (e.g. 'domains.school.scroll') of every
+        python file under domains/, except packages' __init__ files."""
+        paths = []
+        for filepath in findAllPythonFiles():
+            path = filepath[:-len('.py')]
+            if not path.endswith('__init__'):
+                paths.append(path)
+        return sorted(paths)
+
+    def _filename(self, path):
+        return os.path.join(gametools.gameroot, *path.split('.')) + '.py'
+
+    def compile_all(self, paths):
+        """Byte-compile the modules at <paths> in parallel worker processes,
+        recording any that fail to compile."""
+        start = time.time()
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(_compile, self._filename(path)): path for path in paths}
+                for f in concurrent.futures.as_completed(futures):
+                    error = f.result()
+                    if error:
+                        self.timings[futures[f]].error = error
+        except (OSError, NotImplementedError):
+            self.log.exception('Could not start compile worker processes; modules will be compiled as they are imported.')
+        self.compile_time = time.time() - start
+
+    def load(self, path):
+        """Import the module at <path> and, if it is a room that needs no
+        parameters, load the room. Records how long each step took."""
+        timing = self.timings[path]
+        start = time.time()
+        try:
+            mod = importlib.import_module(path)
+        except Exception as e:
+            timing.error = '%s: %s' % (type(e).__name__, e)
+            return
+        finally:
+            timing.import_time = time.time() - start
+        load_func = getattr(mod, 'load', None)
+        if not callable(load_func) or not takes_no_params(load_func):
+            return
+        timing.is_room = True
+        start = time.time()
+        try:
+            room = gametools.load_room(path)
+        except Exception as e:
+            timing.error = '%s: %s' % (type(e).__name__, e)
+        else:
+            if room is None:
+                timing.error = 'load() failed'
+        timing.load_time = time.time() - start
+
+    def run(self):
+        """Compile, import and load every module under domains/, then log a
+        report. Returns the report."""
+        start = time.time()
+        paths = self.discover()
+        self.timings = {path: ModuleTiming(path) for path in paths}
+        self.compile_all(paths)
+        for path in paths:
+            if not self.timings[path].error:
+                self.load(path)
+        self.elapsed = time.time() - start
+        report = self.report()
+        self.log.info(report)
+        return report
+
+    def report(self, n=REPORT_SLOWEST):
+        """Return a printable breakdown of the time spent on each module:
+        totals, the <n> slowest modules, and any modules that failed."""
+        timings = list(self.timings.values())
+        rooms = [t for t in timings if t.is_room and not t.error]
+        failed = [t for t in timings if t.error]
+        lines = ["Pre-warmed %d modules (%d rooms loaded) in %.2f seconds; %d failed." %
+                 (len(timings) - len(failed), len(rooms), self.elapsed, len(failed)),
+                 "  compiling (%d workers): %.2f s" % (self.max_workers, self.compile_time),
+                 "  importing: %.2f s" % sum(t.import_time for t in timings),
+                 "  loading rooms: %.2f s" % sum(t.load_time for t in timings),
+                 "Slowest %d modules (import + load):" % n]
+        for t in sorted(timings, key=lambda t: -t.total())[:n]:
+            lines.append("%8.1f ms  %8.1f ms  %s" % (t.import_time * 1000, t.load_time * 1000, t.path))
+        if failed:
+            lines.append("Failed modules:")
+            for t in sorted(failed, key=lambda t: t.path):
+                lines.append("  %s: %s" % (t.path, t.error))
+        return '\n'.join(lines)
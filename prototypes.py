@@ -0,0 +1,182 @@
+import types
+import importlib
+
+import gametools
+import lifetime
+import thing
+
+#
+# PROTOTYPES
+#   A module whose clone() always builds the same single object can opt in
+#   by setting PROTOTYPE = True at module level. The first time such a module
+#   is cloned, clone() is called as usual and the registry records the new
+#   object's state as the module's template. If the template holds only
+#   plain data -- strings, numbers, plain functions (as in the Action tuples
+#   of an `actions` dict), and lists, sets, tuples and dicts of those -- the
+#   module's objects are created from then on by copying the template's
+#   state and allocating a fresh ID, without running clone() or the
+#   __init__ chain at all.
+#
+#   Don't opt in a module whose clone() draws random numbers or depends on
+#   anything but its own code: every object would be a copy of the first.
+#   An opted-in module whose first object holds references to other objects
+#   or bound methods, has a location, contents or a heartbeat, or whose
+#   clone() creates other objects too, is logged and goes on using clone().
+#   Clones with parameters always call clone().
+#
+PROTOTYPE_ATTR = 'PROTOTYPE'
+_UNCOPIED_ATTRS = ('id', 'log', 'mod')  # set fresh on every new object
+_PLAIN_SCALARS = (str, int, float, bool, type(None))
+_MUTABLE = (list, dict, set)
+
+def _is_plain(value):
+    if isinstance(value, _PLAIN_SCALARS) or type(value) is types.FunctionType:
+        return True
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(_is_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(_is_plain(k) and _is_plain(v) for k, v in value.items())
+    return False
+
+def _copy_plain(value):
+    """Copy a plain-data <value> (see _is_plain()) deeply enough that the copy
+    shares no mutable containers with the original."""
+    if isinstance(value, list):
+        return [_copy_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _copy_plain(v) for k, v in value.items()}
+    if isinstance(value, set):
+        return set(value)  # elements of a plain set are immutable
+    if isinstance(value, tuple) and any(isinstance(v, _MUTABLE) for v in value):
+        copied = [_copy_plain(v) for v in value]
+        return value._make(copied) if hasattr(value, '_make') else tuple(copied)  # keep namedtuples
+    return value
+
+
+class Prototype():
+    """The template for objects cloned from one module. `state` is a copy of
+    the template object's state (see Thing._get_state()) and must be treated
+    as read-only; the template itself stays in the game as an ordinary
+    object."""
+    def __init__(self, mod, template):
+        self.mod = mod
+        self.clone_func = mod.clone
+        self.cls = type(template)
+        self.pref_id = template.id
+        self.state = {attr: _copy_plain(value) for attr, value in template._get_state().items()}
+        self.desc = template._desc  # the interned Description, shared by every new object
+        self.shared = {}         # immutable __dict__ attributes, shared by every new object
+        self.shared_slots = []   # (slot, value) for immutable slotted attributes
+        self.copied = []         # (attr, value) for attributes that need copying
+        for attr, value in self.state.items():
+            if attr in _UNCOPIED_ATTRS or attr in thing.DESCRIPTION_ATTRS:
+                continue
+            if isinstance(value, _MUTABLE) or \
+               (isinstance(value, tuple) and any(isinstance(v, _MUTABLE) for v in value)):
+                self.copied.append((attr, value))
+            elif attr in self.cls.STATE_SLOTS:
+                self.shared_slots.append((self.cls.STATE_SLOTS[attr], value))
+            else:
+                self.shared[attr] = value
+
+    def instantiate(self):
+        obj = self.cls.__new__(self.cls)
+        if self.shared:  # else leave the __dict__ unallocated (see Thing.__slots__)
+            obj.__dict__.update(self.shared)
+        obj._desc = self.desc
+        for slot, value in self.shared_slots:
+            setattr(obj, slot, value)
+        obj._set_state({attr: _copy_plain(value) for attr, value in self.copied})
+        obj._add_ID(self.pref_id)
+        obj.log = gametools.get_game_logger(obj)
+        obj.mod = self.mod
+        if lifetime.tracker:
+            lifetime.tracker.track(obj)
+        return obj
+
+
+class PrototypeRegistry():
+    """Create objects by module path, from cached prototypes where possible.
+    Keyed by module path (e.g. 'domains.school.scroll')."""
+    def __init__(self):
+        self.modules = {}     # module path -> module
+        self.prototypes = {}  # module path -> Prototype, or None if an opted-in module can't have one
+
+    def module(self, path):
+        """Return the module at <path>, importing it the first time. Raises
+        ImportError if it can't be imported."""
+        try:
+            return self.modules[path]
+        except KeyError:
+            mod = self.modules[path] = importlib.import_module(path)
+            return mod
+
+    def _make_prototype(self, path, mod, template, created):
+        """Return a Prototype for module <mod> made from <template>, the
+        object its clone() just returned after creating <created> objects
+        in all, or None if the template isn't eligible."""
+        game = thing.Thing.game
+        if template is None or created != 1 or template.location is not None or template.contents or \
+           (game and template in game.heartbeat_users):
+            problem = 'its clone() makes other objects, or a heartbeat, or a located or non-empty object'
+        elif not all(_is_plain(v) for k, v in template._get_state().items() if k not in _UNCOPIED_ATTRS):
+            problem = 'its objects hold more than plain data'
+        else:
+            return Prototype(mod, template)
+        gametools.get_game_logger("_prototypes").warning('Module %s sets %s, but %s; using clone()' % (path, PROTOTYPE_ATTR, problem))
+        return None
+
+    def _prototype(self, path):
+        """Return the Prototype for <path>, or None if clone() must be used
+        (perhaps because the prototype hasn't been made yet)."""
+        proto = self.prototypes.get(path)
+        if proto is not None and proto.clone_func is not getattr(self.module(path), 'clone', None):
+            self.invalidate(path)  # module was reloaded since the template was made
+            return None
+        return proto
+
+    def _clone(self, path, mod):
+        """Call mod.clone(). The first time a module that opted in is
+        cloned, make its Prototype from the new object."""
+        if path in self.prototypes or not getattr(mod, PROTOTYPE_ATTR, False):
+            return mod.clone()
+        count = len(thing.Thing.ID_dict)
+        obj = mod.clone()
+        self.prototypes[path] = self._make_prototype(path, mod, obj, len(thing.Thing.ID_dict) - count)
+        return obj
+
+    def clone(self, path, params=None):
+        """Create an object from the module at <path>, as that module's
+        clone() would. Raises ImportError if the module can't be imported
+        and AttributeError if it has no clone()."""
+        if params:
+            mod = self.module(path)
+            obj = mod.clone(params)
+        else:
+            proto = self._prototype(path)
+            mod = self.module(path)
+            obj = proto.instantiate() if proto else self._clone(path, mod)
+        if obj is not None:
+            obj.mod = mod
+        return obj
+
+    def default_state(self, path):
+        """Return the (read-only) state of a freshly cloned object from <path>,
+        or None if the module doesn't have a prototype (yet)."""
+        try:
+            proto = self._prototype(path)
+        except Exception:
+            return None
+        return proto.state if proto else None
+
+    def invalidate(self, path=None):
+        """Forget the cached module and prototype for <path>, or for every
+        module if <path> is None. Call after reloading a module."""
+        if path is None:
+            self.modules.clear()
+            self.prototypes.clear()
+        else:
+            self.modules.pop(path, None)
+            self.prototypes.pop(path, None)
+
+registry = PrototypeRegistry()
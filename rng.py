@@ -0,0 +1,58 @@
+import random
+import hashlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from terrain import splitmix64
+
+#
+# RANDOM NUMBER STREAMS
+#   Procedural generators (room factories, corridor carvers, terrain tiles)
+#   need randomness that is the same every time for the same place, while
+#   gameplay (combat, NPC behaviour, IDs, spells) needs randomness that isn't
+#   predictable. Generators must never call random.seed(), which would reset
+#   the random module that gameplay uses. Instead they ask for a stream keyed
+#   by a domain name and coordinates:
+#
+#       rand = rng.stream('domains.centrata.prairie', x, y)
+#       rand.choice(details)
+#
+#   Each call returns a new, independent generator, so a stream can be used
+#   from a worker thread without locking. Streams for the same key are always
+#   identical, for a given WORLD_SEED. Gameplay keeps using the random module,
+#   which is seeded from the OS and never reseeded.
+#
+WORLD_SEED = 0  # change (before any stream is created) to generate a different world
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_domain_seeds = {}
+
+def domain_seed(domain):
+    """Return the 64-bit seed for <domain> (any string, usually a module path)."""
+    try:
+        return _domain_seeds[domain]
+    except KeyError:
+        digest = hashlib.blake2b(domain.encode('utf-8'), digest_size=8).digest()
+        seed = _domain_seeds[domain] = splitmix64(int.from_bytes(digest, 'little') ^ WORLD_SEED)
+        return seed
+
+def key(domain, *coords):
+    """Return the 64-bit key for the stream (<domain>, <coords>), where
+    <coords> are integers."""
+    h = domain_seed(domain)
+    for c in coords:
+        h = splitmix64(h ^ (c & _MASK64))
+    return h
+
+def stream(domain, *coords):
+    """Return a new random.Random for (<domain>, <coords>)."""
+    return random.Random(key(domain, *coords))
+
+def np_stream(domain, *coords):
+    """Return a new NumPy Generator for (<domain>, <coords>), using the
+    counter-based Philox bit generator."""
+    if np is None:
+        raise ImportError("rng.np_stream() requires numpy")
+    return np.random.Generator(np.random.Philox(key=key(domain, *coords)))
@@ -4,6 +4,8 @@ from thing import Thing
 from container import Container
 from action import Action
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Room(Container):
     """Create a room."""
     #
@@ -22,7 +24,7 @@ class Room(Container):
         self.monster_safe = safe
         self.indoor = indoor
         self.mod = mod
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
     
     #
     # OTHER EXTERNAL METHODS (misc externally visible methods)
@@ -46,6 +48,12 @@ class Room(Container):
     def add_exit(self, exit_name, exit_room, caution_tape_msg=False):
         self.exits[exit_name] = exit_room
         self.caution_taped_exits[exit_name] = caution_tape_msg
+        self.changed()
+
+    def exit_handle(self, exit_name):
+        """Return a gametools.RoomHandle for the room that <exit_name> leads to,
+        which doesn't build that room until it is needed."""
+        return gametools.room_handle(self.exits[exit_name])
     
     def is_dark(self):
         total_light = self.default_light
@@ -57,7 +65,7 @@ class Room(Container):
             if isinstance(obj, Container) and (obj.see_inside or hasattr(obj, 'cons')):
                 if obj.contents: 
                     obj_list += obj.contents 
-        self.log.debug('Room %s: light level is %s' % (self.id, total_light))
+        self.log.debug('Room %s: light level is %s', self.id, total_light)
         return (total_light <= 0)
 
     def report_arrival(self, user, silent=False):
@@ -121,8 +129,7 @@ class Room(Container):
                 cons.write(self.caution_taped_exits[sExit])
                 return True
             try:
-                destPath = self.exits[sExit]  # filename of the destination room module
-                dest = gametools.load_room(destPath)
+                dest = self.exit_handle(sExit).room()
             except KeyError:
                 self.log.error("KeyError: exit '%s' maps to '%s' which is not an object in the game!" % (sExit, self.exits[sExit]))
                 cons.write("There was an internal error with the exit. ")
@@ -0,0 +1,260 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import gametools
+import worldgraph
+from prewarm import takes_no_params
+from walking_os import findAllPythonFiles
+
+#
+# ROOM GRAPH ANALYZER
+#   Exits are stored as module path strings, so a mistyped or deleted
+#   destination only shows up when someone tries to walk through it. This
+#   builds every room under domains/ and home/ in a pool of worker processes
+#   (each with its own Game), follows every exit, and reports:
+#
+#     - modules that fail to import, and rooms whose load() fails;
+#     - dangling exits, whose destination doesn't exist or fails to load;
+#     - one-way exits, where the destination has no exit back;
+#     - rooms that can't be reached from the start room;
+#     - the rooms that take longest to load.
+#
+#   Rooms made by parameterized factories (e.g. domains.centrata.prairie?3&4)
+#   are followed only while every integer parameter is within --radius of
+#   zero, and for at most --factory-limit rooms per factory; exits beyond
+#   that are counted as unexplored rather than checked. Run from the game
+#   root, e.g. before pushing changes through the gitbot:
+#       python room_analyzer.py [--radius R] [--output room_graph.json]
+#   The graph saved with --output can be loaded by the server at startup
+#   (startup.py --room-graph) so NPCs can plan routes from the start.
+#
+START_ROOM = 'domains.school.school.great_hall'
+SEARCH_ROOTS = ('domains', 'home')
+DEFAULT_RADIUS = 10
+DEFAULT_FACTORY_LIMIT = 500
+ANALYZER_WORKERS = os.cpu_count() or 2
+REPORT_SLOWEST = 15
+
+_worker_game = None
+
+def _start_worker():
+    """Give a worker process a Game of its own to build rooms in."""
+    global _worker_game
+    from gameserver import Game  # not at module level: only workers need one
+    _worker_game = Game(None, 'nocrypt', silent=True)
+
+def _inspect(path):
+    """Build the room at <path> (a module path, perhaps with parameters) in
+    this worker and return a dict describing it. 'kind' is 'room', 'factory'
+    (a module whose load() needs parameters), 'other' (no load() at all),
+    'broken' (the module can't be imported) or 'missing'; 'error' is set if
+    the room couldn't be built."""
+    result = {'path': path, 'kind': 'room', 'id': None, 'exits': {}, 'monster_safe': False,
+              'load_time': 0.0, 'error': None}
+    modpath, params = gametools.deconstructObjectPath(path)
+    if not gametools.module_index.exists(modpath):
+        result['kind'], result['error'] = 'missing', 'no such module'
+        return result
+    try:
+        mod = importlib.import_module(modpath)
+    except Exception as e:
+        result['kind'], result['error'] = 'broken', '%s: %s' % (type(e).__name__, e)
+        return result
+    load = getattr(mod, 'load', None)
+    if not callable(load):
+        result['kind'], result['error'] = 'other', 'not a room module (no load())'
+        return result
+    if not params and not takes_no_params(load):
+        result['kind'], result['error'] = 'factory', 'load() needs parameters'
+        return result
+    start = time.perf_counter()
+    try:
+        room = gametools.load_room(path)
+    except Exception as e:
+        room = None
+        result['error'] = '%s: %s' % (type(e).__name__, e)
+    result['load_time'] = time.perf_counter() - start
+    if room is None:
+        result['error'] = result['error'] or 'load() failed; see the game log'
+        return result
+    result['id'] = room.id
+    result['exits'] = dict(room.exits)
+    result['monster_safe'] = bool(getattr(room, 'monster_safe', False))
+    return result
+
+
+class RoomGraphAnalyzer():
+    """Build and check the exit graph of every room; see run()."""
+    def __init__(self, start=START_ROOM, radius=DEFAULT_RADIUS, factory_limit=DEFAULT_FACTORY_LIMIT,
+                 max_workers=ANALYZER_WORKERS):
+        self.start = start
+        self.radius = radius
+        self.factory_limit = factory_limit
+        self.max_workers = max_workers
+        self.results = {}            # path -> result of _inspect()
+        self.factory_rooms = Counter()  # factory module path -> parameterized rooms queued
+        self.unexplored = set()      # parameterized exits outside the bounds
+        self.graph = worldgraph.WorldGraph()
+        self.elapsed = 0.0
+
+    def discover(self):
+        """Return the module paths of every python file under SEARCH_ROOTS,
+        except packages' __init__ files."""
+        paths = []
+        for root in SEARCH_ROOTS:
+            if os.path.isdir(os.path.join(gametools.gameroot, root)):
+                paths += [f[:-len('.py')] for f in findAllPythonFiles(root) if not f.endswith('__init__.py')]
+        return sorted(paths)
+
+    def in_bounds(self, path):
+        """Return True if the parameterized room <path> should be explored."""
+        modpath, params = gametools.deconstructObjectPath(path)
+        for param in params[1:]:
+            try:
+                if abs(int(param)) > self.radius:
+                    return False
+            except ValueError:
+                pass  # not a coordinate
+        return self.factory_rooms[modpath] < self.factory_limit
+
+    def _targets(self, results):
+        """Return the exit destinations in <results> not yet inspected."""
+        targets = []
+        for result in results:
+            for target in result['exits'].values():
+                if target in self.results or target in targets or target in self.unexplored:
+                    continue
+                modpath, params = gametools.deconstructObjectPath(target)
+                if params:
+                    if not self.in_bounds(target):
+                        self.unexplored.add(target)
+                        continue
+                    self.factory_rooms[modpath] += 1
+                targets.append(target)
+        return targets
+
+    def _inspect_all(self, executor, paths):
+        if executor is None:
+            return [_inspect(path) for path in paths]
+        return list(executor.map(_inspect, paths, chunksize=max(1, len(paths) // (self.max_workers * 4))))
+
+    def run(self):
+        """Inspect every room module, then follow exits breadth first until
+        no new in-bounds destinations turn up."""
+        start = time.time()
+        executor = None
+        try:
+            executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_start_worker)
+        except (OSError, NotImplementedError):
+            print("Could not start worker processes; building rooms in this process.", file=sys.stderr)
+            _start_worker()
+        try:
+            frontier = self.discover()
+            while frontier:
+                results = self._inspect_all(executor, frontier)
+                for result in results:
+                    self.results[result['path']] = result
+                    if result['id']:
+                        self.graph.add_room(result['id'], result['exits'], result['monster_safe'])
+                        if result['id'] != result['path']:
+                            self.graph.add_alias(result['path'], result['id'])
+                frontier = self._targets(results)
+        finally:
+            if executor:
+                executor.shutdown()
+        self.elapsed = time.time() - start
+
+    #
+    # CHECKS
+    #
+    def rooms(self):
+        """Return the results for every room that was built, by room ID."""
+        return {r['id']: r for r in self.results.values() if r['id']}
+
+    def dangling_exits(self):
+        """Return a list of (room ID, exit name, destination, problem)."""
+        dangling = []
+        for room_id, room in sorted(self.rooms().items()):
+            for name, target in sorted(room['exits'].items()):
+                result = self.results.get(target)
+                if result and not result['id']:
+                    dangling.append((room_id, name, target, result['error']))
+        return dangling
+
+    def one_way_exits(self):
+        """Return a list of (room ID, exit name, destination ID) for exits
+        whose destination has no exit leading back."""
+        rooms = self.rooms()
+        one_way = []
+        for room_id, room in sorted(rooms.items()):
+            for name, target in sorted(room['exits'].items()):
+                dest = rooms.get(self.graph.key(target))
+                if dest and not any(self.graph.key(t) == room_id for t in dest['exits'].values()):
+                    one_way.append((room_id, name, dest['id']))
+        return one_way
+
+    def unreachable_rooms(self):
+        """Return the IDs of rooms that can't be reached from the start room
+        by any series of exits. Only rooms with modules of their own count:
+        parameterized rooms are only ever found through exits."""
+        reached = {self.start}
+        queue = deque([self.start])
+        nodes = self.graph.nodes
+        while queue:
+            node = nodes.get(queue.popleft())
+            for target in node.exits.values() if node else ():
+                key = self.graph.key(target)
+                if key not in reached:
+                    reached.add(key)
+                    queue.append(key)
+        return sorted(room_id for room_id in self.rooms() if room_id not in reached and '?' not in room_id)
+
+    def report(self, n=REPORT_SLOWEST):
+        """Return a printable report of everything found."""
+        rooms = self.rooms()
+        kinds = Counter(r['kind'] for r in self.results.values())
+        broken = sorted((r['path'], r['error']) for r in self.results.values() if r['kind'] == 'broken')
+        failed = sorted((r['path'], r['error']) for r in self.results.values() if r['kind'] == 'room' and r['error'])
+        dangling = self.dangling_exits()
+        one_way = self.one_way_exits()
+        unreachable = self.unreachable_rooms()
+        lines = ["Built %d rooms (%d from factories) in %.2f seconds with %d workers." %
+                 (len(rooms), sum(self.factory_rooms.values()), self.elapsed, self.max_workers),
+                 "  %d factory modules, %d other modules, %d parameterized exits left unexplored." %
+                 (kinds['factory'], kinds['other'], len(self.unexplored))]
+        lines.append("Modules that failed to import (%d):" % len(broken))
+        lines += ["  %s: %s" % b for b in broken]
+        lines.append("Rooms that failed to load (%d):" % len(failed))
+        lines += ["  %s: %s" % f for f in failed]
+        lines.append("Dangling exits (%d):" % len(dangling))
+        lines += ["  %s --%s--> %s: %s" % d for d in dangling]
+        lines.append("One-way exits (%d):" % len(one_way))
+        lines += ["  %s --%s--> %s" % o for o in one_way]
+        lines.append("Unreachable from %s (%d):" % (self.start, len(unreachable)))
+        lines += ["  %s" % u for u in unreachable]
+        lines.append("Slowest %d rooms to load:" % n)
+        for r in sorted(rooms.values(), key=lambda r: -r['load_time'])[:n]:
+            lines.append("%8.1f ms  %s" % (r['load_time'] * 1000, r['path']))
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description="Check the exits of every room under domains/ and home/")
+    argparser.add_argument("--start", default=START_ROOM, help="Room that every other room should be reachable from")
+    argparser.add_argument("--radius", type=int, default=DEFAULT_RADIUS, help="Explore factory rooms whose integer parameters are within this of zero; defaults to %d" % DEFAULT_RADIUS)
+    argparser.add_argument("--factory-limit", type=int, default=DEFAULT_FACTORY_LIMIT, help="Most rooms to build from each factory; defaults to %d" % DEFAULT_FACTORY_LIMIT)
+    argparser.add_argument("-w", "--workers", type=int, default=ANALYZER_WORKERS, help="Worker processes; defaults to the number of CPUs")
+    argparser.add_argument("-o", "--output", help="Save the room graph to this JSON file, for startup.py --room-graph")
+    args = argparser.parse_args()
+
+    analyzer = RoomGraphAnalyzer(args.start, args.radius, args.factory_limit, args.workers)
+    analyzer.run()
+    print(analyzer.report())
+    if args.output:
+        analyzer.graph.save_file(args.output)
+        print("Saved the graph of %d rooms to %s" % (len(analyzer.graph.nodes), args.output))
@@ -0,0 +1,183 @@
+import json
+import time
+import hashlib
+
+import gametools
+from thing import Thing
+from player import Player
+from world_snapshot import in_snapshot, destroy_tree
+
+#
+# EVICTION OF IDLE PROCEDURAL ROOMS
+#   Rooms built by a parameterized load(param_list) factory, such as the
+#   prairie and the endless caverns, would otherwise stay loaded forever once
+#   visited, with their scenery, monsters and heartbeats. RoomEvictor unloads
+#   any such room that has had no player in it for ROOM_IDLE_SECONDS:
+#
+#     - a room whose contents are just as load() left them is simply
+#       destroyed, and will be built afresh by the next visitor;
+#     - a room whose contents changed (something was dropped, a monster
+#       died or wandered off) is saved to the world snapshot first, as a
+#       delta against freshly cloned objects, and rehydrated from it the
+#       next time it is loaded (see WorldSnapshot.stash() and rehydrate());
+#     - a room holding something the snapshot can't rebuild, or whose exits
+#       were changed, stays loaded.
+#
+#   Whether a room changed is decided by comparing a fingerprint of the state
+#   of everything in it with the fingerprint taken when it was built. (The
+#   snapshot itself can't be compared: it records each object's differences
+#   from a fresh clone, which for randomized modules differs every time.)
+#
+ROOM_IDLE_SECONDS = 600
+EVICTION_SWEEP_BEATS = 60  # how often the game looks for idle rooms
+
+def is_procedural(room):
+    """Return True if <room> was built by a load() factory from parameters."""
+    return bool(getattr(room, 'params', None)) and '?' in room.id
+
+def _plain(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(str(v) for v in value)
+    return str(value)  # objects by ID (see Thing.__str__), functions by name
+
+def fingerprint(room):
+    """Return a digest of the state of everything in <room> that the world
+    snapshot would save."""
+    states = []
+    objs = [obj for obj in room.contents if in_snapshot(obj)]
+    for obj in objs:
+        state = obj._get_state()
+        state.pop('log', None)
+        states.append(state)
+        objs += [child for child in obj.contents or [] if in_snapshot(child)]
+    data = json.dumps(states, sort_keys=True, default=_plain)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class ResidentRoom():
+    """What RoomEvictor knows about one loaded procedural room."""
+    def __init__(self, room, now):
+        self.room = room
+        self.fingerprint = fingerprint(room)  # as it was built
+        self.exits = dict(room.exits)
+        self.other_ids = {obj.id for obj in room.contents if not in_snapshot(obj)}
+        self.last_busy = now
+
+    def pinned(self):
+        """Return True if the room has changed in a way the world snapshot
+        can't record, so it mustn't be unloaded."""
+        if self.room.exits != self.exits:
+            return True
+        return any(not in_snapshot(obj) and obj.id not in self.other_ids
+                   for obj in self.room.contents if not isinstance(obj, Player))
+
+
+class RoomEvictor():
+    """Unload procedural rooms that have been idle for <idle_seconds>,
+    saving any changes to <world> (a WorldSnapshot) and dropping them from
+    <graph> (a WorldGraph), if given. See sweep()."""
+    def __init__(self, world, idle_seconds=ROOM_IDLE_SECONDS, graph=None):
+        self.world = world
+        self.graph = graph
+        self.idle_seconds = idle_seconds
+        self.residents = {}  # room ID -> ResidentRoom
+        self.stashing = set()  # IDs of rooms being saved before they are unloaded
+        self.evicted = self.stashed = 0
+        self.log = gametools.get_game_logger("_room_eviction")
+
+    def built(self, room):
+        """Called by gametools.load_room() whenever it returns <room>."""
+        if not is_procedural(room):
+            return
+        resident = self.residents.get(room.id)
+        if resident and resident.room is room:
+            return
+        try:
+            self.residents[room.id] = ResidentRoom(room, time.time())
+        except Exception:
+            self.log.exception('Error fingerprinting new room %s; it will stay loaded.' % room.id)
+
+    def sweep(self, now=None):
+        """Unload every procedural room that has had no players in it for
+        self.idle_seconds. Rooms that changed are saved to the world snapshot
+        in the background first, and unloaded once they have been written
+        (see _stashed()). Returns the number of rooms unloaded immediately."""
+        now = now if now is not None else time.time()
+        start = time.time()
+        idle = []
+        for room_id, resident in list(self.residents.items()):
+            room = resident.room
+            if Thing.ID_dict.get(room_id) is not room:
+                del self.residents[room_id]  # destroyed or reloaded by something else
+            elif any(isinstance(obj, Player) for obj in room.contents):
+                resident.last_busy = now
+            elif now - resident.last_busy >= self.idle_seconds and room_id not in self.stashing and \
+                 not resident.pinned():
+                idle.append(resident)
+        snapshots = []
+        stashing = []
+        unloaded = 0
+        for resident in idle:
+            room = resident.room
+            try:
+                state = (fingerprint(room), self.world.fixture_changes(room))
+                if state == (resident.fingerprint, {}) and room.id not in self.world.manifest:
+                    self.unload(room)  # just as load() built it
+                    unloaded += 1
+                    continue
+                data, digest = self.world.serialize_room(room)
+                snapshots.append((room.id, data, digest))
+                stashing.append((room, digest, state))
+            except Exception:
+                self.log.exception('Error taking snapshot of room %s; it will stay loaded.' % room.id)
+        if snapshots:
+            self.stashing.update(room.id for room, digest, state in stashing)
+            future = self.world.stash(snapshots)
+            def done(f):
+                try:
+                    written = f.result()
+                except Exception:
+                    self.log.exception('Error saving idle rooms; they will stay loaded.')
+                    written = 0
+                Thing.game.events.call_soon_threadsafe(Thing.game.catch_func_errs, self._stashed, stashing, written)
+            future.add_done_callback(done)
+        self.evicted += unloaded
+        if unloaded or snapshots:
+            self.log.info('Unloaded %d idle rooms and started saving %d more in %.3f seconds; %d procedural rooms still loaded' %
+                          (unloaded, len(snapshots), time.time() - start, len(self.residents)))
+        return unloaded
+
+    def _stashed(self, stashing, written):
+        """Called on the game thread once the rooms in <stashing>, a list of
+        (room, digest, state) from sweep(), have been written to the world
+        snapshot: unload each one that was saved and is still idle and
+        unchanged."""
+        self.stashed += written
+        unloaded = 0
+        for room, digest, state in stashing:
+            self.stashing.discard(room.id)
+            entry = self.world.manifest.get(room.id)
+            if Thing.ID_dict.get(room.id) is not room or not (entry and entry['digest'] == digest):
+                continue  # reloaded, or its changes couldn't be saved, so keep it loaded
+            if any(isinstance(obj, Player) for obj in room.contents) or \
+               (fingerprint(room), self.world.fixture_changes(room)) != state:
+                continue  # changed while it was being saved; a later sweep will save it again
+            self.unload(room)
+            unloaded += 1
+        self.evicted += unloaded
+        if unloaded:
+            self.log.info('Unloaded %d saved idle rooms; %d procedural rooms still loaded' % (unloaded, len(self.residents)))
+
+    def unload(self, room):
+        """Destroy <room> and everything in it, deregistering heartbeats and
+        freeing IDs. Its saved state, if any, must already be in the world
+        snapshot."""
+        for obj in list(room.contents):
+            destroy_tree(obj)
+        room.destroy()
+        self.residents.pop(room.id, None)
+        self.world.forget(room.id)
+        if self.graph:
+            self.graph.forget(room.id)
+        gametools.release_path_logger(room.path)
+        gametools.release_room_handle(room.id)
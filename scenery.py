@@ -2,13 +2,15 @@ from thing import Thing
 from action import Action
 import gametools
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Scenery(Thing):
     def __init__(self, default_name, short_desc, long_desc, pref_id=None, unlisted=False):
         Thing.__init__(self, default_name, None)
         self.fix_in_place("You can't move the %s!" % (default_name))
         self.set_description(short_desc, long_desc)
         self.unlisted = unlisted
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
 
         self.actions = dict(Thing.actions)
         # response tuple is (verblist, result_str, transitive, intransitive)
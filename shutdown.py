@@ -0,0 +1,135 @@
+import os
+import time
+import asyncio
+import multiprocessing
+
+import gametools
+import player_loader
+import connections_websock
+
+SHUTDOWN_DEADLINE = 30  # seconds allowed for saving players and flushing consoles
+SAVE_WORKERS = os.cpu_count() or 2
+
+class ShutdownCoordinator():
+    """Save every player and the world, and say goodbye to every console when
+    the game exits.
+
+    Players are snapshotted in memory on the game thread (which is cheap and
+    leaves the game untouched), then serialized and written to disk in
+    parallel by a pool of worker processes. Final messages are flushed to
+    all consoles concurrently. Everything shares a single deadline, so a slow
+    disk or a stalled connection can't hold up the daily restart; anything
+    still unfinished when it passes is logged and abandoned."""
+    def __init__(self, game, deadline=SHUTDOWN_DEADLINE, max_workers=SAVE_WORKERS):
+        self.game = game
+        self.deadline = deadline
+        self.max_workers = max_workers
+        self.log = gametools.get_game_logger("_shutdown")
+
+    def remaining(self):
+        return max(0, self.end_time - time.time())
+
+    def snapshot_players(self, players):
+        """Return a list of (player, filename, saveables) for <players>."""
+        snapshots = []
+        for p in players:
+            try:
+                p.save_cons_attributes()
+            except Exception:
+                self.log.error('Error saving console attributes for player %s!' % p)
+            try:
+                saveables = player_loader.snapshot_player(p, self.log)
+            except Exception:
+                self.log.exception('Error taking snapshot of player %s; not saved!' % p)
+                continue
+            snapshots.append((p, gametools.realDir(gametools.PLAYER_DIR, p.names[0]), saveables))
+        return snapshots
+
+    def write_snapshots(self, snapshots):
+        """Write <snapshots> in parallel, waiting no longer than the deadline.
+        Returns the set of players whose save files were written.
+
+        The workers are spawned rather than forked, since the game has other
+        threads running (password hashing, the log writer) whose locks a
+        forked child could inherit held. Workers still busy at the deadline
+        are terminated; save files are replaced atomically, so a player whose
+        save was cut short keeps their previous one."""
+        saved = set()
+        if not snapshots:
+            return saved
+        try:
+            pool = multiprocessing.get_context('spawn').Pool(min(self.max_workers, len(snapshots)))
+        except (OSError, NotImplementedError):
+            self.log.exception('Could not start save worker processes; saving players one at a time.')
+            for p, filename, saveables in snapshots:
+                if self.remaining() <= 0:
+                    break
+                try:
+                    player_loader.write_player_file(filename, saveables)
+                    saved.add(p)
+                except Exception:
+                    self.log.exception('Error saving player %s!' % p)
+            return saved
+        results = {p: pool.apply_async(player_loader.write_player_file, (filename, saveables))
+                   for p, filename, saveables in snapshots}
+        for result in results.values():
+            result.wait(self.remaining())
+        finished = True
+        for p, result in results.items():
+            if not result.ready():
+                self.log.critical('Shutdown deadline passed before player %s was saved!' % p)
+                finished = False
+                continue
+            try:
+                result.get()
+                saved.add(p)
+            except Exception:
+                self.log.exception('Error saving player %s!' % p)
+        if finished:
+            pool.close()
+        else:
+            pool.terminate()  # don't let exit wait for the stragglers
+        pool.join()
+        return saved
+
+    async def _flush_all(self, consoles):
+        results = await asyncio.gather(*[connections_websock.ws_send(c) for c in consoles], return_exceptions=True)
+        for c, result in zip(consoles, results):
+            if isinstance(result, Exception):
+                self.log.error('Error sending final messages to %s: %s' % (c.user, result))
+
+    def flush_consoles(self, consoles):
+        """Send all pending output on <consoles> concurrently, waiting no longer
+        than the deadline."""
+        consoles = [c for c in consoles if c and c.user]
+        if not consoles:
+            return
+        try:
+            self.game.events.run_until_complete(asyncio.wait_for(self._flush_all(consoles), timeout=self.remaining()))
+        except asyncio.TimeoutError:
+            self.log.critical('Shutdown deadline passed before all consoles were flushed!')
+
+    def run(self, extra_consoles=()):
+        """Save all players online and flush every console. Returns the number
+        of players saved."""
+        self.end_time = time.time() + self.deadline
+        players = [p for p in self.game.player_directory.online.values() if p.cons]
+        for p in players:
+            p.cons.write('The game is now shutting down.')
+        saved = self.write_snapshots(self.snapshot_players(players))
+        for p in players:
+            if p in saved:
+                self.game.player_directory.add_saved(p.names[0])
+                p.cons.write("Saved player data!")
+            else:
+                p.cons.write("Sorry, your player could not be saved.")
+            p.cons.write('--#quit')
+        try:
+            self.game.world.save().result(timeout=self.remaining())
+        except Exception:
+            self.log.exception('Error saving world snapshot!')
+        consoles = [p.cons for p in players]
+        consoles += [c for c in extra_consoles if c not in consoles]
+        self.flush_consoles(consoles)
+        self.log.info('Saved %d of %d players in %.2f seconds' % (len(saved), len(players), self.deadline - self.remaining()))
+        return len(saved)
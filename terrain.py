@@ -0,0 +1,205 @@
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#
+# PROCEDURAL TERRAIN CONNECTIVITY
+#   Whether two neighbouring cells of an endless grid (e.g. the rooms of
+#   domains.endless_terrain.endless_caverns) are connected is decided by a
+#   counter-based hash of the edge between them: the splitmix64 finalizer
+#   applied to the edge's packed coordinates. Nothing is stored and no RNG
+#   state is touched, so any cell or block of cells can be generated in any
+#   order and always comes out the same.
+#
+#   Each edge is named by its lower cell and an axis (EAST_WEST, NORTH_SOUTH or
+#   UP_DOWN), so the east exit of (x, y, z) and the west exit of (x+1, y, z)
+#   are the same edge. exit_mask() computes one cell's exits in plain Python;
+#   exit_masks() computes a whole block at once with NumPy. Both give
+#   identical results.
+#
+NORTH, SOUTH, EAST, WEST, UP, DOWN = 0x01, 0x02, 0x04, 0x08, 0x10, 0x20
+MASKS = {'north': NORTH, 'south': SOUTH, 'east': EAST, 'west': WEST, 'up': UP, 'down': DOWN}
+OFFSETS = {'north': (0, 1, 0), 'south': (0, -1, 0), 'east': (1, 0, 0),
+           'west': (-1, 0, 0), 'up': (0, 0, 1), 'down': (0, 0, -1)}
+EAST_WEST, NORTH_SOUTH, UP_DOWN = 0, 1, 2
+
+DEFAULT_SEED = 0
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX1 = 0xBF58476D1CE4E5B9
+_MIX2 = 0x94D049BB133111EB
+
+def splitmix64(value):
+    """Return the splitmix64 hash of the 64-bit integer <value>."""
+    z = (value + _GOLDEN) & _MASK64
+    z = ((z ^ (z >> 30)) * _MIX1) & _MASK64
+    z = ((z ^ (z >> 27)) * _MIX2) & _MASK64
+    return z ^ (z >> 31)
+
+def _pack(x, y, z, axis):
+    # x and y wrap every 2**20 cells, z every 2**16
+    return (((x & 0xFFFFF) << 44) | ((y & 0xFFFFF) << 24) | ((z & 0xFFFF) << 8) | axis)
+
+def _threshold(probability):
+    """Compare the top 53 bits of a hash to this to get True with <probability>."""
+    return int(probability * (1 << 53))
+
+def edge_exists(x, y, z, axis, probability, seed=DEFAULT_SEED):
+    """Return True if the cell (x, y, z) connects to its neighbour in the
+    positive direction along <axis>."""
+    h = splitmix64(_pack(x, y, z, axis) ^ splitmix64(seed))
+    return (h >> 11) < _threshold(probability)
+
+def exit_mask(x, y, z, probability, seed=DEFAULT_SEED):
+    """Return the exits of cell (x, y, z) as a bitmask of NORTH, SOUTH etc."""
+    mask = 0
+    if edge_exists(x, y, z, NORTH_SOUTH, probability, seed): mask |= NORTH
+    if edge_exists(x, y-1, z, NORTH_SOUTH, probability, seed): mask |= SOUTH
+    if edge_exists(x, y, z, EAST_WEST, probability, seed): mask |= EAST
+    if edge_exists(x-1, y, z, EAST_WEST, probability, seed): mask |= WEST
+    if edge_exists(x, y, z, UP_DOWN, probability, seed): mask |= UP
+    if edge_exists(x, y, z-1, UP_DOWN, probability, seed): mask |= DOWN
+    return mask
+
+#
+# VECTORIZED VERSION (requires NumPy)
+#
+def _splitmix64_array(values):
+    z = values + np.uint64(_GOLDEN)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_MIX1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_MIX2)
+    return z ^ (z >> np.uint64(31))
+
+def _edges(xs, ys, zs, axis, probability, seed):
+    """Return a boolean array: edge_exists() for every (xs, ys, zs), which
+    are int64 arrays broadcast against each other."""
+    key = (((xs & 0xFFFFF).astype(np.uint64) << np.uint64(44)) |
+           ((ys & 0xFFFFF).astype(np.uint64) << np.uint64(24)) |
+           ((zs & 0xFFFF).astype(np.uint64) << np.uint64(8)) | np.uint64(axis))
+    h = _splitmix64_array(key ^ np.uint64(splitmix64(seed)))
+    return (h >> np.uint64(11)) < np.uint64(_threshold(probability))
+
+def exit_masks(origin, shape, probability, seed=DEFAULT_SEED):
+    """Return a uint8 array of shape <shape> (nx, ny, nz) holding exit_mask()
+    for every cell of the block whose lowest corner is <origin> (x, y, z):
+    the exits of cell (x, y, z) are at [x - origin[0], y - origin[1], z - origin[2]]."""
+    if np is None:
+        raise ImportError("terrain.exit_masks() requires numpy")
+    x0, y0, z0 = origin
+    nx, ny, nz = shape
+    xs = np.arange(x0 - 1, x0 + nx, dtype=np.int64)[:, None, None]
+    ys = np.arange(y0 - 1, y0 + ny, dtype=np.int64)[None, :, None]
+    zs = np.arange(z0 - 1, z0 + nz, dtype=np.int64)[None, None, :]
+    # each edge array has one extra cell on the low side, for the exits of the
+    # block's lowest cells that lead out of the block
+    east_west = _edges(xs, ys[:, 1:], zs[:, :, 1:], EAST_WEST, probability, seed)
+    north_south = _edges(xs[1:], ys, zs[:, :, 1:], NORTH_SOUTH, probability, seed)
+    up_down = _edges(xs[1:], ys[:, 1:], zs, UP_DOWN, probability, seed)
+    masks = np.zeros(shape, dtype=np.uint8)
+    masks[east_west[1:]] |= EAST
+    masks[east_west[:-1]] |= WEST
+    masks[north_south[:, 1:]] |= NORTH
+    masks[north_south[:, :-1]] |= SOUTH
+    masks[up_down[:, :, 1:]] |= UP
+    masks[up_down[:, :, :-1]] |= DOWN
+    return masks
+
+def exit_counts(masks):
+    """Return an array of the number of exits of each cell in <masks>."""
+    return np.unpackbits(masks[..., None], axis=-1).sum(axis=-1, dtype=np.int32)
+
+#
+# TERRAIN CHUNK CACHE
+#   Procedural room factories describe their terrain with one small NumPy
+#   structured array per CHUNK_SIZE x CHUNK_SIZE tile of cells (one z level),
+#   holding e.g. each cell's exit mask and feature codes. Tiles are generated
+#   on demand by the factory's own function and kept in an LRU cache capped
+#   at <max_bytes>. If a <spill_path> is given, evicted tiles are written to a
+#   memory-mapped file of <spill_tiles> slots, and read back from it rather
+#   than regenerated; the oldest spilled tiles are overwritten when it fills.
+#
+CHUNK_SIZE = 32
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+DEFAULT_SPILL_TILES = 4096
+
+def chunk_of(x, y):
+    """Return the (cx, cy) coordinates of the tile holding cell (x, y)."""
+    return x // CHUNK_SIZE, y // CHUNK_SIZE
+
+
+class TerrainChunkCache():
+    """Tiles of terrain data, each an array of <dtype> with shape
+    (CHUNK_SIZE, CHUNK_SIZE). generate(cx, cy, z) must return the tile whose
+    lowest cell is (cx * CHUNK_SIZE, cy * CHUNK_SIZE, z), and must always
+    return the same tile for the same arguments."""
+    def __init__(self, generate, dtype, max_bytes=DEFAULT_CACHE_BYTES, spill_path=None, spill_tiles=DEFAULT_SPILL_TILES):
+        if np is None:
+            raise ImportError("terrain.TerrainChunkCache requires numpy")
+        self.generate = generate
+        self.dtype = np.dtype(dtype)
+        self.tile_bytes = self.dtype.itemsize * CHUNK_SIZE * CHUNK_SIZE
+        self.max_tiles = max(1, max_bytes // self.tile_bytes)
+        self.tiles = OrderedDict()  # (cx, cy, z) -> tile, least recently used first
+        self.hits = self.misses = self.generated = 0
+        self.spill = None
+        if spill_path:
+            self.spill = np.memmap(spill_path, dtype=self.dtype, mode='w+', shape=(spill_tiles, CHUNK_SIZE, CHUNK_SIZE))
+            self.spill_slots = {}   # (cx, cy, z) -> slot in self.spill
+            self.slot_keys = [None] * spill_tiles
+            self.next_slot = 0
+
+    def tile(self, cx, cy, z):
+        """Return the tile (cx, cy, z), which must be treated as read-only."""
+        key = (cx, cy, z)
+        try:
+            tile = self.tiles[key]
+        except KeyError:
+            self.misses += 1
+            tile = self._unspill(key)
+            if tile is None:
+                tile = self.generate(cx, cy, z)
+                self.generated += 1
+            self.tiles[key] = tile
+            if len(self.tiles) > self.max_tiles:
+                self._evict(*self.tiles.popitem(last=False))
+        else:
+            self.hits += 1
+            self.tiles.move_to_end(key)
+        return tile
+
+    def cell(self, x, y, z):
+        """Return the record for cell (x, y, z) from its tile."""
+        cx, cy = chunk_of(x, y)
+        return self.tile(cx, cy, z)[x - cx * CHUNK_SIZE, y - cy * CHUNK_SIZE]
+
+    def _evict(self, key, tile):
+        if self.spill is None or key in self.spill_slots:
+            return
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % len(self.slot_keys)
+        old_key = self.slot_keys[slot]
+        if old_key is not None:
+            del self.spill_slots[old_key]
+        self.spill[slot] = tile
+        self.slot_keys[slot] = key
+        self.spill_slots[key] = slot
+
+    def _unspill(self, key):
+        if self.spill is None or key not in self.spill_slots:
+            return None
+        return np.array(self.spill[self.spill_slots[key]])
+
+    def invalidate(self, z=None):
+        """Forget every cached tile (on level <z> only, if given), e.g. after
+        the generator's inputs changed."""
+        for key in [k for k in self.tiles if z is None or k[2] == z]:
+            del self.tiles[key]
+        if self.spill is not None:
+            for key in [k for k in self.spill_slots if z is None or k[2] == z]:
+                self.slot_keys[self.spill_slots.pop(key)] = None
+
+    def memory_use(self):
+        return len(self.tiles) * self.tile_bytes
@@ -0,0 +1,29 @@
+import auth
+
+# a few iterations are plenty to check the format; the real count is slow on purpose
+FAST = 1000
+
+def test_hash_round_trip():
+    stored = auth.hash_password('correct horse', FAST)
+    assert auth.is_hashed(stored)
+    assert stored.split('$')[:2] == [auth.HASH_SCHEME, str(FAST)]
+    assert auth.verify_password('correct horse', stored)
+    assert not auth.verify_password('wrong horse', stored)
+
+def test_hashes_are_salted():
+    assert auth.hash_password('same', FAST) != auth.hash_password('same', FAST)
+
+def test_legacy_plaintext_passwords():
+    assert not auth.is_hashed('hunter2')
+    assert auth.verify_password('hunter2', 'hunter2')
+    assert not auth.verify_password('hunter3', 'hunter2')
+    assert auth.needs_upgrade('hunter2')
+
+def test_missing_or_garbled_passwords_never_match():
+    assert not auth.verify_password(None, 'hunter2')
+    assert not auth.verify_password('hunter2', None)
+    assert not auth.verify_password('x', auth.HASH_SCHEME + '$not-a-number$$')
+
+def test_needs_upgrade_after_raising_iterations():
+    assert auth.needs_upgrade(auth.hash_password('pw', FAST))
+    assert not auth.needs_upgrade('%s$%d$c2FsdA==$aGFzaA==' % (auth.HASH_SCHEME, auth.HASH_ITERATIONS))
@@ -0,0 +1,39 @@
+import numpy as np
+
+import connectivity
+import terrain
+
+def test_union_find():
+    uf = connectivity.UnionFind()
+    assert uf.union('a', 'b') and uf.union('c', 'd')
+    assert not uf.union('b', 'a')
+    assert uf.connected('a', 'b') and not uf.connected('a', 'c')
+    uf.union('b', 'd')
+    assert uf.connected('a', 'c')
+    assert uf.size[uf.find('a')] == 4
+
+def test_label_components():
+    masks = np.zeros((3, 2), dtype=np.uint8)
+    masks[0, 0] |= terrain.EAST; masks[1, 0] |= terrain.WEST      # (0,0)-(1,0)
+    masks[1, 0] |= terrain.NORTH; masks[1, 1] |= terrain.SOUTH    # (1,0)-(1,1)
+    masks[2, 1] |= terrain.WEST                                   # one way only: not a passage
+    report = connectivity.ConnectivityReport(masks, origin=(10, 20))
+    assert report.connected((10, 20), (11, 21))
+    assert not report.connected((10, 20), (12, 21))
+    assert report.largest()[1] == 3
+    assert len(report.pockets()) == 3  # (0,1), (2,0) and (2,1) are on their own
+
+def test_labels_match_union_find():
+    masks = terrain.exit_masks((0, 0, 0), (15, 15, 2), 0.45)
+    labels = connectivity.label_components(masks)
+    uf = connectivity.UnionFind()
+    for cell in np.ndindex(masks.shape):
+        uf.find(cell)
+        for direction, axis in ((terrain.EAST, 0), (terrain.NORTH, 1), (terrain.UP, 2)):
+            other = list(cell)
+            other[axis] += 1
+            if masks[cell] & direction and other[axis] < masks.shape[axis]:
+                uf.union(cell, tuple(other))
+    for a in np.ndindex(masks.shape):
+        for b in ((0, 0, 0), (7, 7, 1), (14, 3, 0)):
+            assert (labels[a] == labels[b]) == uf.connected(a, b)
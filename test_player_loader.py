@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import gametools
+import player_loader
+
+def _saveables():
+    return [
+        {'id': 'alice', 'path': 'player', 'names': ['alice'], 'password': 'pw', 'contents': ['scroll', 'bag']},
+        {'id': 'scroll', 'path': 'domains.school.scroll', 'location': 'alice'},
+        {'id': 'bag', 'path': 'domains.school.forest.bag', 'location': 'alice', 'contents': ['ruby']},
+        {'id': 'ruby', 'path': 'domains.school.forest.ruby', 'location': 'bag'},
+    ]
+
+def _kinds(diagnostics):
+    return sorted(d.kind for d in diagnostics)
+
+def test_sound_file_has_no_diagnostics():
+    pf = player_loader.PlayerFile('alice.OADplayer', _saveables())
+    assert pf.player_name == 'alice' and pf.password == 'pw'
+    assert pf.check() == []
+
+def test_ordered_puts_containers_first():
+    saveables = _saveables()
+    pf = player_loader.PlayerFile('alice.OADplayer', [saveables[0], saveables[3], saveables[2], saveables[1]])
+    order = [x['id'] for x in pf.ordered()]
+    assert order[0] == 'alice'
+    assert order.index('bag') < order.index('ruby')
+
+def test_check_reports_problems():
+    saveables = _saveables()
+    saveables[0]['contents'].append('ghost')               # never saved
+    saveables[1]['path'] = 'domains.no_such_module'        # module removed
+    saveables[3]['location'] = 'alice'                     # disagrees with bag's contents
+    saveables.append({'id': 'stray', 'path': 'domains.school.scroll'})  # carried by nobody
+    saveables.append(dict(saveables[1]))                   # saved twice
+    diagnostics = player_loader.PlayerFile('alice.OADplayer', saveables).check()
+    assert _kinds(diagnostics) == ['dangling-reference', 'duplicate-id', 'inconsistent-containment',
+                                   'missing-module', 'unreachable']
+
+def test_read_player_file(tmp_path):
+    good = tmp_path / 'alice.OADplayer'
+    good.write_text(json.dumps(_saveables()))
+    assert player_loader.read_player_file(str(good)).root['id'] == 'alice'
+    for name, text in [('corrupt', '[{"id":'), ('empty', '[]'), ('not_a_list', '{"id": "alice"}')]:
+        bad = tmp_path / name
+        bad.write_text(text)
+        with pytest.raises(gametools.PlayerLoadError):
+            player_loader.read_player_file(str(bad))
+    with pytest.raises(gametools.PlayerLoadError):
+        player_loader.read_player_file(str(tmp_path / 'missing'))
+
+def test_write_player_file_round_trip(tmp_path):
+    filename = player_loader.write_player_file(str(tmp_path / 'alice'), _saveables())
+    assert filename.endswith('.OADplayer')
+    assert player_loader.read_player_file(filename).saveables == _saveables()
+    assert [p.name for p in tmp_path.iterdir()] == ['alice.OADplayer']  # no temporary file left
+
+def test_is_plain():
+    assert player_loader.is_plain({'a': [1, 2.5, 'x', None, (True,)]})
+    assert not player_loader.is_plain({1: 'non-string key'})
+    assert not player_loader.is_plain([object()])
+    assert not player_loader.is_plain({'a': {'b'}})
+
+def test_strip_legacy_tag():
+    assert player_loader.strip_legacy_tag('sword-saveplayer123456') == 'sword'
+    assert player_loader.strip_legacy_tag('sword') == 'sword'
@@ -0,0 +1,34 @@
+import numpy as np
+
+import terrain
+
+ORIGIN, SHAPE, P = (-5, -7, -1), (12, 9, 3), 0.4
+
+def test_vectorized_masks_match_scalar():
+    masks = terrain.exit_masks(ORIGIN, SHAPE, P)
+    assert masks.shape == SHAPE and masks.dtype == np.uint8
+    for i in range(SHAPE[0]):
+        for j in range(SHAPE[1]):
+            for k in range(SHAPE[2]):
+                x, y, z = ORIGIN[0] + i, ORIGIN[1] + j, ORIGIN[2] + k
+                assert masks[i, j, k] == terrain.exit_mask(x, y, z, P), (x, y, z)
+
+def test_neighbours_agree():
+    masks = terrain.exit_masks(ORIGIN, SHAPE, P)
+    assert np.array_equal(masks[:-1] & terrain.EAST != 0, masks[1:] & terrain.WEST != 0)
+    assert np.array_equal(masks[:, :-1] & terrain.NORTH != 0, masks[:, 1:] & terrain.SOUTH != 0)
+    assert np.array_equal(masks[:, :, :-1] & terrain.UP != 0, masks[:, :, 1:] & terrain.DOWN != 0)
+
+def test_blocks_overlap_consistently():
+    whole = terrain.exit_masks((0, 0, 0), (20, 20, 1), P)
+    part = terrain.exit_masks((7, 3, 0), (5, 6, 1), P)
+    assert np.array_equal(whole[7:12, 3:9], part)
+
+def test_seed_and_probability():
+    assert not terrain.exit_masks(ORIGIN, SHAPE, 0.0).any()
+    assert (terrain.exit_masks(ORIGIN, SHAPE, 1.0) == 0x3F).all()
+    assert not np.array_equal(terrain.exit_masks(ORIGIN, SHAPE, P, seed=1), terrain.exit_masks(ORIGIN, SHAPE, P))
+
+def test_exit_counts():
+    masks = np.array([0, terrain.NORTH, terrain.EAST | terrain.WEST, 0x3F], dtype=np.uint8)
+    assert terrain.exit_counts(masks).tolist() == [0, 1, 2, 6]
@@ -0,0 +1,34 @@
+import random
+
+import numpy as np
+import pytest
+
+import weighted
+
+def test_choice_follows_weights():
+    table = weighted.WeightedTable.from_percentages({'never': 0, 'rare': 10, 'common': 90})
+    rand = random.Random(1)
+    picks = [table.choice(rand) for i in range(5000)]
+    assert 'never' not in picks
+    assert 0.07 < picks.count('rare') / len(picks) < 0.13
+    assert table.names[table.index(rand)] in ('rare', 'common')
+
+def test_bad_weights():
+    for names, weights in [(['a'], [0]), (['a', 'b'], [1]), (['a', 'b'], [1, -1])]:
+        with pytest.raises(ValueError):
+            weighted.WeightedTable(names, weights)
+
+def test_sample_follows_weights():
+    table = weighted.WeightedTable(['a', 'b', 'c', 'd'], [1, 0, 3, 4])
+    codes = table.sample(np.random.default_rng(2), (200, 200))
+    counts = np.bincount(codes.ravel(), minlength=4) / codes.size
+    assert counts[1] == 0
+    assert np.allclose(counts, [0.125, 0, 0.375, 0.5], atol=0.01)
+
+def test_table_set_picks_from_each_table():
+    tables = weighted.WeightedTableSet([weighted.WeightedTable(['x'], [1]),
+                                        weighted.WeightedTable(['p', 'q', 'r'], [0, 1, 1])])
+    which = np.array([[0, 1] * 500])
+    codes = tables.sample(np.random.default_rng(3), which)
+    assert (codes[which == 0] == 0).all()
+    assert set(codes[which == 1].tolist()) == {1, 2}
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from gameserver import Game  # first, so the game's modules import in the usual order
+import gametools
+from doors_and_windows import Door
+from world_snapshot import WorldSnapshot, MANIFEST_FILE, destroy_tree
+
+LOBBY = 'domains.renaissance_school.lobby'
+LIBRARY = 'domains.school.school.library'
+
+@pytest.fixture(scope='module')
+def game():
+    return Game(None, 'nocrypt', silent=True)
+
+@pytest.fixture
+def world(game, tmp_path):
+    game.world = WorldSnapshot(str(tmp_path))
+    yield game.world
+    game.world.writer.shutdown()
+
+def _door(room):
+    return [obj for obj in room.contents if isinstance(obj, Door)][0]
+
+def _unload(world, *rooms):
+    for room in rooms:
+        destroy_tree(room)
+        world.forget(room.id)
+
+def test_save_and_restore(world, tmp_path):
+    lobby, library = gametools.load_room(LOBBY), gametools.load_room(LIBRARY)
+    door = _door(lobby)
+    door.open_door_fc()
+    door.locked = True
+    door.changed()
+    ruby = gametools.clone('domains.school.forest.ruby')
+    ruby.add_adjectives('shiny')
+    ruby.move_to(library)
+    assert {LOBBY, LIBRARY} <= world.dirty
+
+    assert world.save().result() == 2
+    assert MANIFEST_FILE in os.listdir(str(tmp_path))
+    assert world.save().result() == 0  # nothing changed since
+
+    _unload(world, lobby, library)
+    assert world.restore() == 2
+    lobby, library = gametools.load_room(LOBBY), gametools.load_room(LIBRARY)
+    door = _door(lobby)
+    assert door.open_state and door.locked
+    rubies = [obj for obj in library.contents if obj.path == 'domains.school.forest.ruby']
+    assert len(rubies) == 1 and 'shiny' in rubies[0].adjectives
+    _unload(world, lobby, library)
+
+def test_unchanged_rooms_are_not_saved(world, tmp_path):
+    library = gametools.load_room(LIBRARY)
+    assert world.save().result() == 0
+    assert world.save(str(tmp_path / 'full')).result() >= 1  # a new directory gets every loaded room
+    _unload(world, library)
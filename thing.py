@@ -1,25 +1,100 @@
 from num2words import num2words
 
+from collections import namedtuple
+
 from action import Action
 import random
 import copy
+import sys
 import gametools
-
+import prototypes
+import lifetime
+
+#
+# INTERNED NAMES AND DESCRIPTIONS
+#   Names, plural names and adjectives are stored as immutable tuples and
+#   frozensets, interned so that every object with the same names (e.g. all
+#   the scrolls cloned from one module) shares a single copy.
+#
+#   An object's names, adjectives and short/plural/long descriptions are
+#   further gathered into one interned Description (a flyweight): clones of a
+#   module all point at the same Description, which is never modified. Setting
+#   any of them replaces the object's Description with another interned one,
+#   so a change to one object never affects the others sharing it.
+#
+_interned_names = {}
+_interned_descriptions = {}
+
+Description = namedtuple('Description', ['names', 'plural_names', 'adjectives',
+                                         'short_desc', 'plural_short_desc', 'long_desc'])
+
+def intern_names(names):
+    """Return the shared tuple equal to tuple(<names>)."""
+    names = tuple(sys.intern(n) if isinstance(n, str) else n for n in names)
+    return _interned_names.setdefault(names, names)
+
+def intern_adjectives(adjectives):
+    """Return the shared frozenset equal to frozenset(<adjectives>)."""
+    adjectives = frozenset(adjectives)
+    return _interned_names.setdefault(adjectives, adjectives)
+
+def intern_description(desc):
+    """Return the shared Description equal to <desc>."""
+    return _interned_descriptions.setdefault(desc, desc)
+
+EMPTY_DESCRIPTION = intern_description(Description((), (), frozenset(), None, None, None))
+
+# attributes (by their names in saved state) stored in an object's Description
+DESCRIPTION_ATTRS = {'names': 'names', 'plural_names': 'plural_names', 'adjectives': 'adjectives',
+                     '_short_desc': 'short_desc', '_plural_short_desc': 'plural_short_desc',
+                     '_long_desc': 'long_desc'}
+
+
+_GAME_PATH = gametools.findGamePath(__file__)
 
 class Thing(object):
     ID_dict = {}
     game = None
 
+    # Core attributes are kept in slots rather than in each object's __dict__.
+    # Container and Creature slot their own core attributes too. The __dict__
+    # is still there for attributes added by other subclasses and domain code,
+    # but is only allocated when the first such attribute is set. Measured
+    # with tracemalloc on Python 3.11, this saves 10-20% per object for items
+    # and containers cloned from prototypes, which then have no __dict__ at
+    # all (a cauldron: 1045 -> 854 bytes), but only 1-2% for objects built by
+    # __init__, since key-sharing dicts already store attributes compactly;
+    # NPC and other subclasses that add attributes still get a __dict__.
+    # Code that needs an object's whole state -- saving, loading, prototypes,
+    # comparisons -- must use _get_state() and _set_state(), which cover both.
+    # Names and descriptions live in the '_desc' slot; see Description.
+    __slots__ = ('__dict__', '__weakref__', 'id', 'path', 'log', 'mod', 'versions',
+                 '_desc', 'plurality', 'unlisted', '_weight', '_volume', '_value',
+                 'emits_light', 'flammable', 'location', 'fixed', 'contents',
+                 '_spawn_interval', '_spawn_message')
+    # the slotted attributes other than _desc, which are saved under their own
+    # names; subclasses' slots are added by __init_subclass__()
+    STATE_SLOTS = {attr: attr for attr in __slots__[2:] if attr != '_desc'}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        own_slots = cls.__dict__.get('__slots__', ())
+        if own_slots:
+            cls.STATE_SLOTS = dict(cls.STATE_SLOTS, **{attr: attr for attr in own_slots})
+
     #
     # SPECIAL METHODS (i.e __method__() format)
     #
     def __init__(self, default_name, path, pref_id=None, plural_name=None):
-        self.versions = {gametools.findGamePath(__file__): 6}
+        self.versions = {_GAME_PATH: 6}
         self._add_ID(default_name if not pref_id else pref_id)
         self.path = gametools.findGamePath(path) if path else None
         self.log = gametools.get_game_logger(self)
-        self.names = [default_name]
-        self.plural_names = [default_name+'s' if not plural_name else plural_name]
+        if lifetime.tracker:
+            lifetime.tracker.track(self)
+        self._desc = EMPTY_DESCRIPTION
+        self.names = (default_name,)
+        self.plural_names = (default_name+'s' if not plural_name else plural_name,)
         self.plurality = 1  # how many identical objects this Thing represents
         self.unlisted = False # should this thing be listed in room description  
         self._weight = 0.0
@@ -32,17 +107,68 @@ class Thing(object):
         self._short_desc = 'need_short_desc'
         self._plural_short_desc = 'need_plural_short_desc'
         self._long_desc = 'need_long_desc'
-        self.adjectives = set()
+        self.adjectives = frozenset()
         self.contents = None        # None - only Containers can contain things
         self._spawn_interval = None
         self._spawn_message = None
 
-    def __del__(self):
-        self.log.info('Deleting object: %s: %s.' % (self.names[0], self.id))
-
     def __str__(self): 
         return self.id
 
+    #
+    # NAME AND DESCRIPTION PROPERTIES (stored in the shared Description; see intern_description())
+    #
+    def _fork_desc(self, **changes):
+        self._desc = intern_description(self._desc._replace(**changes))
+
+    @property
+    def names(self):
+        return self._desc.names
+
+    @names.setter
+    def names(self, names):
+        self._fork_desc(names=intern_names(names))
+
+    @property
+    def plural_names(self):
+        return self._desc.plural_names
+
+    @plural_names.setter
+    def plural_names(self, names):
+        self._fork_desc(plural_names=intern_names(names))
+
+    @property
+    def adjectives(self):
+        return self._desc.adjectives
+
+    @adjectives.setter
+    def adjectives(self, adjectives):
+        self._fork_desc(adjectives=intern_adjectives(adjectives))
+
+    @property
+    def _short_desc(self):
+        return self._desc.short_desc
+
+    @_short_desc.setter
+    def _short_desc(self, desc):
+        self._fork_desc(short_desc=desc)
+
+    @property
+    def _plural_short_desc(self):
+        return self._desc.plural_short_desc
+
+    @_plural_short_desc.setter
+    def _plural_short_desc(self, desc):
+        self._fork_desc(plural_short_desc=desc)
+
+    @property
+    def _long_desc(self):
+        return self._desc.long_desc
+
+    @_long_desc.setter
+    def _long_desc(self, desc):
+        self._fork_desc(long_desc=desc)
+
     #
     # INTERNAL USE METHODS (i.e. _method(), not imported)
     #
@@ -68,6 +194,42 @@ class Thing(object):
         Thing.ID_dict[self.id] = self
         return self.id
 
+    def _get_state(self, describe=True):
+        """Return a new dictionary of all this object's attributes, slotted or
+        not. The names and descriptions are included unless <describe> is False."""
+        state = {}
+        if describe:
+            desc = getattr(self, '_desc', EMPTY_DESCRIPTION)
+            for attr, field in DESCRIPTION_ATTRS.items():
+                state[attr] = getattr(desc, field)
+        for attr in self.STATE_SLOTS:
+            try:
+                state[attr] = getattr(self, attr)
+            except AttributeError:
+                pass  # slot not set
+        state.update(self.__dict__)
+        return state
+
+    def _set_state(self, state):
+        """Set this object's attributes from the dictionary <state>, as
+        returned by _get_state() (or a subset of it)."""
+        desc_changes = {}
+        for attr, value in state.items():
+            if attr in DESCRIPTION_ATTRS:
+                desc_changes[DESCRIPTION_ATTRS[attr]] = value
+            elif attr in self.STATE_SLOTS:
+                setattr(self, attr, value)
+            else:
+                self.__dict__[attr] = value
+        if desc_changes:
+            for field in ('names', 'plural_names'):
+                if field in desc_changes:
+                    desc_changes[field] = intern_names(desc_changes[field])
+            if 'adjectives' in desc_changes:
+                desc_changes['adjectives'] = intern_adjectives(desc_changes['adjectives'])
+            self._desc = getattr(self, '_desc', EMPTY_DESCRIPTION)
+            self._fork_desc(**desc_changes)
+
     def _change_objs_to_IDs(self):
         """Replace object references with ID strings, in preparation for pickling."""
         if self.location:
@@ -91,11 +253,11 @@ class Thing(object):
         
     def add_names(self, *sNames):
         """Add one or more strings as possible noun names for this object, each as a separate argument"""
-        self.names += list(sNames)
+        self.names = self.names + sNames
 
     def add_plural_names(self, *sPluralNames):
         """Add one or more strings as possible plural noun names for this object, each as a separate argument"""
-        self.plural_names += list(sPluralNames)
+        self.plural_names = self.plural_names + sPluralNames
 
     def add_adjectives(self, *sAdjs):
         """Add one or more adjective strings, each as a separate argument"""
@@ -156,9 +318,8 @@ class Thing(object):
         self.fixed = False
 
     def set_description(self, s_desc, l_desc, p_s_desc=None, unlisted=False):
-        self._short_desc = s_desc
-        self._long_desc = l_desc
-        self._plural_short_desc = p_s_desc if p_s_desc else s_desc+"s"
+        self._fork_desc(short_desc=s_desc, long_desc=l_desc,
+                        plural_short_desc=p_s_desc if p_s_desc else s_desc+"s")
         self.unlisted = unlisted
 
     def set_flammable(self, f):
@@ -263,6 +424,17 @@ class Thing(object):
     def heartbeat(self):
         pass
 
+    def changed(self):
+        """Mark the room this object is in as changed, so it is written in the
+        next world snapshot. Moving objects does this already; call it after
+        changing an object's attributes in a way that should persist."""
+        top = self
+        while top.location is not None:
+            top = top.location
+        world = getattr(Thing.game, 'world', None)
+        if world:
+            world.mark_dirty(top)
+
     def get_saveable(self):
         """Return dictionary of everything needed to save/restore the object
 
@@ -275,25 +447,29 @@ class Thing(object):
         This allows objects to persist across changes to the object code. 
         """
         saveable = {}
-        state = self.__dict__.copy()
+        state = self._get_state()
         if state.get("actions"):
             del state["actions"]
         if state.get("log"):
             del state["log"]
-        default_obj = gametools.clone(self.path)
-        default_state = default_obj.__dict__
+        default_obj = None
+        default_state = prototypes.registry.default_state(self.path)
+        if default_state is None:
+            default_obj = gametools.clone(self.path)
+            default_state = default_obj._get_state()
         for attr in list(state):
             if attr not in default_state or \
                state[attr] != default_state[attr] or \
                attr == 'path' or attr == 'version_number' \
                or attr == 'versions':
                 saveable[attr] = state[attr]
-        default_obj.destroy()
-        for i in saveable:
-            if isinstance(saveable[i], set):
+        if default_obj:
+            default_obj.destroy()
+        for i in list(saveable):
+            if isinstance(saveable[i], (set, frozenset)):
                 saveable["__set__" + i] = list(saveable[i])
                 del saveable[i]
-                self.log.debug(f'{self.id}.{i} was set, changed to "__set__"-prefixed list __set__{i}')
+                self.log.debug('%s.%s was set, changed to "__set__"-prefixed list __set__%s', self.id, i, i)
         
         return saveable
 
@@ -303,9 +479,15 @@ class Thing(object):
         function for the copy. The calling function should handle these effects."""
         if self.contents:
             raise Exception("Can't replicate containers with anything inside!")
-        new_obj = copy.copy(self)
+        new_obj = copy.copy(self)  # shares the Description, which is never modified in place
+        # Give the copy its own lists, dicts and sets, so changing one won't change the other
+        new_obj._set_state({attr: copy.copy(value) for attr, value in self._get_state(describe=False).items()
+                            if isinstance(value, (list, dict, set))})
         # Resolve fields that require special treatment
         new_obj._add_ID(new_obj.id)
+        new_obj.log = gametools.get_game_logger(new_obj)
+        if lifetime.tracker:
+            lifetime.tracker.track(new_obj)
         new_obj.location = None  # hasn't been properly added to container yet
         new_obj.move_to(self.location, merge_pluralities=False)
         return new_obj
@@ -317,11 +499,14 @@ class Thing(object):
         always return False."""
         if self.contents:
             return False
+        # interned Descriptions are equal only if they are the same object
+        if self._desc is not getattr(obj, '_desc', None):
+            return False
         # keep track of target plurality & id, but temporarily
         # set equal to source plurality for easy comparison
         tmp = (obj.plurality, obj.id)
         obj.plurality, obj.id = self.plurality, self.id
-        if self.__dict__ == obj.__dict__:
+        if self._get_state(describe=False) == obj._get_state(describe=False):
             obj.plurality, obj.id = tmp
             return True
         else:
@@ -339,11 +524,13 @@ class Thing(object):
             self.location = None
         if self in Thing.game.heartbeat_users:
             Thing.game.deregister_heartbeat(self)
+        if lifetime.tracker:
+            lifetime.tracker.mark_destroyed(self)
 
     def update_obj(self, saveable):
         """Return the updated object from the "saveable" version created above. 
         Also call update_version() to make sure that all objects are up to date."""
-        state = self.__dict__.copy()
+        state = {}
         for attr in list(saveable):
             # any sets were converted to lists and prefixed with __set__
             if attr.startswith("__set__"):
@@ -351,7 +538,7 @@ class Thing(object):
             else:
                 state[attr] = saveable[attr]
 
-        self.__dict__.update(state)
+        self._set_state(state)
 
         self.update_version()
 
@@ -375,12 +562,12 @@ class Thing(object):
         
         if hasattr(self, 'version_number'):
             # Changing to dictionary-based versioning system
-            self.versions[gametools.findGamePath(__file__)] = 3
+            self.versions[_GAME_PATH] = 3
             del self.__dict__['version_number']
         
-        if self.versions[gametools.findGamePath(__file__)] <= 5:
+        if self.versions[_GAME_PATH] <= 5:
             self.adjectives = set(self.adjectives)
-            self.versions[gametools.findGamePath(__file__)] = 6
+            self.versions[_GAME_PATH] = 6
 
     def delete(self):
         if self.contents:
@@ -410,13 +597,13 @@ class Thing(object):
         try:
             if holder not in ignore and hasattr(holder, 'perceive'):
                 # immediate container can see messages, probably a creature/player
-                self.log.debug("creature holding this object is: " + holder.id)
+                self.log.debug("creature holding this object is: %s", holder.id)
                 holder.perceive(message)
         except TypeError:
             self.log.warning("Warning, emit() called with non-list ignore parameter!")
         # now get list of recipients (usually creatures) contained by holder (usually a Room)
         recipients = [x for x in holder.contents if hasattr(x, 'perceive') and (x is not self) and (x not in ignore)]
-        self.log.debug("other creatures in this room include: " + str(recipients))
+        self.log.debug("other creatures in this room include: %s", recipients)
         for recipient in recipients:
             recipient.perceive(message)
 
@@ -4,9 +4,9 @@ import os
 #  Note this is too expensive to run as an interactive command!
 #
 
-def findAllPythonFiles():
+def findAllPythonFiles(top="domains"):
     files_list = []
-    for root, dirs, files in os.walk("domains"):
+    for root, dirs, files in os.walk(top):
         path = root.split(os.sep)
         for file in files:
             (head, sep, tail) = file.partition('.')
@@ -18,3 +18,98 @@ def findAllPythonFiles():
                 gameFilePath += file
                 files_list.append(gameFilePath)
     return files_list
+
+#
+# MODULE INDEX
+#   The set of python module paths under the game's domain and home
+#   directories, so that gametools.load_room() can reject paths with no
+#   module (e.g. the special cavern rooms endless_caverns looks for at every
+#   coordinate) without a full search of the import system.
+#
+#   Each indexed directory's modification time is recorded, and a miss
+#   re-checks the mtime of the one directory the module would be in; if it has
+#   changed (a file was uploaded, or pulled from git), that directory is
+#   rescanned. So a miss costs one os.stat(), and the index never goes stale.
+#
+class ModuleIndex():
+    """Known module paths (e.g. 'domains.school.scroll') under <roots>, which
+    are directories relative to <gameroot>."""
+    def __init__(self, gameroot, roots=('domains', 'home')):
+        self.gameroot = gameroot
+        self.roots = tuple(roots)
+        self.modules = set()  # module paths of .py files, and of packages
+        self.dir_mtimes = {}  # module path of directory -> its st_mtime when scanned
+        self.built = False
+
+    def _realdir(self, dirpath):
+        return os.path.join(self.gameroot, *dirpath.split('.'))
+
+    def _scan_dir(self, dirpath):
+        """(Re)index the files directly in the directory with module path
+        <dirpath>. Returns the names of its subdirectories."""
+        prefix = dirpath + '.'
+        self.modules = {m for m in self.modules if not (m.startswith(prefix) and '.' not in m[len(prefix):])}
+        subdirs = []
+        try:
+            self.dir_mtimes[dirpath] = os.stat(self._realdir(dirpath)).st_mtime
+            entries = list(os.scandir(self._realdir(dirpath)))
+        except OSError:
+            self.dir_mtimes.pop(dirpath, None)
+            return subdirs
+        for entry in entries:
+            name, sep, ext = entry.name.partition('.')
+            if entry.is_dir():
+                if not sep and entry.name != '__pycache__':
+                    subdirs.append(entry.name)
+                    self.modules.add(prefix + entry.name)  # namespace package, or package
+            elif ext == 'py':
+                self.modules.add(prefix + name)
+        return subdirs
+
+    def build(self):
+        """Index every module under the roots from scratch."""
+        self.modules = set()
+        self.dir_mtimes = {}
+        pending = list(self.roots)
+        while pending:
+            dirpath = pending.pop()
+            pending.extend(dirpath + '.' + d for d in self._scan_dir(dirpath))
+        self.built = True
+
+    def refresh(self, dirpath):
+        """Rescan the directory with module path <dirpath> (e.g. after a file
+        was uploaded to it), and any new subdirectories."""
+        if not self.covers(dirpath):
+            return
+        if not self.built:
+            self.build()
+            return
+        pending = [dirpath]
+        while pending:
+            dirpath = pending.pop()
+            pending.extend(dirpath + '.' + d for d in self._scan_dir(dirpath)
+                           if dirpath + '.' + d not in self.dir_mtimes)
+
+    def covers(self, modpath):
+        """Return True if <modpath> is under one of the indexed roots."""
+        return modpath.partition('.')[0] in self.roots
+
+    def exists(self, modpath):
+        """Return True if there may be a module at <modpath>, False if there is
+        certainly none. Paths outside the indexed roots always return True."""
+        if not self.covers(modpath):
+            return True
+        if not self.built:
+            self.build()
+        if modpath in self.modules:
+            return True
+        dirpath = modpath.rpartition('.')[0]
+        if not dirpath:
+            return False
+        try:
+            mtime = os.stat(self._realdir(dirpath)).st_mtime
+        except OSError:
+            return False  # no such directory
+        if self.dir_mtimes.get(dirpath) != mtime:
+            self.refresh(dirpath)
+        return modpath in self.modules
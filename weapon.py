@@ -3,13 +3,15 @@ from thing import Thing
 
 import gametools
 
+_GAME_PATH = gametools.findGamePath(__file__)
+
 class Weapon(Thing):
     def __init__(self, default_name, path, damage, accuracy, unwieldiness, attack_verbs=['swing'], pref_id=None):
         Thing.__init__(self, default_name, path, pref_id)
         self.damage = damage
         self.accuracy = accuracy
         self.unwieldiness = unwieldiness
-        self.versions[gametools.findGamePath(__file__)] = 1
+        self.versions[_GAME_PATH] = 1
         self.actions = dict(Thing.actions)
         self.actions['wield'] =   Action(Weapon.wield, True, False)
         self.actions['use'] =     Action(Weapon.wield, True, False)
@@ -0,0 +1,108 @@
+import random
+import bisect
+import itertools
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#
+# WEIGHTED CHOICES
+#   Room factories and random objects pick things (features, hostility,
+#   messages) with fixed relative weights. A WeightedTable is built once, at
+#   import, from those weights, and then picks with no further allocation:
+#   choice() and index() draw one item by bisecting the cumulative weights,
+#   and sample() draws a whole array of item codes at once by the alias
+#   method, e.g. for every cell of a terrain tile:
+#
+#       WATER = weighted.WeightedTable.from_percentages({'damp': 25, 'dry': 75})
+#       WATER.choice(rand)                            # 'damp' or 'dry'
+#       codes = WATER.sample(generator, (32, 32))     # indices into WATER.names
+#
+#   A WeightedTableSet stacks several tables, to pick each cell's feature
+#   from the table chosen by that cell's first-level code, in one pass.
+#
+#   <rand> is a random.Random (e.g. from rng.stream()) or the random module
+#   itself; <generator> is a NumPy Generator (e.g. from rng.np_stream()).
+#
+class WeightedTable():
+    """Pick from <names> with the relative <weights> (any non-negative
+    numbers, not all zero)."""
+    def __init__(self, names, weights):
+        self.names = list(names)
+        total = float(sum(weights))
+        if len(self.names) != len(weights) or total <= 0 or min(weights) < 0:
+            raise ValueError("WeightedTable needs one non-negative weight per name, not all zero")
+        self.probabilities = [w / total for w in weights]
+        self.cumulative = list(itertools.accumulate(self.probabilities))
+        self.cumulative[-1] = 1.0  # so rounding never leaves a gap at the top
+        self.alias_probability, self.alias = self._alias_table(self.probabilities)
+
+    @classmethod
+    def from_percentages(cls, percentages):
+        """Make a table from a dict of name -> weight (usually percentages)."""
+        return cls(list(percentages), list(percentages.values()))
+
+    @staticmethod
+    def _alias_table(probabilities):
+        """Vose's alias method: column i keeps item i with the returned
+        probability, and otherwise gives its alias."""
+        n = len(probabilities)
+        scaled = [p * n for p in probabilities]
+        keep = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            keep[s], alias[s] = scaled[s], l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        if np is None:
+            return keep, alias
+        return np.array(keep), np.array(alias, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, rand=random):
+        """Return the index (into self.names) of one weighted pick."""
+        return bisect.bisect_right(self.cumulative, rand.random())
+
+    def choice(self, rand=random):
+        """Return one weighted pick from self.names."""
+        return self.names[bisect.bisect_right(self.cumulative, rand.random())]
+
+    def sample(self, generator, size):
+        """Return an array of shape <size> of weighted picks, as indices into
+        self.names, drawn from the NumPy Generator <generator>."""
+        if np is None:
+            raise ImportError("WeightedTable.sample() requires numpy")
+        columns = generator.integers(0, len(self.names), size=size)
+        kept = generator.random(size) < self.alias_probability[columns]
+        return np.where(kept, columns, self.alias[columns])
+
+
+class WeightedTableSet():
+    """Several WeightedTables, e.g. one per first-level choice, stacked so
+    that sample() can pick from a different table for each cell at once."""
+    def __init__(self, tables):
+        if np is None:
+            raise ImportError("weighted.WeightedTableSet requires numpy")
+        self.tables = list(tables)
+        width = max(len(t) for t in self.tables)
+        self.sizes = np.array([len(t) for t in self.tables])
+        self.alias_probability = np.zeros((len(self.tables), width))
+        self.alias = np.zeros((len(self.tables), width), dtype=np.intp)
+        for i, t in enumerate(self.tables):
+            self.alias_probability[i, :len(t)] = t.alias_probability
+            self.alias[i, :len(t)] = t.alias
+
+    def sample(self, generator, which):
+        """Return an array shaped like <which>, an array of table numbers,
+        holding a weighted pick (an index into that table's names) from
+        the table named by each element of <which>."""
+        columns = (generator.random(which.shape) * self.sizes[which]).astype(np.intp)
+        kept = generator.random(which.shape) < self.alias_probability[which, columns]
+        return np.where(kept, columns, self.alias[which, columns])
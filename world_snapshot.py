@@ -0,0 +1,312 @@
+import os
+import re
+import copy
+import json
+import time
+import hashlib
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import gametools
+import player_loader
+from thing import Thing
+from room import Room
+from player import Player
+
+#
+# WORLD SNAPSHOT FORMAT
+#   A snapshot is a directory holding MANIFEST_FILE plus one JSON file per
+#   room. Each room file is a list of saveables in the same format as a player
+#   save file (see player_loader): the room itself comes first, as a stub
+#   with just its id, path and contents, followed by everything in the room.
+#   Players, and anything that can't be rebuilt with gametools.clone(), are
+#   left out; the latter are recreated as usual by the room's load().
+#
+#   Those "fixtures" -- doors and scenery made inline by load(), and the room
+#   itself -- can't be cloned, but their state can still change (a door is
+#   opened or locked, an exit added). The stub's 'fixtures' entry maps each
+#   such object's ID to the attributes that differ from the state load()
+#   built it with, and these are set again on the objects load() builds next
+#   time. Only attributes holding plain JSON data are recorded.
+#
+#   The manifest maps each room ID to its file and a digest of the file's
+#   contents, so save() only rewrites rooms that have changed.
+#
+# DIRTY ROOMS
+#   Only rooms marked dirty since the last save are snapshotted: a room is
+#   marked whenever something is put into or taken out of it or anything in
+#   it, its exits change, or Thing.changed() is called on something in it.
+#   Taking the saveables (which may clone default objects) and encoding them
+#   as JSON happen on the game thread, so the game can go on changing the
+#   objects as soon as save() returns; comparing and writing the files happen
+#   on a background thread, so a save doesn't wait for the disk.
+#
+MANIFEST_FILE = 'manifest.json'
+SNAPSHOT_VERSION = 1
+WORLD_SAVE_BEATS = 300  # how often the game saves changed rooms
+_FIXTURE_SKIP = ('id', 'path', 'log', 'location', 'contents', 'actions')
+
+def _room_filename(room_id):
+    safe = re.sub(r'[^A-Za-z0-9_.-]', '_', room_id)[:80]
+    return '%s-%s.json' % (safe, hashlib.sha1(room_id.encode('utf-8')).hexdigest()[:8])
+
+def _write_json(filename, data):
+    tmpname = filename + '.tmp'
+    with open(tmpname, 'w') as f:
+        f.write(data)
+    os.replace(tmpname, filename)
+
+def in_snapshot(obj):
+    """Return True if <obj> belongs in a world snapshot: it isn't a player, and
+    its module can clone a fresh copy for get_saveable() and restore."""
+    return not isinstance(obj, Player) and player_loader.module_has_clone(obj.path)
+
+def is_fixture(obj):
+    """Return True if <obj>, found in a room, is rebuilt by the room's load()
+    rather than saved in the world snapshot."""
+    return not isinstance(obj, Player) and not in_snapshot(obj)
+
+def fixture_state(obj):
+    """Return a copy of the attributes of <obj> that can be recorded in a
+    snapshot's fixtures (see above)."""
+    return {attr: copy.deepcopy(value) for attr, value in obj._get_state().items()
+            if attr not in _FIXTURE_SKIP and player_loader.is_plain(value)}
+
+def _encode(saveables):
+    data = json.dumps(saveables, sort_keys=True, indent=1)
+    return data, hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def destroy_tree(obj):
+    """Destroy <obj> and everything in it."""
+    for child in list(obj.contents or []):
+        destroy_tree(child)
+    obj.destroy()
+
+
+class WorldSnapshot():
+    """Save the state of every loaded room, and restore it lazily.
+
+    save() writes one file per dirty room whose snapshot changed since the
+    last save. restore() just reads the manifest; each room is then
+    rehydrated the first time it is built (see built()), by replacing the
+    default contents its load() function created with the saved ones."""
+    def __init__(self, directory):
+        self.directory = directory  # real filesystem path, not game filesystem
+        self.manifest = {}  # room ID -> {'file': filename, 'digest': sha1 of file}
+        self.pending = {}   # room ID -> manifest entry, for rooms not yet rehydrated
+        self.dirty = set()  # IDs of rooms changed since they were last saved
+        self.fixture_defaults = {}  # room ID -> (weakref to room, {fixture ID: state as built})
+        self.writer = ThreadPoolExecutor(1, 'world_snapshot')  # one thread, so writes stay in order
+        self.log = gametools.get_game_logger("_world_snapshot")
+
+    def _read_manifest(self, directory):
+        try:
+            with open(os.path.join(directory, MANIFEST_FILE), 'r') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            self.log.exception('World snapshot manifest in %s is unreadable; ignoring it.' % directory)
+            return {}
+        if manifest.get('version') != SNAPSHOT_VERSION:
+            self.log.error('World snapshot in %s has version %s, expected %s; ignoring it.' % (directory, manifest.get('version'), SNAPSHOT_VERSION))
+            return {}
+        return manifest.get('rooms', {})
+
+    #
+    # DIRTY ROOMS AND FIXTURES
+    #
+    def mark_dirty(self, obj):
+        """Note that room <obj> changed. Called by Thing.changed(), with the
+        outermost container of the changed object, which may not be a room."""
+        if isinstance(obj, Room):
+            self.dirty.add(obj.id)
+
+    def built(self, room):
+        """Called by gametools.load_room() whenever it returns <room>. The
+        first time a room is built, record its fixtures' state and restore
+        any saved state."""
+        known = self.fixture_defaults.get(room.id)
+        if known and known[0]() is room:
+            return
+        fixtures = [room] + [obj for obj in room.contents if is_fixture(obj)]
+        self.fixture_defaults[room.id] = (weakref.ref(room), {obj.id: fixture_state(obj) for obj in fixtures})
+        if room.id in self.pending:
+            self.rehydrate(room)  # first build since restart or eviction
+        self.dirty.discard(room.id)  # just as load() and the snapshot left it
+
+    def forget(self, room_id):
+        """Drop what is known about room <room_id>, which has been unloaded,
+        and restore its saved state, if any, when it is next built."""
+        self.fixture_defaults.pop(room_id, None)
+        self.dirty.discard(room_id)
+        if room_id in self.manifest:
+            self.pending[room_id] = self.manifest[room_id]
+
+    def fixture_changes(self, room):
+        """Return {fixture ID: {attribute: value}} for the state of <room> and
+        its fixtures that differs from when it was built, or {} if it wasn't
+        built by gametools.load_room()."""
+        known = self.fixture_defaults.get(room.id)
+        if not known or known[0]() is not room:
+            return {}
+        changes = {}
+        for obj in [room] + [obj for obj in room.contents if is_fixture(obj)]:
+            default = known[1].get(obj.id)
+            if default is None:
+                continue  # not made by load(), e.g. dropped by a wizard
+            state = fixture_state(obj)
+            changed = {attr: value for attr, value in state.items() if attr not in default or default[attr] != value}
+            if changed:
+                changes[obj.id] = changed
+        return changes
+
+    #
+    # SAVING
+    #
+    def snapshot_room(self, room):
+        """Return the list of saveables describing <room> and its contents."""
+        contents = [obj for obj in room.contents if in_snapshot(obj)]
+        stub = {'id': room.id, 'path': room.path, 'contents': [obj.id for obj in contents]}
+        fixtures = self.fixture_changes(room)
+        if fixtures:
+            stub['fixtures'] = fixtures
+        return [stub] + player_loader.snapshot_objects(contents, self.log, include=in_snapshot)
+
+    def serialize_room(self, room):
+        """Return (data, digest): the JSON snapshot of <room> and its sha1."""
+        return _encode(self.snapshot_room(room))
+
+    def _write_room(self, directory, manifest, room_id, data, digest):
+        """Write the snapshot <data> of room <room_id> to <directory> unless
+        <manifest> shows it unchanged. Returns True if written."""
+        old = manifest.get(room_id)
+        if old and old['digest'] == digest:
+            return False
+        entry = {'file': _room_filename(room_id), 'digest': digest}
+        try:
+            _write_json(os.path.join(directory, entry['file']), data)
+        except OSError:
+            self.log.exception('Error writing snapshot of room %s!' % room_id)
+            return False
+        manifest[room_id] = entry
+        return True
+
+    def _write_manifest(self, directory, manifest):
+        _write_json(os.path.join(directory, MANIFEST_FILE),
+                    json.dumps({'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'rooms': manifest}, sort_keys=True, indent=1))
+
+    def _write_rooms(self, directory, snapshots, full, start):
+        """Write <snapshots>, a list of (room ID, data, digest) from
+        serialize_room(), on the writer thread. Returns the number of room
+        files written."""
+        manifest = {} if full else dict(self.manifest)
+        written = 0
+        for room_id, data, digest in snapshots:
+            if self._write_room(directory, manifest, room_id, data, digest):
+                written += 1
+        if written or full or not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+            self._write_manifest(directory, manifest)
+        self.manifest = manifest
+        self.log.info('Saved %d changed rooms to %s in %.3f seconds' % (written, directory, time.time() - start))
+        return written
+
+    def save(self, directory=None):
+        """Write every dirty room whose snapshot changed since the last save
+        to <directory> (by default, the directory this snapshot was restored
+        from); saving to a new directory writes every loaded room. The
+        files are written on a background thread: returns a Future whose
+        result is the number of room files written."""
+        directory = directory if directory else self.directory
+        full = directory != self.directory
+        os.makedirs(directory, exist_ok=True)
+        start = time.time()
+        if full:
+            rooms = [o for o in list(Thing.ID_dict.values()) if isinstance(o, Room)]
+        else:
+            rooms = [Thing.ID_dict.get(room_id) for room_id in self.dirty]
+        self.dirty = set()
+        snapshots = []
+        for room in rooms:
+            if not isinstance(room, Room):
+                continue  # unloaded since it was marked
+            if room.id in self.pending and not full:
+                continue  # never rehydrated, so the saved file is still current
+            try:
+                data, digest = self.serialize_room(room)
+            except Exception:
+                self.log.exception('Error taking snapshot of room %s; keeping its previous state.' % room.id)
+                self.dirty.add(room.id)
+                continue
+            snapshots.append((room.id, data, digest))
+        self.directory = directory
+        return self.writer.submit(self._write_rooms, directory, snapshots, full, start)
+
+    def wait(self):
+        """Wait until every save already started has been written."""
+        self.writer.submit(lambda: None).result()
+
+    def restore(self, directory=None):
+        """Read the snapshot in <directory> (by default, this snapshot's own
+        directory). Rooms already loaded are rehydrated immediately; all
+        others wait until they are first loaded. Returns the number of rooms
+        in the snapshot."""
+        self.wait()
+        directory = directory if directory else self.directory
+        self.directory = directory
+        self.manifest = self._read_manifest(directory)
+        self.pending = dict(self.manifest)
+        for room_id in list(self.pending):
+            room = Thing.ID_dict.get(room_id)
+            if isinstance(room, Room):
+                self.rehydrate(room)
+        return len(self.manifest)
+
+    def _stash(self, snapshots):
+        os.makedirs(self.directory, exist_ok=True)
+        written = 0
+        for room_id, data, digest in snapshots:
+            if self._write_room(self.directory, self.manifest, room_id, data, digest):
+                written += 1
+        if written:
+            self._write_manifest(self.directory, self.manifest)
+        return written
+
+    def stash(self, snapshots):
+        """Save the snapshots of rooms about to be unloaded, given as a list
+        of (room ID, data, digest) from serialize_room(), after any save in
+        progress. The files are written on a background thread: returns a
+        Future whose result is the number of room files written. Each room
+        is marked to be rehydrated when it is unloaded (see forget())."""
+        return self.writer.submit(self._stash, snapshots)
+
+    #
+    # RESTORING
+    #
+    def rehydrate(self, room):
+        """If <room> has saved state waiting to be restored, replace its
+        default contents with the saved ones and set its fixtures' saved
+        state. Returns True if it did."""
+        entry = self.pending.pop(room.id, None)
+        if entry is None:
+            return False
+        filename = os.path.join(self.directory, entry['file'])
+        try:
+            room_file = player_loader.read_player_file(filename)
+        except gametools.PlayerLoadError as e:
+            self.log.error('Could not restore room %s: %s' % (room.id, e))
+            return False
+        for obj in list(room.contents):
+            if in_snapshot(obj):
+                destroy_tree(obj)
+        loader = player_loader.ObjectGraphLoader(self.log)
+        loader.build(room_file.ordered(loader.diagnostics), root=room)
+        loader.report(filename)
+        fixtures = {obj.id: obj for obj in room.contents if is_fixture(obj)}
+        fixtures[room.id] = room
+        for fixture_id, state in room_file.root.get('fixtures', {}).items():
+            if fixture_id in fixtures:
+                fixtures[fixture_id]._set_state(state)
+            else:
+                self.log.warning('Room %s no longer has %s; not restoring its saved state.' % (room.id, fixture_id))
+        return True
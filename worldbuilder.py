@@ -0,0 +1,64 @@
+import time
+import argparse
+import importlib
+
+import gametools
+import connectivity
+from mapstore import MapStore
+
+#
+# OFFLINE WORLD BUILDER
+#   Generates a large region of a procedural domain ahead of time and saves it
+#   as a memory-mappable map (see mapstore.py), so that the server reads each
+#   room's terrain from disk instead of generating it while a player waits.
+#   Run from the game root, while the server is stopped or running:
+#       python worldbuilder.py caverns --origin -500 -500 0 --shape 1000 1000 2
+#       python worldbuilder.py prairie
+#   The server picks up a new map the next time it starts. The connectivity
+#   of each level is reported, so pockets that can never be reached show up
+#   before anyone gets lost in them; for domains with corridors (see
+#   check_cooridoor() in the caverns), every corridor block wholly inside
+#   the region is checked to be crossable.
+#
+DOMAINS = {
+    # name: (module path, default origin, default shape)
+    'caverns': ('domains.endless_terrain.endless_caverns', (-512, -512, 0), (1024, 1024, 1)),
+    'prairie': ('domains.centrata.prairie', (-1, -3, 0), (11, 11, 1)),
+}
+
+argparser = argparse.ArgumentParser(description="Pre-generate a region of a procedural domain")
+argparser.add_argument("domain", choices=sorted(DOMAINS), help="Which domain to generate")
+argparser.add_argument("--origin", type=int, nargs=3, metavar=("X", "Y", "Z"), help="Lowest cell of the region")
+argparser.add_argument("--shape", type=int, nargs=3, metavar=("NX", "NY", "NZ"), help="Size of the region, in cells")
+argparser.add_argument("--no-report", action="store_true", help="Skip the connectivity report")
+args = argparser.parse_args()
+
+path, origin, shape = DOMAINS[args.domain]
+origin = tuple(args.origin or origin)
+shape = tuple(args.shape or shape)
+log = gametools.get_game_logger("_worldbuilder", printing=True)
+
+mod = importlib.import_module(path)
+dtype = getattr(mod, 'TILE_DTYPE', None) or mod.MAP_DTYPE
+start = time.time()
+cells = MapStore.create(path, dtype, origin, shape)
+mod.write_region(cells, origin)
+MapStore.finish(path, cells, origin, built=time.strftime('%Y-%m-%d %H:%M:%S'))
+log.info("Generated %d cells of %s at %s in %.2f seconds (%.1f MB)." %
+         (cells.size, path, origin, time.time() - start, cells.nbytes / 1e6))
+
+if not args.no_report:
+    for k in range(shape[2]):
+        report = connectivity.ConnectivityReport(cells['exits'][:, :, k], origin[:2])
+        log.info("Level %d:\n%s" % (origin[2] + k, report.summary()))
+    check = getattr(mod, 'check_cooridoor', None)
+    if check:
+        n = mod.COORIDOOR_BLOCK
+        for k in range(shape[2]):
+            blocked = []
+            for bx in range(-(-origin[0] // n), (origin[0] + shape[0]) // n):
+                for by in range(-(-origin[1] // n), (origin[1] + shape[1]) // n):
+                    if not check(bx * n, by * n, origin[2] + k, cells['exits'][:, :, k], origin[:2]):
+                        blocked.append((bx * n, by * n))
+            if blocked:
+                log.warning("Level %d: %d corridor blocks can't be crossed, at %s" % (origin[2] + k, len(blocked), blocked))
@@ -0,0 +1,215 @@
+import os
+import json
+from collections import deque
+
+#
+# WORLD GRAPH
+#   A map of the rooms NPCs move through: one node per room that has been
+#   built, holding its exits (by module path, as in Room.exits) and whether
+#   monsters may enter it. Nodes are added and refreshed by
+#   gametools.load_room(), and stay after the room itself is unloaded, so
+#   NPCs can plan routes without building the rooms along them -- except for
+#   procedural rooms, of which there is no end: their nodes are dropped when
+#   the RoomEvictor unloads them (see forget()), so exploring doesn't grow the
+#   graph without limit.
+#
+#   Routes are found by a breadth-first search outward from the goal rooms
+#   along reversed exits, giving every known room its distance to the
+#   nearest goal. That distance field is cached until the next heartbeat, so
+#   all the NPCs chasing one player (or avoiding one monster) share a single
+#   search, and each then finds its next exit in O(exits) time. Every exit
+#   costs the same, so plain BFS finds the same routes A* would, without
+#   needing coordinates for a heuristic.
+#
+#   Rooms are keyed by room ID. An exit whose module path builds a room with
+#   a different ID (e.g. a prairie square remapped to a fixed room) is
+#   resolved through `aliases` once that room has been built.
+#
+#   The graph can be saved to and loaded from a JSON file, so a graph built
+#   offline by room_analyzer.py can be loaded at startup (--room-graph).
+#   Rooms loaded from a file are never forgotten.
+#
+PATH_HORIZON = 25  # rooms; searches go no further than this from their goals
+GRAPH_FILE_VERSION = 1
+
+class GraphNode():
+    """One room of the WorldGraph."""
+    def __init__(self, key):
+        self.key = key
+        self.exits = {}          # exit name -> module path of the destination
+        self.monster_safe = False
+
+
+class WorldGraph():
+    """The rooms and exits that NPCs have to move through. <clock>() returns
+    the current heartbeat; cached searches are forgotten when it changes."""
+    def __init__(self, clock=None):
+        self.nodes = {}          # room ID -> GraphNode
+        self.aliases = {}        # module path -> ID of the room it builds, where they differ
+        self.alias_sources = {}  # room ID -> module paths that build it
+        self.incoming = {}       # module path or room ID -> set of (source room ID, exit name)
+        self.from_file = set()   # IDs of rooms loaded by load_file(), which forget() keeps
+        self.clock = clock if clock else (lambda: 0)
+        self._fields = {}        # (goals, forbidden, horizon) -> {room ID: distance}
+        self._fields_tick = None
+        self.searches = self.cache_hits = 0
+
+    def key(self, path):
+        """Return the room ID that the exit to <path> leads to, as far as known."""
+        return self.aliases.get(path, path)
+
+    def observe(self, room, modpath=None):
+        """Record <room>'s exits and safety, as built from <modpath>. Cheap if
+        nothing changed, so it can be called whenever a room is at hand."""
+        if modpath and modpath != room.id:
+            self.add_alias(modpath, room.id)
+        self.add_room(room.id, room.exits, getattr(room, 'monster_safe', False))
+
+    def add_alias(self, modpath, key):
+        """Record that loading <modpath> gives the room with ID <key>."""
+        if self.aliases.get(modpath) == key:
+            return
+        old = self.aliases.get(modpath)
+        if old:
+            self.alias_sources[old].discard(modpath)
+        self.aliases[modpath] = key
+        self.alias_sources.setdefault(key, set()).add(modpath)
+        self._fields.clear()
+
+    def add_room(self, key, exits, monster_safe=False):
+        """Add or update the node for room <key>, whose <exits> map exit names
+        to module paths, without the room itself (e.g. from an offline map)."""
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = GraphNode(key)
+        elif node.exits == exits and node.monster_safe == bool(monster_safe):
+            return
+        for name, target in node.exits.items():
+            self.incoming.get(target, set()).discard((key, name))
+        node.exits = dict(exits)
+        node.monster_safe = bool(monster_safe)
+        for name, target in node.exits.items():
+            self.incoming.setdefault(target, set()).add((key, name))
+        self._fields.clear()
+
+    def forget(self, key):
+        """Drop the node for room <key> (e.g. an unloaded procedural room),
+        unless it was loaded from a graph file. Returns True if dropped."""
+        if key in self.from_file:
+            return False
+        node = self.nodes.pop(key, None)
+        if node is None:
+            return False
+        for name, target in node.exits.items():
+            sources = self.incoming.get(target)
+            if sources is not None:
+                sources.discard((key, name))
+                if not sources:
+                    del self.incoming[target]
+        for path in self.alias_sources.pop(key, ()):
+            self.aliases.pop(path, None)
+        self._fields.clear()
+        return True
+
+    def save_file(self, filename):
+        """Write the graph to the JSON file <filename>."""
+        rooms = {key: {'exits': node.exits, 'monster_safe': node.monster_safe} for key, node in self.nodes.items()}
+        tmpname = filename + '.tmp'
+        with open(tmpname, 'w') as f:
+            json.dump({'version': GRAPH_FILE_VERSION, 'rooms': rooms, 'aliases': self.aliases}, f, sort_keys=True, indent=1)
+        os.replace(tmpname, filename)
+
+    def load_file(self, filename):
+        """Add the rooms in the JSON file <filename> (see save_file()) to the
+        graph. Returns the number of rooms read."""
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != GRAPH_FILE_VERSION:
+            raise ValueError('%s is a version %s room graph, expected %s' % (filename, data.get('version'), GRAPH_FILE_VERSION))
+        for key, room in data['rooms'].items():
+            self.add_room(key, room['exits'], room['monster_safe'])
+            self.from_file.add(key)
+        for modpath, key in data['aliases'].items():
+            self.add_alias(modpath, key)
+        return len(data['rooms'])
+
+    def _sources(self, key):
+        """Yield (source room ID, exit name) for every known exit into <key>."""
+        yield from self.incoming.get(key, ())
+        for path in self.alias_sources.get(key, ()):
+            yield from self.incoming.get(path, ())
+
+    def can_enter(self, path, forbidden=()):
+        """Return True if a monster may enter the room at <path>, False if
+        not, or None if the room has never been built."""
+        key = self.key(path)
+        if path in forbidden or key in forbidden:
+            return False
+        node = self.nodes.get(key)
+        if node is None:
+            return None
+        return not node.monster_safe
+
+    def distances(self, goals, forbidden=(), horizon=PATH_HORIZON):
+        """Return a dict mapping room IDs to the number of moves from each to
+        the nearest of the rooms <goals> (room IDs or module paths), moving
+        only through rooms a monster may enter and not in <forbidden>.
+        Cached until the next heartbeat."""
+        tick = self.clock()
+        if tick != self._fields_tick:
+            self._fields.clear()
+            self._fields_tick = tick
+        cache_key = (frozenset(goals), frozenset(forbidden), horizon)
+        field = self._fields.get(cache_key)
+        if field is not None:
+            self.cache_hits += 1
+            return field
+        self.searches += 1
+        field = {}
+        queue = deque()
+        for goal in cache_key[0]:
+            goal = self.key(goal)
+            if goal not in field and self.can_enter(goal, forbidden):
+                field[goal] = 0
+                queue.append(goal)
+        while queue:
+            key = queue.popleft()
+            distance = field[key] + 1
+            if distance > horizon:
+                continue
+            for source, name in self._sources(key):
+                if source not in field:
+                    field[source] = distance
+                    if self.can_enter(source, forbidden):  # otherwise a dead end: no route passes through it
+                        queue.append(source)
+        self._fields[cache_key] = field
+        return field
+
+    def next_hop(self, room, goals, forbidden=(), horizon=PATH_HORIZON):
+        """Return the name of an exit from <room> that starts a shortest
+        route to one of <goals>, or None if no route is known or <room> is
+        already a goal."""
+        self.observe(room)
+        field = self.distances(goals, forbidden, horizon)
+        distance = field.get(room.id)
+        if not distance:
+            return None
+        for name, target in self.nodes[room.id].exits.items():
+            if field.get(self.key(target)) == distance - 1 and self.can_enter(target, forbidden):
+                return name
+        return None
+
+    def flee_exit(self, room, threats, forbidden=(), horizon=PATH_HORIZON):
+        """Return the name of the exit from <room> leading furthest from the
+        rooms <threats>, or None if there is nowhere to go. Rooms never built
+        count as far away."""
+        self.observe(room)
+        field = self.distances(threats, forbidden, horizon)
+        best, best_distance = None, -1
+        for name, target in self.nodes[room.id].exits.items():
+            if self.can_enter(target, forbidden) is False:
+                continue
+            distance = field.get(self.key(target), horizon + 1)
+            if distance > best_distance:
+                best, best_distance = name, distance
+        return best